@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+سرور محلی جایگزین ترب برای بنچمارک آفلاین
+صفحات لیست و محصول از فیکسچرهای ضبط‌شده در benchmarks/fixtures ساخته می‌شوند
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+from typing import Dict, Optional
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+BRANDS = ['سامسونگ (Samsung)', 'شیائومی (Xiaomi)', 'سن دیسک (SanDisk)', 'ایسوس (Asus)', 'لنوو (Lenovo)']
+CATEGORY_PATHS = [
+    ['موبایل و کالای دیجیتال', 'گوشی موبایل'],
+    ['موبایل و کالای دیجیتال', 'لوازم جانبی', 'کارت حافظه'],
+    ['لوازم خانگی', 'آشپزخانه', 'چای ساز'],
+]
+KEY_SPEC_NAMES = ['حافظه داخلی', 'ظرفیت باتری', 'دوربین اصلی', 'تعداد سیم کارت']
+GENERAL_SPEC_NAMES = ['وزن', 'ابعاد', 'رنگ', 'جنس بدنه', 'گارانتی', 'کشور سازنده', 'سال عرضه', 'توضیحات']
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class BenchmarkSite:
+    """
+    تولید قطعی صفحات فروشگاه نمونه با گونه‌های کند، بدون مشخصات و اسکرول بی‌نهایت
+    """
+
+    def __init__(self, num_products: int = 100, slow_every: int = 10, slow_delay: float = 3.0,
+                 missing_specs_every: int = 7, page_size: int = 24, response_delay: float = 0.0):
+        self.num_products = num_products
+        self.slow_every = slow_every
+        self.slow_delay = slow_delay
+        self.missing_specs_every = missing_specs_every
+        self.page_size = page_size
+        self.response_delay = response_delay
+        self.templates = {
+            'listing': load_fixture('listing.html'),
+            'listing_infinite': load_fixture('listing_infinite.html'),
+            'product': load_fixture('product.html'),
+            'product_missing_specs': load_fixture('product_missing_specs.html'),
+        }
+        self.products = [self._make_product(i) for i in range(num_products)]
+        self.by_uuid = {product['uuid']: product for product in self.products}
+
+    def _make_product(self, index: int) -> Dict:
+        product_uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, f'bench-product-{index}'))
+        slug = f'محصول-نمونه-{index}'
+        return {
+            'index': index,
+            'uuid': product_uuid,
+            'slug': slug,
+            'path': f'/p/{product_uuid}/{quote(slug)}/',
+            'title': f'محصول نمونه شماره {index}',
+            'categories': CATEGORY_PATHS[index % len(CATEGORY_PATHS)],
+            'brand': BRANDS[index % len(BRANDS)],
+            'slow': self.slow_every > 0 and index % self.slow_every == self.slow_every - 1,
+            'missing_specs': self.missing_specs_every > 0 and index % self.missing_specs_every == self.missing_specs_every - 1,
+        }
+
+    def render_cards(self, start: int, end: int) -> str:
+        cards = []
+        for product in self.products[start:end]:
+            cards.append(
+                f'<div><a href="{product["path"]}"><img alt="" src="/static/{product["index"]}.jpg">'
+                f'<h2>{product["title"]}</h2></a></div>'
+            )
+        return '\n'.join(cards)
+
+    def render_listing(self, infinite: bool) -> str:
+        if not infinite:
+            return self.templates['listing'].replace('{{CARDS}}', self.render_cards(0, self.num_products))
+        first_page = min(self.page_size, self.num_products)
+        return (self.templates['listing_infinite']
+                .replace('{{CARDS}}', self.render_cards(0, first_page))
+                .replace('{{OFFSET}}', str(first_page))
+                .replace('{{TOTAL}}', str(self.num_products))
+                .replace('{{PAGE_SIZE}}', str(self.page_size)))
+
+    def render_product(self, product: Dict) -> str:
+        category_links = [
+            f'<a class="link-on-click" href="/c/{level}/"><div>{name}</div></a>'
+            for level, name in enumerate(product['categories'] + [product['brand']], start=1)
+        ]
+        key_specs = [
+            f'<div class="key-specs-container"><div><span>{name}</span></div><div>{product["index"] % 7 + 1} واحد</div></div>'
+            for name in KEY_SPEC_NAMES
+        ]
+        general_specs = [
+            f'<div><div>{name}</div><div>مقدار {name} برای محصول {product["index"]}</div></div>'
+            for name in GENERAL_SPEC_NAMES
+        ]
+        template = self.templates['product_missing_specs' if product['missing_specs'] else 'product']
+        return (template
+                .replace('{{TITLE}}', product['title'])
+                .replace('{{SLUG}}', product['slug'])
+                .replace('{{CATEGORIES}}', '\n      '.join(category_links))
+                .replace('{{KEY_SPECS}}', '\n      '.join(key_specs))
+                .replace('{{GENERAL_SPECS}}', '\n    '.join(general_specs)))
+
+
+class BenchmarkRequestHandler(BaseHTTPRequestHandler):
+    """
+    مسیرها: /shop/ و /shop/infinite/ (لیست)، /api/cards (صفحه بعدی)، /p/<uuid>/<slug>/ (محصول)
+    """
+
+    site: BenchmarkSite = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if self.site.response_delay:
+            time.sleep(self.site.response_delay)
+
+        if path in ('/shop/', '/shop'):
+            return self._send(200, self.site.render_listing(infinite=False))
+        if path.startswith('/shop/infinite'):
+            return self._send(200, self.site.render_listing(infinite=True))
+        if path == '/api/cards':
+            offset = int(parse_qs(parsed.query).get('offset', ['0'])[0])
+            return self._send(200, self.site.render_cards(offset, offset + self.site.page_size))
+        if path.startswith('/p/'):
+            parts = path.strip('/').split('/')
+            product = self.site.by_uuid.get(parts[1]) if len(parts) > 1 else None
+            if product is None:
+                return self._send(404, '<html><body><h1>یافت نشد</h1></body></html>')
+            if product['slow']:
+                time.sleep(self.site.slow_delay)
+            return self._send(200, self.site.render_product(product))
+        if path.startswith('/static/'):
+            # تصویر ساختگی برای سنجش اثر مسدودسازی منابع
+            return self._send(200, 'x' * 20000, content_type='image/jpeg')
+        return self._send(404, '<html><body>404</body></html>')
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchmarkServer:
+    """
+    اجرای سرور محلی در یک thread پس‌زمینه
+    """
+
+    def __init__(self, site: BenchmarkSite, host: str = '127.0.0.1', port: int = 0):
+        handler = type('BoundHandler', (BenchmarkRequestHandler,), {'site': site})
+        self.site = site
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def listing_url(self, infinite: bool = False) -> str:
+        return f'{self.base_url}/shop/infinite/' if infinite else f'{self.base_url}/shop/'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='سرور محلی جایگزین ترب')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--slow-every', type=int, default=10)
+    parser.add_argument('--slow-delay', type=float, default=3.0)
+    parser.add_argument('--missing-specs-every', type=int, default=7)
+    args = parser.parse_args()
+
+    site = BenchmarkSite(args.products, args.slow_every, args.slow_delay, args.missing_specs_every)
+    server = BenchmarkServer(site, port=args.port)
+    print(f"🌐 سرور بنچمارک: {server.listing_url()} | {server.listing_url(infinite=True)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+بنچمارک آفلاین ProductScraper در برابر سرور محلی جایگزین ترب
+
+هر پیکربندی در یک پردازه جداگانه اجرا می‌شود و این موارد گزارش می‌شود:
+محصول در دقیقه، p50/p95 هر مرحله (navigation، title_wait، categories، specs، checkpoint)
+و بیشینه RSS کل درخت پردازه (پایتون + chromedriver + Chrome)
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import List, Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_server import BenchmarkSite, BenchmarkServer  # noqa: E402
+from scraper import process_tree_rss  # noqa: E402
+
+RESULT_MARKER = 'BENCHMARK_RESULT '
+REPORTED_PHASES = ['listing', 'navigation', 'title_wait', 'extraction_script', 'categories', 'specs', 'http_fetch', 'checkpoint']
+
+DEFAULT_MATRIX = [
+    {'name': 'workers-1', 'overrides': {'performance': {'concurrent_tabs': 1}}},
+    {'name': 'workers-2', 'overrides': {'performance': {'concurrent_tabs': 2}}},
+    {'name': 'workers-4', 'overrides': {'performance': {'concurrent_tabs': 4}}},
+    {'name': 'elements-mode', 'overrides': {'performance': {'concurrent_tabs': 2, 'extraction_mode': 'elements'}}},
+    {'name': 'http-first', 'overrides': {'performance': {'concurrent_tabs': 2}, 'http_fetch': {'enabled': True}}},
+    {'name': 'titles-profile', 'overrides': {'performance': {'concurrent_tabs': 2}, 'extraction': {'profile': 'titles'}}},
+    {'name': 'workers-2-delayed', 'overrides': {'performance': {'concurrent_tabs': 2, 'worker_delay_range': [3, 5]}}},
+]
+
+
+def deep_merge(base: Dict, overrides: Dict) -> Dict:
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class RssSampler(threading.Thread):
+    """
+    نمونه‌برداری دوره‌ای از RSS درخت پردازه و نگهداری بیشینه
+    """
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_child(config_path: str):
+    """
+    اجرای ربات در پردازه فرزند و چاپ نتیجه با نشانگر RESULT_MARKER
+    """
+    from scraper import ProductScraper
+
+    scraper = ProductScraper(config_path)
+    start = time.perf_counter()
+    scraper.run_parallel_with_resume()
+    elapsed = time.perf_counter() - start
+    # شمارش از پایگاه داده یا حافظه تا هر دو backend وضعیت یکسان گزارش دهند
+    processed, failed = scraper.get_status_counts()
+
+    result = {
+        'elapsed': elapsed,
+        'processed': processed,
+        'failed': failed,
+        'phases': scraper.get_phase_summary(),
+    }
+    print(RESULT_MARKER + json.dumps(result, ensure_ascii=False))
+
+
+def run_scenario(scenario: Dict, base_config: Dict, server: BenchmarkServer, args) -> Dict:
+    """
+    اجرای یک پیکربندی در دایرکتوری موقت و جمع‌آوری نتایج
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"bench-{scenario['name']}-")
+    config = deep_merge(base_config, {
+        'main_page_url': server.listing_url(infinite=args.infinite),
+        'output': {'filename': os.path.join(work_dir, 'products.json'), 'format': 'json'},
+        'browser_settings': {'headless': True},
+        # بدون فاصله تصادفی کارگرها تا زمان‌ها فقط هزینه استخراج را نشان دهند (سناریو می‌تواند آن را تغییر دهد)
+        'performance': {'worker_delay_range': [0, 0]},
+    })
+    config = deep_merge(config, scenario.get('overrides', {}))
+    config_path = os.path.join(work_dir, 'config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    user_agents = os.path.join(REPO_DIR, 'random.txt')
+    if os.path.exists(user_agents):
+        os.symlink(user_agents, os.path.join(work_dir, 'random.txt'))
+
+    print(f"\n▶️ اجرای سناریو {scenario['name']} ({work_dir})")
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--child', config_path],
+        cwd=work_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8'
+    )
+    sampler = RssSampler(process.pid)
+    sampler.start()
+    output_lines = []
+    for line in process.stdout:
+        output_lines.append(line)
+        if args.verbose:
+            sys.stdout.write(line)
+    process.wait()
+    sampler.stop()
+
+    result = {
+        'name': scenario['name'],
+        'returncode': process.returncode,
+        'peak_rss': sampler.peak,
+        'worker_delay_range': config['performance']['worker_delay_range'],
+        'work_dir': work_dir
+    }
+    for line in reversed(output_lines):
+        if line.startswith(RESULT_MARKER):
+            result.update(json.loads(line[len(RESULT_MARKER):]))
+            break
+    else:
+        result['error'] = ''.join(output_lines[-20:])
+    return result
+
+
+def print_report(results: List[Dict]):
+    print("\n" + "=" * 60)
+    print("📊 نتایج بنچمارک")
+    print("=" * 60)
+    for result in results:
+        if 'elapsed' not in result:
+            print(f"\n❌ {result['name']}: اجرا ناموفق (کد {result['returncode']})")
+            print(result.get('error', ''))
+            continue
+        rate = result['processed'] / (result['elapsed'] / 60) if result['elapsed'] else 0
+        print(f"\n🔹 {result['name']}")
+        print(f"   ⏱️ زمان کل: {result['elapsed']:.1f}s | ✅ {result['processed']} | ❌ {result['failed']}")
+        print(f"   😴 فاصله کارگرها: {result['worker_delay_range'][0]}-{result['worker_delay_range'][1]}s")
+        print(f"   🚀 محصول در دقیقه: {rate:.1f}")
+        print(f"   🧠 بیشینه RSS: {result['peak_rss'] / (1024 * 1024):.0f} MB")
+        for phase in REPORTED_PHASES + sorted(set(result['phases']) - set(REPORTED_PHASES)):
+            stats = result['phases'].get(phase)
+            if stats:
+                print(f"   {phase:<18} n={stats['count']:<5} p50={stats['p50'] * 1000:8.1f}ms  p95={stats['p95'] * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='بنچمارک آفلاین ربات اسکرپینگ')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--config', default=os.path.join(REPO_DIR, 'config.json'), help='کانفیگ پایه (سلکتورها)')
+    parser.add_argument('--matrix', help='فایل JSON لیست سناریوها: [{"name": ..., "overrides": {...}}]')
+    parser.add_argument('--only', action='append', help='فقط سناریوهای با این نام')
+    parser.add_argument('--products', type=int, default=60)
+    parser.add_argument('--infinite', action='store_true', help='صفحه لیست با اسکرول بی‌نهایت')
+    parser.add_argument('--slow-every', type=int, default=10, help='هر N محصول یکی کند است (0 = هیچ)')
+    parser.add_argument('--slow-delay', type=float, default=3.0)
+    parser.add_argument('--missing-specs-every', type=int, default=7, help='هر N محصول یکی بدون مشخصات است (0 = هیچ)')
+    parser.add_argument('--response-delay', type=float, default=0.0, help='تاخیر پایه هر پاسخ (ثانیه)')
+    parser.add_argument('--report', help='ذخیره نتایج به صورت JSON')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        base_config = json.load(f)
+    matrix = DEFAULT_MATRIX
+    if args.matrix:
+        with open(args.matrix, 'r', encoding='utf-8') as f:
+            matrix = json.load(f)
+    if args.only:
+        matrix = [scenario for scenario in matrix if scenario['name'] in args.only]
+
+    site = BenchmarkSite(args.products, args.slow_every, args.slow_delay, args.missing_specs_every,
+                         response_delay=args.response_delay)
+    server = BenchmarkServer(site).start()
+    print(f"🌐 سرور بنچمارک: {server.base_url}")
+
+    try:
+        results = [run_scenario(scenario, base_config, server, args) for scenario in matrix]
+    finally:
+        server.stop()
+
+    print_report(results)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 گزارش در {args.report} ذخیره شد")
+
+
+if __name__ == '__main__':
+    main()
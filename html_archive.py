@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+آرشیو فشرده HTML صفحات محصول با آدرس‌دهی بر اساس محتوا (sha256)
+و استخراج دوباره آفلاین آن با سلکتورهای جدید روی چند پردازه، بدون مرورگر
+
+    python html_archive.py config.json --archive html_archive --output repaired.json
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import threading
+from multiprocessing import Pool
+from typing import List, Dict, Optional, Tuple
+
+from static_extractor import extract_product_from_html, resolve_extraction_fields, EXTRACTION_FIELDS
+
+
+class HtmlArchive:
+    """
+    objects/<دو حرف اول>/<sha256>.html.gz برای هر محتوای یکتا
+    و index.jsonl (append-only) برای نگاشت فروشگاه و کلید محصول به محتوا
+    """
+
+    def __init__(self, directory: str, compression_level: int = 6):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.index_file = os.path.join(directory, 'index.jsonl')
+        self.compression_level = compression_level
+        self.lock = threading.Lock()
+        self.index_handle = None
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f'{digest}.html.gz')
+
+    def put(self, shop: str, key: str, product_url: str, html: str) -> str:
+        """
+        ذخیره HTML (فقط اگر محتوای یکسان قبلاً ذخیره نشده) و ثبت آن در index
+        """
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(gzip.compress(data, self.compression_level, mtime=0))
+            os.replace(temp_path, path)
+
+        record = {'shop': shop, 'key': key, 'url': product_url, 'sha256': digest, 'size': len(data), 'timestamp': time.time()}
+        with self.lock:
+            if self.index_handle is None:
+                self.index_handle = open(self.index_file, 'a', encoding='utf-8')
+            # هر رکورد با یک write نوشته می‌شود تا چند پردازه بتوانند همزمان اضافه کنند
+            self.index_handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.index_handle.flush()
+        return digest
+
+    def get(self, digest: str) -> str:
+        with open(self.object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+    def latest_entries(self, shop: Optional[str] = None) -> List[Dict]:
+        """
+        آخرین نسخه بایگانی‌شده هر محصول (به ترتیب اولین ثبت)
+        """
+        entries: Dict[Tuple[str, str], Dict] = {}
+        if not os.path.exists(self.index_file):
+            return []
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # خط ناقص ناشی از قطع ناگهانی
+                    continue
+                if shop is not None and record.get('shop') != shop:
+                    continue
+                entry_key = (record.get('shop'), record.get('key'))
+                if entry_key in entries:
+                    entries[entry_key].update(record)
+                else:
+                    entries[entry_key] = record
+        return list(entries.values())
+
+    def close(self):
+        with self.lock:
+            if self.index_handle:
+                self.index_handle.close()
+                self.index_handle = None
+
+
+# وضعیت هر پردازه کارگر استخراج دوباره (از طریق initializer مقداردهی می‌شود)
+_worker_archive: Optional[HtmlArchive] = None
+_worker_selectors: Dict = {}
+_worker_fields: Tuple[str, ...] = EXTRACTION_FIELDS
+
+
+def _init_reextract_worker(directory: str, selectors: Dict, fields: Tuple[str, ...]):
+    global _worker_archive, _worker_selectors, _worker_fields
+    _worker_archive = HtmlArchive(directory)
+    _worker_selectors = selectors
+    _worker_fields = fields
+
+
+def _reextract_entry(entry: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    استخراج یک رکورد آرشیو؛ خروجی (product_data، خطا)
+    """
+    try:
+        html = _worker_archive.get(entry['sha256'])
+        return extract_product_from_html(html, entry['url'], _worker_selectors, _worker_fields), None
+    except Exception as e:
+        return None, f"{entry['url']}: {type(e).__name__}: {e}"
+
+
+def reextract(directory: str, entries: List[Dict], selectors: Dict, processes: Optional[int] = None,
+              chunksize: int = 16, fields: Tuple[str, ...] = EXTRACTION_FIELDS):
+    """
+    استخراج دوباره رکوردهای آرشیو روی Pool پردازه‌ها؛ نتایج به ترتیب ورودی برگردانده می‌شوند
+    """
+    with Pool(processes, initializer=_init_reextract_worker, initargs=(directory, selectors, fields)) as pool:
+        for result in pool.imap(_reextract_entry, entries, chunksize):
+            yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='استخراج دوباره محصولات از آرشیو HTML با سلکتورهای جدید')
+    parser.add_argument('config', help='کانفیگ فروشگاه با سلکتورهای اصلاح‌شده')
+    parser.add_argument('--archive', help='دایرکتوری آرشیو (پیش‌فرض archive.directory کانفیگ)')
+    parser.add_argument('--shop', help='نام فروشگاه در آرشیو (پیش‌فرض نام فایل کانفیگ)')
+    parser.add_argument('--output', help='فایل خروجی JSON (پیش‌فرض reextracted_<shop>.json)')
+    parser.add_argument('--processes', type=int, help='تعداد پردازه‌ها (پیش‌فرض تعداد هسته‌ها)')
+    parser.add_argument('--profile', help='پروفایل استخراج (پیش‌فرض extraction.profile کانفیگ)')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    shop = args.shop or os.path.splitext(os.path.basename(args.config))[0]
+    directory = args.archive or config.get('archive', {}).get('directory', 'html_archive')
+    output_file = args.output or f'reextracted_{shop}.json'
+    try:
+        fields = resolve_extraction_fields(config, args.profile)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    archive = HtmlArchive(directory)
+    entries = archive.latest_entries(shop)
+    if not entries:
+        print(f"❌ رکوردی برای فروشگاه {shop} در آرشیو {directory} یافت نشد")
+        sys.exit(1)
+    print(f"🔁 استخراج دوباره {len(entries)} صفحه از {directory} ({shop})")
+
+    start = time.perf_counter()
+    stats = {'total': 0, 'with_title': 0, 'with_brand': 0, 'with_specs': 0, 'errors': 0}
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for product_data, error in reextract(directory, entries, config['selectors'], args.processes, fields=fields):
+            if error:
+                stats['errors'] += 1
+                print(f"❌ {error}")
+                continue
+            f.write(',\n' if stats['total'] else '\n')
+            f.write(json.dumps(product_data, ensure_ascii=False, indent=2))
+            stats['total'] += 1
+            stats['with_title'] += bool(product_data.get('title'))
+            stats['with_brand'] += bool(product_data.get('brand'))
+            specs = product_data.get('specifications', {})
+            stats['with_specs'] += bool(specs.get('key_specs') or specs.get('general_specs'))
+        f.write('\n]\n' if stats['total'] else ']\n')
+    elapsed = time.perf_counter() - start
+
+    print(f"\n💾 خروجی در {output_file} ذخیره شد ({elapsed:.1f}s)")
+    print(f"🔢 تعداد کل محصولات: {stats['total']}")
+    print(f"📝 محصولات با عنوان: {stats['with_title']}")
+    print(f"🏷️ محصولات با برند: {stats['with_brand']}")
+    print(f"🔧 محصولات با مشخصات: {stats['with_specs']}")
+    print(f"❌ خطاها: {stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ثبت شمارنده‌ها و هیستوگرام‌های اجرای ربات و ارائه آن‌ها با قالب متنی Prometheus
+"""
+
+import json
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Optional, Tuple
+
+
+# مرزهای پیش‌فرض هیستوگرام زمان (ثانیه)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    هیستوگرام تجمعی با مرزهای ثابت (مشابه Prometheus)
+    """
+
+    __slots__ = ('buckets', 'counts', 'total', 'count', 'minimum', 'maximum')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.minimum = float('inf')
+        self.maximum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        تخمین صدک با درون‌یابی خطی داخل bucket (محدود به کمینه و بیشینه مشاهده‌شده)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = max(self.minimum, self.buckets[index - 1] if index > 0 else 0.0)
+                upper = min(self.maximum, self.buckets[index] if index < len(self.buckets) else self.maximum)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.maximum
+
+
+class MetricsRegistry:
+    """
+    ثبت‌کننده thread-safe شمارنده‌ها و هیستوگرام‌ها با برچسب
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help: Dict[str, str] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.histogram_buckets: Dict[str, Tuple[float, ...]] = {}
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        with self.lock:
+            self.help[name] = help_text
+            if buckets:
+                self.histogram_buckets[name] = tuple(sorted(buckets))
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.histogram_buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def render_prometheus(self) -> str:
+        """
+        خروجی متنی قالب Prometheus (text exposition 0.0.4)
+        """
+        lines: List[str] = []
+        with self.lock:
+            for name in sorted(self.counters):
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+                lines.append(f'# TYPE {name} counter')
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            for name in sorted(self.histograms):
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f'{name}_bucket{_format_labels(labels, ("le", _format_value(bound)))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram.total)}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict:
+        """
+        خلاصه قابل ذخیره: مقدار شمارنده‌ها و تعداد/میانگین/p50/p95 هیستوگرام‌ها
+        """
+        with self.lock:
+            counters = {
+                name: {_format_labels(labels) or 'total': value for labels, value in series.items()}
+                for name, series in self.counters.items()
+            }
+            histograms = {
+                name: {
+                    _format_labels(labels) or 'total': {
+                        'count': histogram.count,
+                        'mean': histogram.total / histogram.count if histogram.count else 0.0,
+                        'p50': histogram.quantile(0.50),
+                        'p95': histogram.quantile(0.95)
+                    }
+                    for labels, histogram in series.items()
+                }
+                for name, series in self.histograms.items()
+            }
+        return {'counters': counters, 'histograms': histograms}
+
+    def format_summary(self) -> str:
+        """
+        خلاصه متنی برای چاپ در پایان اجرا
+        """
+        summary = self.summary()
+        lines = ["📊 خلاصه متریک‌ها:"]
+        for name, series in sorted(summary['counters'].items()):
+            for labels, value in sorted(series.items()):
+                lines.append(f"   {name}{'' if labels == 'total' else labels} = {value:g}")
+        for name, series in sorted(summary['histograms'].items()):
+            for labels, stats in sorted(series.items()):
+                lines.append(
+                    f"   {name}{'' if labels == 'total' else labels} n={stats['count']} "
+                    f"mean={stats['mean'] * 1000:.1f}ms p50≈{stats['p50'] * 1000:.1f}ms p95≈{stats['p95'] * 1000:.1f}ms"
+                )
+        return '\n'.join(lines)
+
+    def save_summary(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+class MetricsServer:
+    """
+    سرور HTTP محلی برای /metrics در یک thread پس‌زمینه
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464):
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                payload = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ثبت‌کننده مشترک همه فروشگاه‌های این پردازه
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('scraper_phase_seconds', 'Duration of scraping phases in seconds')
+REGISTRY.describe('scraper_products_total', 'Products finished, by shop and status')
+REGISTRY.describe('scraper_retries_total', 'Transient failures re-queued for retry')
+REGISTRY.describe('scraper_browser_restarts_total', 'Worker browsers recycled or restarted')
+REGISTRY.describe('scraper_watchdog_kills_total', 'Browser sessions killed for exceeding the page deadline')
+REGISTRY.describe('scraper_controller_adjustments_total', 'Concurrency and pacing changes made by the adaptive controller')
+REGISTRY.describe('scraper_specs_fallback_total', 'Runs of the bounded fallback spec extraction, by outcome')
+REGISTRY.describe('scraper_blocked_pages_total', 'Product pages that returned 403/429 or a captcha/blocked page')
@@ -8,8 +8,18 @@ import random
 import platform
 import subprocess
 import re
+import hashlib
 import threading
 import queue
+import argparse
+import sqlite3
+import uuid
+import heapq
+import signal
+import socket
+import urllib.request
+from collections import defaultdict, deque
+from contextlib import contextmanager
 from typing import List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional
@@ -20,11 +30,1642 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from urllib.parse import urljoin
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, WebDriverException, InvalidSelectorException, InvalidArgumentException
+)
+from urllib.parse import urljoin, urlparse, unquote
+import urllib3
 import sys
 import os
 
+from static_extractor import extract_product_from_html, detect_brand, resolve_extraction_fields, EXTRACTION_FIELDS
+from metrics import REGISTRY, MetricsServer
+from html_archive import HtmlArchive
+
+
+# درایور اختصاصی هر کارگر در thread خودش نگه داشته می‌شود
+_worker_state = threading.local()
+
+# User-Agentهای خوانده‌شده به ازای (مسیر، زمان تغییر) تا فایل بزرگ برای هر مرورگر دوباره خوانده نشود
+_user_agent_cache: Dict[Tuple[str, float], List[str]] = {}
+_discovery_lock = threading.Lock()
+
+# خطاهای گذرا (شبکه، timeout، نشست مرورگر) که ارزش تلاش مجدد دارند
+TRANSIENT_ERRORS = (WebDriverException, urllib3.exceptions.HTTPError, ConnectionError, TimeoutError)
+# خطاهای WebDriver که با تلاش مجدد برطرف نمی‌شوند (سلکتور یا آرگومان نامعتبر)
+PERMANENT_ERRORS = (InvalidSelectorException, InvalidArgumentException)
+# خطاهای timeout بارگذاری صفحه یا درخواست HTTP (سیگنال timeout کنترل‌کننده تطبیقی)
+TIMEOUT_ERRORS = (TimeoutException, TimeoutError, urllib3.exceptions.TimeoutError)
+
+# پاسخ‌های HTTP که نشانه مسدود شدن یا محدودیت نرخ هستند
+BLOCKED_HTTP_STATUSES = (403, 429)
+# نشانه‌های صفحه captcha یا مسدودسازی در عنوان و ابتدای متن صفحه
+DEFAULT_BLOCKED_PAGE_MARKERS = ['captcha', 'access denied', 'too many requests', 'unusual traffic', 'are you a robot']
+BLOCKED_PAGE_SELECTOR = 'iframe[src*="captcha"], .g-recaptcha, .h-captcha, .cf-turnstile, #challenge-form'
+
+# شناسه محصول در URLهای ترب: /p/<uuid>/<slug>/
+PRODUCT_UUID_PATTERN = re.compile(r'/p/([0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12})(?:/|$)')
+
+
+def product_key(product_url: str) -> bytes:
+    """
+    کلید ۱۶ بایتی یکتای محصول: UUID ترب یا در نبود آن هش URL بدون fragment
+    """
+    path = unquote(urlparse(product_url).path)
+    match = PRODUCT_UUID_PATTERN.search(path)
+    if match:
+        return uuid.UUID(match.group(1)).bytes
+    canonical = unquote(urlparse(product_url)._replace(fragment='').geturl())
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+
+def process_tree_pids(root_pid: int) -> List[int]:
+    """
+    شناسه پردازه و همه نوادگان آن از /proc (در سیستم‌های بدون /proc فقط خود پردازه)
+    """
+    children: Dict[int, List[int]] = defaultdict(list)
+    if os.path.isdir('/proc'):
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children[ppid].append(int(entry))
+            except (OSError, ValueError, IndexError):
+                continue
+    
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def process_tree_rss(root_pid: int) -> int:
+    """
+    مجموع RSS (بایت) پردازه و نوادگان آن (chromedriver + Chrome)؛ بدون /proc صفر
+    """
+    total = 0
+    for pid in process_tree_pids(root_pid):
+        try:
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def find_free_port() -> int:
+    """
+    پورت آزاد محلی انتخاب‌شده توسط سیستم‌عامل
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def parse_product_key(value: str) -> bytes:
+    """
+    تبدیل کلید ذخیره‌شده (hex) یا URL فایل‌های قدیمی به کلید محصول
+    """
+    if len(value) == 32:
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            pass
+    return product_key(value)
+
+# الگوهای URL هر نوع منبع برای Network.setBlockedURLs
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.svg*', '*.ico*', '*.avif*'],
+    'font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.ogg*', '*.m3u8*'],
+    'stylesheet': ['*.css*']
+}
+
+# اسکریپت‌های آنالیتیکس و تبلیغات که برای استخراج لازم نیستند
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*doubleclick.net*',
+    '*googlesyndication.com*',
+    '*facebook.net*',
+    '*hotjar.com*',
+    '*clarity.ms*',
+    '*yektanet.com*',
+    '*mediaad.org*',
+    '*sentry.io*'
+]
+
+# اندازه تخمینی هر درخواست مسدودشده (بایت) برای گزارش صرفه‌جویی
+DEFAULT_ESTIMATED_BYTES = {
+    'Image': 40000,
+    'Font': 35000,
+    'Media': 250000,
+    'Stylesheet': 20000,
+    'Script': 30000,
+    'Other': 5000
+}
+
+# جمع‌آوری لینک‌های جدید صفحه لیست در خود صفحه؛ فقط hrefهای دیده‌نشده برگردانده می‌شوند
+LINK_HARVEST_SCRIPT = """
+const selector = arguments[0];
+const state = window.__linkHarvest || (window.__linkHarvest = {seen: new Set()});
+let cards = [];
+try { cards = document.querySelectorAll(selector); } catch (e) {}
+const fresh = [];
+for (const card of cards) {
+    const href = card.href || card.getAttribute('href');
+    if (href && !state.seen.has(href)) {
+        state.seen.add(href);
+        fresh.push(href);
+    }
+}
+return {links: fresh, cards: cards.length, height: document.body.scrollHeight};
+"""
+
+# اسکریپت استخراج یک‌مرحله‌ای: همه فیلدهای محصول با یک فراخوانی execute_script
+PRODUCT_EXTRACTION_SCRIPT = """
+const sel = arguments[0];
+const text = (el) => el ? (el.innerText || el.textContent || '').trim() : '';
+const query = (root, selector) => {
+    try { return selector ? root.querySelector(selector) : null; } catch (e) { return null; }
+};
+const queryAll = (root, selector) => {
+    try { return selector ? Array.from(root.querySelectorAll(selector)) : []; } catch (e) { return []; }
+};
+
+const wants = (field) => !sel.fields || sel.fields.includes(field);
+
+const result = {
+    title: wants('title') ? text(query(document, sel.product_title)) || null : null,
+    categories: [],
+    specifications: {key_specs: [], general_specs: []},
+    spec_items_found: 0
+};
+
+const categorySelectors = (wants('categories') || wants('brand')) ? sel.categories : [];
+for (let i = 0; i < categorySelectors.length; i++) {
+    const el = query(document, categorySelectors[i]);
+    if (!el) break;
+    const name = text(el);
+    if (name) result.categories.push({level: i + 1, name: name});
+}
+
+const items = wants('specifications') ? queryAll(document, sel.spec_items) : [];
+result.spec_items_found = items.length;
+for (const item of items) {
+    const title = text(query(item, sel.spec_title));
+    const body = text(query(item, sel.spec_value));
+    if (!title || !body) continue;
+    const cls = item.getAttribute('class') || '';
+    const isKey = (sel.key_specs_section && cls.includes(sel.key_specs_section)) || cls.toLowerCase().includes('key');
+    result.specifications[isKey ? 'key_specs' : 'general_specs'].push({title: title, body: body});
+}
+return result;
+"""
+
+# روش جایگزین مشخصات روی یک snapshot از DOM: یک فراخوانی execute_script با سقف تعداد و زمان
+SPECS_FALLBACK_SCRIPT = """
+const opts = arguments[0];
+const deadline = performance.now() + opts.budget_ms;
+const result = {items: [], matches: 0, scanned: 0, truncated: false};
+const seen = new Set();
+const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+const parents = [];
+while (walker.nextNode()) {
+    if (performance.now() > deadline) { result.truncated = true; break; }
+    const owner = walker.currentNode.parentElement;
+    if (!owner || !walker.currentNode.nodeValue.includes(opts.marker)) continue;
+    const parent = owner.parentElement;
+    if (!parent || parents.includes(parent)) continue;
+    if (parents.length >= opts.max_matches) { result.truncated = true; break; }
+    parents.push(parent);
+}
+result.matches = parents.length;
+outer:
+for (const parent of parents) {
+    const descendants = parent.getElementsByTagName('*');
+    for (let i = 0; i < descendants.length; i++) {
+        if (result.scanned >= opts.max_items || performance.now() > deadline) { result.truncated = true; break outer; }
+        result.scanned++;
+        const text = (descendants[i].innerText || '').trim();
+        if (!text.includes('\\n')) continue;
+        const lines = text.split('\\n');
+        const title = lines[0].trim();
+        const body = lines[1].trim();
+        if (!title || !body || title.length >= 100 || body.length >= 200) continue;
+        const pair = title + '\\u0000' + body;
+        if (seen.has(pair)) continue;
+        seen.add(pair);
+        result.items.push({title: title, body: body});
+    }
+}
+return result;
+"""
+
+# تشخیص صفحه captcha یا مسدودسازی با یک فراخوانی execute_script؛ خروجی نشانه یافت‌شده یا null
+BLOCKED_PAGE_SCRIPT = """
+const text = (document.title + ' ' + (document.body ? document.body.innerText.slice(0, 2000) : '')).toLowerCase();
+const marker = arguments[0].find(m => text.includes(m));
+if (marker) return marker;
+return document.querySelector(arguments[1]) ? 'captcha' : null;
+"""
+
+
+class FairScheduler:
+    """
+    زمان‌بندی منصفانه URLها بین فروشگاه‌ها (round-robin) با سقف همزمانی هر فروشگاه
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queues: Dict[str, deque] = {}
+        self.limits: Dict[str, int] = {}
+        self.active: Dict[str, int] = defaultdict(int)
+        self.rotation = deque()
+        # صف کم‌اولویت تلاش مجدد: (زمان آماده شدن، ترتیب، فروشگاه، URL)
+        self.retry_lane: List[Tuple[float, int, str, str]] = []
+        self.retry_sequence = 0
+        self.closed = False
+
+    def add_shop(self, shop: str, limit: int):
+        with self.condition:
+            if shop not in self.queues:
+                self.queues[shop] = deque()
+                self.rotation.append(shop)
+            self.limits[shop] = max(1, limit)
+
+    def set_limit(self, shop: str, limit: int):
+        with self.condition:
+            self.limits[shop] = max(1, limit)
+            self.condition.notify_all()
+
+    def put(self, shop: str, product_url: str):
+        with self.condition:
+            self.queues[shop].append(product_url)
+            self.condition.notify()
+
+    def put_retry(self, shop: str, product_url: str, delay: float):
+        """
+        افزودن URL ناموفق به صف تلاش مجدد؛ پس از delay ثانیه و فقط وقتی کار تازه‌ای نباشد اجرا می‌شود
+        """
+        with self.condition:
+            heapq.heappush(self.retry_lane, (time.monotonic() + delay, self.retry_sequence, shop, product_url))
+            self.retry_sequence += 1
+            self.condition.notify()
+
+    def _next_eligible(self) -> Optional[Tuple[str, str]]:
+        for _ in range(len(self.rotation)):
+            shop = self.rotation[0]
+            self.rotation.rotate(-1)
+            if self.queues[shop] and self.active[shop] < self.limits[shop]:
+                self.active[shop] += 1
+                return shop, self.queues[shop].popleft()
+        
+        now = time.monotonic()
+        for entry in sorted(self.retry_lane):
+            ready_at, _, shop, product_url = entry
+            if ready_at > now:
+                break
+            if self.active[shop] < self.limits[shop]:
+                self.retry_lane.remove(entry)
+                heapq.heapify(self.retry_lane)
+                self.active[shop] += 1
+                return shop, product_url
+        return None
+
+    def _next_retry_wait(self) -> Optional[float]:
+        if not self.retry_lane:
+            return None
+        return max(0.05, self.retry_lane[0][0] - time.monotonic())
+
+    def get(self) -> Optional[Tuple[str, str]]:
+        """
+        کار بعدی به صورت (فروشگاه، URL)؛ پس از بسته شدن زمان‌بند None
+        """
+        with self.condition:
+            while True:
+                if self.closed:
+                    return None
+                task = self._next_eligible()
+                if task:
+                    return task
+                self.condition.wait(self._next_retry_wait())
+
+    def task_done(self, shop: str):
+        with self.condition:
+            self.active[shop] -= 1
+            self.condition.notify_all()
+
+    def queued(self, shop: str) -> int:
+        with self.condition:
+            return len(self.queues.get(shop, ()))
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class BrowserDaemon:
+    """
+    نگهداری نمونه‌های گرم Chrome بین اجراها (remote debugging)؛
+    هر نمونه با یک فایل قفل به یک مرورگر در یک اجرا اختصاص می‌یابد
+    """
+
+    def __init__(self, factory: 'ProductScraper', directory: str, startup_timeout: float = 10.0):
+        self.factory = factory
+        self.directory = directory
+        self.startup_timeout = startup_timeout
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def instance_file(self, slot: int) -> str:
+        return os.path.join(self.directory, f'instance-{slot}.json')
+
+    def lock_file(self, slot: int) -> str:
+        return os.path.join(self.directory, f'instance-{slot}.lock')
+
+    def read_instance(self, slot: int) -> Optional[Dict]:
+        try:
+            with open(self.instance_file(slot), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def try_lock(self, slot: int) -> bool:
+        """
+        گرفتن قفل نمونه با ساخت انحصاری فایل؛ قفل پردازه مرده کنار گذاشته می‌شود
+        """
+        path = self.lock_file(slot)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode('ascii'))
+                os.close(fd)
+                return True
+            except FileExistsError:
+                try:
+                    with open(path, 'r') as f:
+                        owner = int(f.read().strip() or 0)
+                except (OSError, ValueError):
+                    owner = 0
+                if owner and pid_alive(owner):
+                    return False
+                try:
+                    os.remove(path)
+                except OSError:
+                    return False
+        return False
+
+    def is_alive(self, instance: Dict) -> bool:
+        if not pid_alive(instance['pid']):
+            return False
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{instance['port']}/json/version", timeout=1) as response:
+                return response.status == 200
+        except (OSError, ValueError):
+            return False
+
+    def launch(self, slot: int) -> Dict:
+        """
+        اجرای Chrome جدا از این پردازه با پروفایل ماندگار و پورت آزاد
+        """
+        binary = self.factory.get_chrome_binary()
+        if not binary:
+            raise RuntimeError("Google Chrome یا Chromium یافت نشد!")
+        port = find_free_port()
+        profile_dir = os.path.abspath(os.path.join(self.directory, f'profile-{slot}'))
+        arguments = [binary] + self.factory.get_chrome_arguments() + [
+            f'--remote-debugging-port={port}',
+            f'--user-data-dir={profile_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            'about:blank'
+        ]
+        process = subprocess.Popen(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   stdin=subprocess.DEVNULL, start_new_session=True)
+        instance = {'pid': process.pid, 'port': port, 'profile_dir': profile_dir, 'started_at': time.time()}
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.is_alive(instance):
+                with open(self.instance_file(slot), 'w', encoding='utf-8') as f:
+                    json.dump(instance, f)
+                self.factory.logger.info(f"🔥 نمونه گرم Chrome شماره {slot} روی پورت {port} اجرا شد")
+                return instance
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        self.kill_instance(instance)
+        raise RuntimeError(f"نمونه Chrome شماره {slot} آماده نشد")
+
+    def acquire(self) -> Tuple[int, Dict]:
+        """
+        اختصاص اولین نمونه آزاد (و اجرای آن در صورت نبودن یا از کار افتادن)
+        """
+        with self.lock:
+            slot = 0
+            while not self.try_lock(slot):
+                slot += 1
+        try:
+            instance = self.read_instance(slot)
+            if instance and not self.is_alive(instance):
+                self.kill_instance(instance)
+                instance = None
+            if instance is None:
+                instance = self.launch(slot)
+            return slot, instance
+        except Exception:
+            self.release(slot)
+            raise
+
+    def kill_instance(self, instance: Dict):
+        for pid in reversed(process_tree_pids(instance['pid'])):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                continue
+        try:
+            # نمونه‌ای که همین پردازه اجرا کرده zombie نماند
+            os.waitpid(instance['pid'], os.WNOHANG)
+        except (ChildProcessError, OSError):
+            pass
+
+    def release(self, slot: int, discard: bool = False):
+        """
+        آزاد کردن قفل نمونه؛ با discard خود Chrome هم بسته می‌شود (بازسازی مرورگر)
+        """
+        if discard:
+            instance = self.read_instance(slot)
+            if instance:
+                self.kill_instance(instance)
+            try:
+                os.remove(self.instance_file(slot))
+            except OSError:
+                pass
+        try:
+            os.remove(self.lock_file(slot))
+        except OSError:
+            pass
+
+    def stop_all(self) -> int:
+        """
+        بستن همه نمونه‌های گرم (پروفایل‌ها برای اجرای بعدی حفظ می‌شوند)
+        """
+        stopped = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('instance-') and name.endswith('.json'):
+                slot = int(name[len('instance-'):-len('.json')])
+                self.release(slot, discard=True)
+                stopped += 1
+        return stopped
+
+
+class BrowserSession:
+    """
+    چرخه عمر نشست مرورگر یک کارگر: ساخت با تلاش مجدد، شمارش صفحات، بازیابی و kill اجباری
+    """
+
+    def __init__(self, factory: 'ProductScraper', worker_id: int):
+        self.factory = factory
+        self.worker_id = worker_id
+        self.settings = factory.get_lifecycle_config()
+        self.driver = None
+        self.pages = 0
+        self.deadline = None
+        self.killed = False
+        self.next_rss_check = 0.0
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        ساخت مرورگر جدید؛ خطای راه‌اندازی با تاخیر افزایشی تکرار می‌شود
+        """
+        attempts = self.settings['restart_attempts']
+        for attempt in range(1, attempts + 1):
+            try:
+                driver = self.factory.create_driver(port=0)
+                with self.lock:
+                    self.driver = driver
+                    self.pages = 0
+                    self.deadline = None
+                    self.killed = False
+                    self.next_rss_check = time.monotonic() + self.settings['rss_check_interval']
+                return driver
+            except Exception as e:
+                self.factory.logger.error(f"❌ Worker {self.worker_id}: خطا در راه‌اندازی مرورگر ({attempt}/{attempts}): {e}")
+                if attempt < attempts:
+                    time.sleep(min(30, 2 ** attempt))
+        raise RuntimeError(f"راه‌اندازی مرورگر کارگر {self.worker_id} ممکن نشد")
+
+    def begin_page(self):
+        with self.lock:
+            self.deadline = time.monotonic() + self.settings['page_deadline']
+
+    def end_page(self):
+        with self.lock:
+            self.deadline = None
+            self.pages += 1
+
+    def is_overdue(self) -> bool:
+        with self.lock:
+            return self.deadline is not None and not self.killed and time.monotonic() > self.deadline
+
+    def get_rss(self) -> int:
+        return sum(process_tree_rss(pid) for pid in self.factory.get_browser_pids(self.driver))
+
+    def recycle_reason(self) -> Optional[str]:
+        """
+        دلیل نیاز به مرورگر تازه (kill توسط watchdog، تعداد صفحات یا حافظه) یا None
+        """
+        if self.killed:
+            return "توقف اجباری توسط watchdog"
+        if self.settings['recycle_after_pages'] and self.pages >= self.settings['recycle_after_pages']:
+            return f"{self.pages} صفحه"
+        if self.settings['recycle_rss_mb'] and time.monotonic() >= self.next_rss_check:
+            # پیمایش /proc پرهزینه است؛ حافظه حداکثر هر rss_check_interval ثانیه یک بار خوانده می‌شود
+            self.next_rss_check = time.monotonic() + self.settings['rss_check_interval']
+            rss_mb = self.get_rss() / (1024 * 1024)
+            if rss_mb > self.settings['recycle_rss_mb']:
+                return f"حافظه {rss_mb:.0f}MB"
+        return None
+
+    def kill(self):
+        """
+        kill درخت پردازه chromedriver/Chrome؛ فراخوانی مسدود driver.get در کارگر با خطا برمی‌گردد
+        """
+        with self.lock:
+            self.killed = True
+            driver = self.driver
+        for root_pid in self.factory.get_browser_pids(driver):
+            for pid in reversed(process_tree_pids(root_pid)):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    continue
+
+    def stop(self, discard: bool = False):
+        with self.lock:
+            driver, self.driver = self.driver, None
+        if driver is not None:
+            self.factory.quit_driver(driver, discard=discard)
+
+
+class SessionWatchdog(threading.Thread):
+    """
+    بررسی دوره‌ای مهلت هر صفحه و kill نشست‌های گیرکرده
+    """
+
+    def __init__(self, pool: 'WorkerPool', interval: float = 5.0):
+        super().__init__(name="session-watchdog", daemon=True)
+        self.pool = pool
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for worker in list(self.pool.workers):
+                session = worker.session
+                if session is not None and session.is_overdue():
+                    self.pool.browser_factory.logger.warning(
+                        f"⏰ Worker {worker.worker_id}: مهلت {session.settings['page_deadline']}s صفحه تمام شد - بستن اجباری مرورگر"
+                    )
+                    session.kill()
+                    REGISTRY.inc('scraper_watchdog_kills_total')
+
+    def stop(self):
+        self.stopped.set()
+
+
+class BrowserWorker(threading.Thread):
+    """
+    کارگر مستقل با نشست اختصاصی Chrome/chromedriver
+    """
+
+    def __init__(self, pool: 'WorkerPool', worker_id: int):
+        super().__init__(name=f"worker-{worker_id}", daemon=True)
+        self.pool = pool
+        self.worker_id = worker_id
+        self.session: Optional[BrowserSession] = None
+
+    def run(self):
+        """
+        راه‌اندازی مرورگر اختصاصی و پردازش URLها تا رسیدن سیگنال پایان
+        """
+        logger = self.pool.browser_factory.logger
+        self.session = BrowserSession(self.pool.browser_factory, self.worker_id)
+        try:
+            self.session.start()
+        except RuntimeError as e:
+            logger.error(f"❌ {e}")
+            return
+
+        _worker_state.driver = self.session.driver
+        logger.info(f"✅ Worker {self.worker_id}: مرورگر اختصاصی آماده شد")
+        next_allowed = 0.0
+        try:
+            while True:
+                task = self.pool.scheduler.get()
+                if task is None:
+                    break
+                shop, product_url = task
+                scraper = self.pool.shops[shop]
+                try:
+                    # فاصله‌گذاری مستقل هر کارگر به جای توقف سراسری بین batchها
+                    wait_time = next_allowed - time.monotonic()
+                    if wait_time > 0:
+                        time.sleep(wait_time)
+                    self.session.begin_page()
+                    result = scraper.process_product_in_worker(product_url, self.worker_id)
+                    self.session.end_page()
+                    if self.session.killed:
+                        # نتیجه نشست kill‌شده معتبر نیست؛ URL به صف تلاش مجدد برمی‌گردد
+                        result.update(success=False, product_data=None, error='page deadline exceeded', error_class='transient',
+                                      exception=TimeoutException)
+                    result['shop'] = shop
+                    self.pool.results_queue.put(result)
+                    next_allowed = time.monotonic() + scraper.get_worker_delay()
+                finally:
+                    self.pool.scheduler.task_done(shop)
+                self.recycle_if_needed()
+        except RuntimeError as e:
+            logger.error(f"❌ {e}")
+        finally:
+            _worker_state.driver = None
+            self.session.stop()
+            logger.info(f"🔒 Worker {self.worker_id}: مرورگر بسته شد")
+
+    def recycle_if_needed(self):
+        """
+        جایگزینی مرورگر پس از N صفحه، عبور از سقف حافظه یا kill توسط watchdog
+        """
+        reason = self.session.recycle_reason()
+        if reason is None:
+            return
+        self.pool.browser_factory.logger.info(f"♻️ Worker {self.worker_id}: بازسازی مرورگر ({reason})")
+        _worker_state.driver = None
+        self.session.stop(discard=True)
+        self.session.start()
+        _worker_state.driver = self.session.driver
+        self.pool.record_restart()
+
+
+class WorkerPool:
+    """
+    مجموعه کارگرهای مستقل مشترک بین فروشگاه‌ها با زمان‌بند منصفانه و جمع‌کننده نتایج
+    """
+
+    def __init__(self, browser_factory: 'ProductScraper', num_workers: int):
+        self.browser_factory = browser_factory
+        self.num_workers = max(1, num_workers)
+        self.scheduler = FairScheduler()
+        self.results_queue = queue.Queue()
+        self.shops: Dict[str, 'ProductScraper'] = {}
+        self.workers: List[BrowserWorker] = []
+        self.watchdog: Optional[SessionWatchdog] = None
+        self.browser_restarts = 0
+        self.restart_lock = threading.Lock()
+
+    def add_shop(self, scraper: 'ProductScraper', limit: Optional[int] = None):
+        """
+        ثبت فروشگاه با سقف همزمانی (پیش‌فرض performance.concurrent_tabs همان فروشگاه)
+        """
+        self.shops[scraper.shop_name] = scraper
+        if limit is None:
+            limit = scraper.controller.limit if scraper.controller else scraper.get_concurrency()
+        self.scheduler.add_shop(scraper.shop_name, limit)
+
+    @property
+    def started(self) -> bool:
+        return bool(self.workers)
+
+    def start(self):
+        if self.started:
+            return
+        for i in range(self.num_workers):
+            worker = BrowserWorker(self, i + 1)
+            worker.start()
+            self.workers.append(worker)
+        self.watchdog = SessionWatchdog(self, self.browser_factory.get_lifecycle_config()['watchdog_interval'])
+        self.watchdog.start()
+        self.browser_factory.logger.info(f"🚀 {self.num_workers} کارگر مستقل راه‌اندازی شد")
+
+    def submit(self, scraper: 'ProductScraper', product_url: str):
+        self.scheduler.put(scraper.shop_name, product_url)
+
+    def record_restart(self):
+        with self.restart_lock:
+            self.browser_restarts += 1
+        REGISTRY.inc('scraper_browser_restarts_total')
+
+    def submit_retry(self, scraper: 'ProductScraper', product_url: str, delay: float):
+        self.scheduler.put_retry(scraper.shop_name, product_url, delay)
+
+    def get_result(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        دریافت نتیجه بعدی (با timeout پس از پایان مهلت None)؛ اگر هیچ کارگری زنده نباشد خطا می‌دهد
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            try:
+                return self.results_queue.get(timeout=1 if deadline is None else max(0.01, min(1, deadline - time.monotonic())))
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in self.workers):
+                    raise RuntimeError("هیچ کارگر فعالی باقی نمانده است")
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+
+    def poll_result(self) -> Optional[Dict]:
+        """
+        دریافت نتیجه آماده بدون انتظار
+        """
+        try:
+            return self.results_queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self.scheduler.close()
+        if self.watchdog:
+            self.watchdog.stop()
+        for worker in self.workers:
+            worker.join(timeout=30)
+        self.workers = []
+
+
+class MultiShopRunner:
+    """
+    اجرای چند فروشگاه در یک پردازه با مرورگر لیست و مجموعه کارگر مشترک
+    """
+
+    def __init__(self, scrapers: List['ProductScraper'], num_workers: Optional[int] = None):
+        self.scrapers = scrapers
+        self.primary = scrapers[0]
+        if num_workers is None:
+            # مجموع کارگرهای تنظیم‌شده فروشگاه‌ها؛ کارگرها بیشتر منتظر شبکه‌اند و بی‌صدا محدود نمی‌شوند
+            num_workers = sum(scraper.get_max_concurrency() for scraper in scrapers)
+            cpu_count = os.cpu_count() or 2
+            if num_workers > cpu_count:
+                self.primary.logger.warning(
+                    f"⚠️ تعداد کارگرها ({num_workers}) از تعداد CPU ({cpu_count}) بیشتر است؛ "
+                    f"در صورت کمبود منابع concurrent_tabs یا --workers را کاهش دهید"
+                )
+        self.num_workers = max(1, num_workers)
+
+    def start_metrics_server(self) -> Optional[MetricsServer]:
+        """
+        راه‌اندازی endpoint متریک‌های Prometheus در صورت فعال بودن metrics.enabled
+        """
+        metrics_config = self.primary.config.get('metrics', {})
+        if not metrics_config.get('enabled', False):
+            return None
+        try:
+            server = MetricsServer(REGISTRY, metrics_config.get('host', '127.0.0.1'), int(metrics_config.get('port', 9464))).start()
+            print(f"📡 متریک‌ها در {server.url}")
+            return server
+        except OSError as e:
+            self.primary.logger.error(f"❌ خطا در راه‌اندازی سرور متریک‌ها: {e}")
+            return None
+
+    def dump_metrics(self, metrics_server: Optional[MetricsServer]):
+        """
+        چاپ خلاصه متریک‌ها در پایان اجرا و ذخیره در metrics.summary_file
+        """
+        if metrics_server:
+            metrics_server.stop()
+        print("\n" + REGISTRY.format_summary())
+        summary_file = self.primary.config.get('metrics', {}).get('summary_file')
+        if summary_file:
+            try:
+                REGISTRY.save_summary(summary_file)
+            except OSError as e:
+                self.primary.logger.error(f"❌ خطا در ذخیره خلاصه متریک‌ها: {e}")
+
+    def claim_distributed_work(self, pool: WorkerPool):
+        """
+        گرفتن اجاره URLهای تازه از پایگاه داده مشترک وقتی صف فروشگاه کوتاه شده است
+        (URLهای کشف‌شده توسط گره‌های دیگر یا اجاره‌های منقضی‌شده گره‌های از کار افتاده)
+        """
+        now = time.monotonic()
+        for scraper in self.scrapers:
+            if not scraper.is_distributed() or now < self.next_claim.get(scraper.shop_name, 0):
+                continue
+            queued = pool.scheduler.queued(scraper.shop_name)
+            if queued >= self.num_workers:
+                continue
+            claimed = scraper.claim_urls(self.num_workers * 2 - queued)
+            if not claimed:
+                # تا poll_interval بعد دوباره برای قفل نوشتن رقابت نمی‌کنیم
+                self.next_claim[scraper.shop_name] = now + scraper.distributed['poll_interval']
+                continue
+            pool.start()
+            for product_url in claimed:
+                pool.submit(scraper, product_url)
+            self.submitted += len(claimed)
+            scraper.logger.info(f"📥 {len(claimed)} URL از پایگاه داده مشترک برداشته شد ({scraper.shop_name})")
+
+    def has_remote_work(self) -> bool:
+        """
+        آیا گره دیگری هنوز URL در دست دارد (یا URL قابل برداشتی مانده است)
+        """
+        return any(scraper.is_distributed() and scraper.has_leased_work() for scraper in self.scrapers)
+
+    def handle_result(self, pool: WorkerPool, result: Dict):
+        """
+        ارسال نتیجه به جمع‌کننده فروشگاه مربوط و نمایش پیشرفت
+        """
+        scraper = pool.shops[result['shop']]
+        if scraper.controller:
+            scraper.controller.observe(result, pool.scheduler)
+        retry_delay = scraper.plan_retry(result)
+        if retry_delay is not None:
+            # تلاش مجدد در صف کم‌اولویت؛ هنوز تکمیل‌شده حساب نمی‌شود
+            pool.submit_retry(scraper, result['url'], retry_delay)
+            self.retried += 1
+            print(f"🔁 [{self.completed}/{self.submitted}] {result['shop']} - Worker {result['worker_id']}: {result['url']} - "
+                  f"تلاش مجدد {result['attempts']} پس از {retry_delay:.1f}s ({result.get('error')})")
+            return
+        self.completed += 1
+        scraper.collect_result(result)
+        status = "✅" if result['success'] else "❌"
+        print(f"{status} [{self.completed}/{self.submitted}] {result['shop']} - Worker {result['worker_id']}: {result['url']}")
+
+    def run(self):
+        """
+        بارگذاری وضعیت همه فروشگاه‌ها، استخراج لیست‌ها و زمان‌بندی منصفانه محصولات
+        """
+        pool = None
+        metrics_server = self.start_metrics_server()
+        try:
+            shop_names = ', '.join(scraper.shop_name for scraper in self.scrapers)
+            print(f"🚀 شروع اجرای ربات اسکرپینگ موازی با Resume... ({shop_names})")
+            
+            # بارگذاری وضعیت قبلی
+            for scraper in self.scrapers:
+                scraper.load_progress()
+                if scraper.is_incremental():
+                    scraper.load_fingerprints()
+                    scraper.start_incremental_epoch()
+                scraper.prepare_output()
+            
+            # حالت توزیع‌شده: تمدید اجاره‌ها در پس‌زمینه
+            for scraper in self.scrapers:
+                scraper.start_lease_heartbeat()
+            distributed = [scraper for scraper in self.scrapers if scraper.is_distributed()]
+            poll_interval = min((scraper.distributed['poll_interval'] for scraper in distributed), default=None)
+            
+            # ردیاب فرمان‌ها در سطح پردازه است (درایورها توسط فروشگاه اصلی ساخته می‌شوند)
+            for scraper in self.scrapers[1:]:
+                scraper.tracer = self.primary.tracer
+            
+            # یک مرورگر مشترک برای صفحات لیست همه فروشگاه‌ها
+            self.primary.setup_driver()
+            for scraper in self.scrapers[1:]:
+                scraper.driver = self.primary.driver
+            
+            pool = WorkerPool(self.primary, self.num_workers)
+            for scraper in self.scrapers:
+                pool.add_shop(scraper)
+            
+            # خط لوله: URLهای جدید همزمان با اسکرول صفحه لیست به کارگرها سپرده می‌شوند
+            self.submitted = 0
+            self.completed = 0
+            self.retried = 0
+            self.next_claim = {}
+            for scraper in self.scrapers:
+                if scraper.is_distributed() and not scraper.distributed['discover']:
+                    # این گره فقط URLهای ثبت‌شده توسط گره‌های دیگر را برمی‌دارد
+                    continue
+                for remaining_batch in scraper.iter_remaining_urls():
+                    if scraper.is_distributed():
+                        # فقط به اندازه ظرفیت این گره و از URLهایی که گره دیگری در دست ندارد؛
+                        # بقیه در پایگاه داده برای همه گره‌ها می‌مانند
+                        capacity = self.num_workers * 2 - pool.scheduler.queued(scraper.shop_name)
+                        remaining_batch = scraper.claim_urls(capacity, remaining_batch)
+                        if not remaining_batch:
+                            continue
+                    pool.start()
+                    for product_url in remaining_batch:
+                        pool.submit(scraper, product_url)
+                    self.submitted += len(remaining_batch)
+                    # جمع‌آوری نتایج آماده بین اسکرول‌ها
+                    while True:
+                        result = pool.poll_result()
+                        if result is None:
+                            break
+                        self.handle_result(pool, result)
+            
+            self.claim_distributed_work(pool)
+            if not self.submitted and not self.has_remote_work():
+                print("🎉 همه محصولات قبلاً پردازش شده‌اند!")
+                for scraper in self.scrapers:
+                    scraper.complete_incremental_epoch()
+                return
+            
+            # مصرف‌کننده: نتایج به محض آماده شدن جمع‌آوری می‌شوند
+            while True:
+                self.claim_distributed_work(pool)
+                if self.completed >= self.submitted:
+                    # در حالت توزیع‌شده تا پایان کار گره‌های دیگر (یا انقضای اجاره آن‌ها) منتظر می‌مانیم
+                    if not distributed or not self.has_remote_work():
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                result = pool.get_result(poll_interval)
+                if result is not None:
+                    self.handle_result(pool, result)
+            
+            print("\n🎉 تمام محصولات با موفقیت پردازش شدند!")
+            for scraper in self.scrapers:
+                scraper.complete_incremental_epoch()
+            if self.retried:
+                print(f"🔁 تعداد تلاش‌های مجدد: {self.retried}")
+            if pool.browser_restarts:
+                print(f"♻️ تعداد بازسازی مرورگرها: {pool.browser_restarts}")
+            
+        except KeyboardInterrupt:
+            print(f"\n⏹️ ربات متوقف شد - وضعیت ذخیره شد")
+            self.primary.logger.info("⏹️ ربات توسط کاربر متوقف شد")
+        except Exception as e:
+            self.primary.logger.error(f"❌ خطای کلی: {e}")
+        finally:
+            if pool:
+                pool.stop()
+            for scraper in self.scrapers:
+                scraper.stop_lease_heartbeat()
+            # مرورگر مشترک فقط یک بار بسته می‌شود
+            for scraper in self.scrapers[1:]:
+                scraper.driver = None
+            for scraper in self.scrapers:
+                scraper.cleanup_with_progress_save(scraper.all_product_links)
+            if self.primary.tracer:
+                self.primary.tracer.save_report()
+            self.dump_metrics(metrics_server)
+
+
+class CommandTracer:
+    """
+    ردیابی اختیاری فرمان‌های WebDriver: هر فرمان به URL محصول، مرحله و محل فراخوانی نسبت داده می‌شود
+    """
+
+    def __init__(self, directory: str, top_call_sites: int = 20):
+        self.directory = directory
+        self.top_call_sites = top_call_sites
+        self.lock = threading.Lock()
+        self.products = 0
+        self.commands = 0
+        self.by_site: Dict[str, Dict] = defaultdict(lambda: {'count': 0, 'total': 0.0, 'commands': defaultdict(int)})
+        self.by_phase: Dict[str, Dict] = defaultdict(lambda: {'count': 0, 'total': 0.0})
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['CommandTracer']:
+        tracing_config = config.get('tracing', {})
+        if not tracing_config.get('enabled', False):
+            return None
+        return cls(tracing_config.get('directory', 'traces'), int(tracing_config.get('top_call_sites', 20)))
+
+    def wrap(self, driver: webdriver.Chrome):
+        """
+        جایگزینی execute اجراکننده فرمان درایور با نسخه زمان‌سنج
+        """
+        executor = driver.command_executor
+        original_execute = executor.execute
+
+        def traced_execute(command, params):
+            start = time.perf_counter()
+            try:
+                return original_execute(command, params)
+            finally:
+                self.record(command, time.perf_counter() - start)
+
+        executor.execute = traced_execute
+
+    def find_call_site(self) -> str:
+        """
+        نزدیک‌ترین تابع این ماژول در پشته فراخوانی (بیرون از سلنیوم و خود ردیاب)
+        """
+        frame = sys._getframe(3)
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == __file__ and code.co_name not in ('traced_execute', 'record', 'find_call_site'):
+                return f"{code.co_name}:{frame.f_lineno}"
+            frame = frame.f_back
+        return '-'
+
+    def record(self, command: str, duration: float):
+        phases = getattr(_worker_state, 'phases', None)
+        entry = {
+            'command': command,
+            'phase': phases[-1] if phases else '-',
+            'site': self.find_call_site(),
+            'duration': duration
+        }
+        records = getattr(_worker_state, 'trace_records', None)
+        if records is not None:
+            records.append(entry)
+        else:
+            self.aggregate([entry])
+
+    def aggregate(self, entries: List[Dict]):
+        with self.lock:
+            for entry in entries:
+                self.commands += 1
+                site = self.by_site[entry['site']]
+                site['count'] += 1
+                site['total'] += entry['duration']
+                site['commands'][entry['command']] += 1
+                phase = self.by_phase[entry['phase']]
+                phase['count'] += 1
+                phase['total'] += entry['duration']
+
+    def begin_product(self, product_url: str):
+        _worker_state.trace_url = product_url
+        _worker_state.trace_records = []
+
+    def end_product(self):
+        """
+        نوشتن فایل ردیابی محصول جاری و افزودن آن به گزارش تجمعی
+        """
+        product_url = getattr(_worker_state, 'trace_url', None)
+        records = getattr(_worker_state, 'trace_records', None)
+        _worker_state.trace_url = None
+        _worker_state.trace_records = None
+        if product_url is None or records is None:
+            return
+        self.aggregate(records)
+        with self.lock:
+            self.products += 1
+        trace = {
+            'url': product_url,
+            'total_commands': len(records),
+            'total_time': sum(entry['duration'] for entry in records),
+            'commands': records
+        }
+        try:
+            trace_file = os.path.join(self.directory, product_key(product_url).hex() + '.json')
+            with open(trace_file, 'w', encoding='utf-8') as f:
+                json.dump(trace, f, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+
+    def build_report(self) -> Dict:
+        with self.lock:
+            sites = sorted(self.by_site.items(), key=lambda item: item[1]['total'], reverse=True)
+            return {
+                'products': self.products,
+                'commands': self.commands,
+                'commands_per_product': self.commands / self.products if self.products else 0.0,
+                'call_sites': [
+                    {'site': site, 'count': stats['count'], 'total': stats['total'], 'commands': dict(stats['commands'])}
+                    for site, stats in sites
+                ],
+                'phases': {phase: dict(stats) for phase, stats in self.by_phase.items()}
+            }
+
+    def save_report(self):
+        """
+        ذخیره گزارش تجمعی و چاپ پرهزینه‌ترین محل‌های فراخوانی
+        """
+        report = self.build_report()
+        report_file = os.path.join(self.directory, 'report.json')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        
+        print(f"\n🔬 ردیابی WebDriver: {report['commands']} فرمان برای {report['products']} محصول "
+              f"({report['commands_per_product']:.1f} فرمان در هر محصول) - گزارش: {report_file}")
+        for entry in report['call_sites'][:self.top_call_sites]:
+            top_commands = ', '.join(f"{name}×{count}" for name, count in sorted(entry['commands'].items(), key=lambda item: -item[1])[:3])
+            print(f"   {entry['site']:<45} n={entry['count']:<6} {entry['total'] * 1000:9.1f}ms  {top_commands}")
+
+
+class HostPacer:
+    """
+    حداقل فاصله بین دو درخواست به یک میزبان (مشترک بین همه کارگرها و همه فروشگاه‌های پردازه)
+    """
+
+    def __init__(self):
+        # فاصله تنظیم‌شده کنترل‌کننده تطبیقی و کف فاصله کانفیگ فروشگاه‌هایی که به میزبان درخواست داده‌اند
+        self.intervals: Dict[str, float] = {}
+        self.min_intervals: Dict[str, float] = {}
+        self.next_slot: Dict[str, float] = {}
+        # زمان آخرین کاهش سرعت هر میزبان توسط کنترل‌کننده هر فروشگاه
+        self.backed_off_at: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def _effective_interval(self, host: str) -> float:
+        return max(self.intervals.get(host, 0.0), self.min_intervals.get(host, 0.0))
+
+    def get_interval(self, host: str) -> float:
+        with self.lock:
+            return self._effective_interval(host)
+
+    def adjust(self, host: str, decrease: bool, settings: Dict) -> Tuple[float, float]:
+        """
+        گام AIMD روی فاصله مشترک میزبان (اتمیک بین کنترل‌کننده‌های فروشگاه‌ها)؛
+        تا backoff_cooldown پس از کاهش سرعت هر فروشگاه، فاصله میزبان کمتر نمی‌شود
+        خروجی: (فاصله قبلی، فاصله جدید)
+        """
+        with self.lock:
+            interval = self._effective_interval(host)
+            now = time.monotonic()
+            if decrease:
+                # کاهش ضربی: دو برابر فاصله
+                new_interval = min(settings['max_interval'], max(interval * 2, settings['interval_step']))
+                self.backed_off_at[host] = now
+            elif now - self.backed_off_at.get(host, float('-inf')) < settings['backoff_cooldown']:
+                new_interval = interval
+            else:
+                # افزایش جمعی: یک گام فاصله کمتر
+                new_interval = max(settings['min_interval'], interval - settings['interval_step'])
+            self.intervals[host] = new_interval
+            return interval, self._effective_interval(host)
+
+    def wait(self, url: str, min_interval: float = 0.0):
+        """
+        رزرو نوبت بعدی میزبان و انتظار تا رسیدن آن؛ min_interval کف فاصله فروشگاه درخواست‌دهنده است
+        و بزرگ‌ترین کف ثبت‌شده برای همه درخواست‌های آن میزبان اعمال می‌شود
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            if min_interval > self.min_intervals.get(host, 0.0):
+                self.min_intervals[host] = min_interval
+            interval = self._effective_interval(host)
+            if interval <= 0:
+                return
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, 0.0))
+            self.next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# فاصله‌گذاری مشترک همه فروشگاه‌های پردازه (فروشگاه‌ها معمولاً به یک میزبان درخواست می‌دهند)
+HOST_PACER = HostPacer()
+
+
+class AdaptiveController:
+    """
+    کنترل‌کننده AIMD همزمانی و فاصله درخواست‌های هر میزبان بر اساس تاخیر ناوبری، نرخ timeout، صفحات مسدود و خطا
+    """
+
+    def __init__(self, scraper: 'ProductScraper', settings: Dict):
+        self.scraper = scraper
+        self.settings = settings
+        self.limit = settings['initial_workers']
+        self.results: deque = deque(maxlen=settings['window'])
+
+    def observe(self, result: Dict, scheduler: 'FairScheduler'):
+        """
+        ثبت نتیجه یک محصول و تنظیم همزمانی/فاصله پس از پر شدن پنجره مشاهده
+        """
+        exception = result.get('exception')
+        self.results.append({
+            'success': bool(result['success']),
+            'timeout': exception is not None and issubclass(exception, TIMEOUT_ERRORS),
+            'blocked': bool(result.get('blocked')),
+            'navigation': result.get('navigation')
+        })
+        if len(self.results) < self.results.maxlen:
+            return
+        
+        window = list(self.results)
+        timeout_rate = sum(entry['timeout'] for entry in window) / len(window)
+        blocked_rate = sum(entry['blocked'] for entry in window) / len(window)
+        error_rate = sum(not entry['success'] for entry in window) / len(window)
+        # تاخیر فقط از زمان بارگذاری صفحه، بدون انتظار HostPacer و استخراج
+        latencies = sorted(entry['navigation'] for entry in window if entry['success'] and entry['navigation'] is not None)
+        latency = latencies[len(latencies) // 2] if latencies else 0.0
+        host = urlparse(result['url']).netloc
+        settings = self.settings
+        
+        decrease = (timeout_rate > settings['max_timeout_rate'] or error_rate > settings['max_error_rate']
+                    or blocked_rate > settings['max_blocked_rate'] or latency > settings['latency_target'])
+        if decrease:
+            # کاهش ضربی: نصف کارگرها
+            new_limit = max(settings['min_workers'], self.limit // 2)
+        else:
+            # افزایش جمعی: یک کارگر بیشتر
+            new_limit = min(settings['max_workers'], self.limit + 1)
+        # فاصله میزبان بین همه فروشگاه‌ها مشترک است تا کاهش سرعت یکی همه را کند کند
+        interval, new_interval = self.scraper.host_pacer.adjust(host, decrease, settings)
+        
+        if new_limit != self.limit or new_interval != interval:
+            direction = "⬇️ کاهش" if decrease else "⬆️ افزایش"
+            self.scraper.logger.info(
+                f"🎛️ {direction} سرعت {self.scraper.shop_name}: کارگرها {self.limit}→{new_limit}, "
+                f"فاصله {host} {interval:.2f}s→{new_interval:.2f}s "
+                f"(تاخیر میانه {latency:.1f}s، timeout {timeout_rate:.0%}، مسدود {blocked_rate:.0%}، خطا {error_rate:.0%})"
+            )
+            self.limit = new_limit
+            scheduler.set_limit(self.scraper.shop_name, new_limit)
+            REGISTRY.inc('scraper_controller_adjustments_total', shop=self.scraper.shop_name, direction='down' if decrease else 'up')
+        # هر تصمیم بر اساس پنجره تازه با تنظیمات جدید گرفته می‌شود
+        self.results.clear()
+
+
+class SqliteStateStore:
+    """
+    ذخیره‌ساز اختیاری وضعیت و محصولات در SQLite به جای فایل‌های بزرگ JSON
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS urls (
+            shop TEXT NOT NULL,
+            key BLOB NOT NULL,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            lease_owner TEXT,
+            lease_expires REAL,
+            PRIMARY KEY (shop, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_urls_status ON urls (status);
+        CREATE INDEX IF NOT EXISTS idx_urls_shop_status ON urls (shop, status);
+        CREATE TABLE IF NOT EXISTS products (
+            shop TEXT NOT NULL,
+            key BLOB NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (shop, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_shop ON products (shop);
+        CREATE TABLE IF NOT EXISTS fingerprints (
+            shop TEXT NOT NULL,
+            key BLOB NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (shop, key)
+        );
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            shop TEXT NOT NULL,
+            key BLOB NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (shop, key)
+        );
+        CREATE TABLE IF NOT EXISTS epochs (
+            shop TEXT NOT NULL,
+            epoch INTEGER NOT NULL,
+            started_at REAL NOT NULL,
+            completed_at REAL,
+            PRIMARY KEY (shop, epoch)
+        );
+    """
+
+    # ستون‌های اجاره که به پایگاه‌های داده ساخته‌شده با نسخه قبلی اضافه می‌شوند
+    LEASE_COLUMNS = (('lease_owner', 'TEXT'), ('lease_expires', 'REAL'))
+
+    # سقف پارامترهای یک پرس‌وجوی IN در SQLite
+    CLAIM_CHUNK = 500
+
+    # جدول‌های رکورد (کلید، JSON) که در حالت توزیع‌شده به جای فایل‌های مشترک نوشته می‌شوند
+    RECORD_TABLES = ('fingerprints', 'dead_letters')
+
+    def __init__(self, path: str, shop: str, journal_mode: str = 'WAL', busy_timeout: float = 30.0):
+        self.path = path
+        self.shop = shop
+        self.lock = threading.Lock()
+        # busy_timeout: چند پردازه (گره) می‌توانند همزمان روی یک فایل بنویسند
+        self.connection = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        self.connection.execute(f'PRAGMA journal_mode={journal_mode}')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(urls)')}
+        for name, column_type in self.LEASE_COLUMNS:
+            if name not in columns:
+                self.connection.execute(f'ALTER TABLE urls ADD COLUMN {name} {column_type}')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS idx_urls_lease ON urls (shop, status, lease_expires)')
+        self.connection.commit()
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        تعداد URLهای فروشگاه به تفکیک وضعیت (pending، done، failed)
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT status, COUNT(*) FROM urls WHERE shop = ? GROUP BY status', (self.shop,)
+            ).fetchall()
+        return dict(rows)
+
+    def filter_remaining(self, urls: List[str]) -> List[str]:
+        """
+        ثبت URLهای جدید و برگرداندن URLهای هنوز پردازش‌نشده با حفظ ترتیب ورودی
+        """
+        now = time.time()
+        keyed = [(position, product_key(url), url) for position, url in enumerate(urls)]
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.executemany(
+                'INSERT OR IGNORE INTO urls (shop, key, url, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                ((self.shop, key, url, now, now) for _, key, url in keyed)
+            )
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS listing (position INTEGER PRIMARY KEY, key BLOB NOT NULL, url TEXT NOT NULL)')
+            cursor.execute('DELETE FROM listing')
+            cursor.executemany('INSERT INTO listing (position, key, url) VALUES (?, ?, ?)', keyed)
+            rows = cursor.execute(
+                """
+                SELECT listing.url FROM listing
+                JOIN urls ON urls.shop = ? AND urls.key = listing.key
+                WHERE urls.status = 'pending'
+                ORDER BY listing.position
+                """, (self.shop,)
+            ).fetchall()
+            self.connection.commit()
+        return [row[0] for row in rows]
+
+    def record_result(self, url: str, success: bool, product_data: Optional[Dict] = None, error: Optional[str] = None):
+        """
+        ثبت نتیجه یک URL (و محصول آن) در یک تراکنش
+        """
+        now = time.time()
+        key = product_key(url)
+        status = 'done' if success else 'failed'
+        with self.lock:
+            self.connection.execute(
+                """
+                INSERT INTO urls (shop, key, url, status, attempts, last_error, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (shop, key) DO UPDATE SET
+                    status = CASE WHEN urls.status = 'done' THEN 'done' ELSE excluded.status END,
+                    attempts = urls.attempts + 1,
+                    last_error = excluded.last_error,
+                    updated_at = excluded.updated_at,
+                    lease_owner = NULL,
+                    lease_expires = NULL
+                """, (self.shop, key, url, status, error, now, now)
+            )
+            if success and product_data:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO products (shop, key, data, updated_at) VALUES (?, ?, ?, ?)',
+                    (self.shop, key, json.dumps(product_data, ensure_ascii=False), now)
+                )
+            self.connection.commit()
+
+    def record_attempt(self, url: str, error: Optional[str] = None):
+        """
+        ثبت یک تلاش ناموفق گذرا؛ URL در وضعیت pending می‌ماند
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                """
+                INSERT INTO urls (shop, key, url, attempts, last_error, created_at, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (shop, key) DO UPDATE SET
+                    attempts = urls.attempts + 1,
+                    last_error = excluded.last_error,
+                    updated_at = excluded.updated_at
+                """, (self.shop, product_key(url), url, error, now, now)
+            )
+            self.connection.commit()
+
+    def begin_epoch(self, keys) -> Tuple[int, Optional[int]]:
+        """
+        شروع دور جدید حالت افزایشی فقط اگر دور قبلی کامل شده باشد: URLهای پردازش‌شده با این کلیدها
+        به pending برمی‌گردند؛ خروجی (شماره دور، تعداد بازگردانده‌شده) و برای ادامه دور باز (شماره دور، None)
+
+        بررسی و بازگرداندن در یک تراکنش BEGIN IMMEDIATE است تا گره‌ای که دیرتر شروع می‌کند
+        نتایج دور جاری گره‌های دیگر را pending نکند
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.commit()
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                row = cursor.execute(
+                    'SELECT epoch, completed_at FROM epochs WHERE shop = ? ORDER BY epoch DESC LIMIT 1', (self.shop,)
+                ).fetchone()
+                if row and row[1] is None:
+                    self.connection.commit()
+                    return row[0], None
+                epoch = (row[0] if row else 0) + 1
+                cursor.execute('INSERT INTO epochs (shop, epoch, started_at) VALUES (?, ?, ?)', (self.shop, epoch, now))
+                before = self.connection.total_changes
+                cursor.executemany(
+                    "UPDATE urls SET status = 'pending', updated_at = ? WHERE shop = ? AND key = ? AND status = 'done'",
+                    ((now, self.shop, key) for key in keys)
+                )
+                refreshed = self.connection.total_changes - before
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+        return epoch, refreshed
+
+    def complete_epoch(self, epoch: int):
+        """
+        علامت‌گذاری پایان یک دور حالت افزایشی
+        """
+        with self.lock:
+            self.connection.execute(
+                'UPDATE epochs SET completed_at = ? WHERE shop = ? AND epoch = ? AND completed_at IS NULL',
+                (time.time(), self.shop, epoch)
+            )
+            self.connection.commit()
+
+    def import_progress(self, processed_keys: List[bytes], failed_keys: List[bytes], products: List[Dict]):
+        """
+        انتقال یک‌باره وضعیت فایل progress قدیمی به پایگاه داده
+        """
+        now = time.time()
+        product_urls = {product_key(product['url']): product['url'] for product in products if product.get('url')}
+        with self.lock:
+            cursor = self.connection.cursor()
+            for status, keys in (('done', processed_keys), ('failed', failed_keys)):
+                cursor.executemany(
+                    'INSERT OR IGNORE INTO urls (shop, key, url, status, attempts, created_at, updated_at) VALUES (?, ?, ?, ?, 1, ?, ?)',
+                    ((self.shop, key, product_urls.get(key, ''), status, now, now) for key in keys)
+                )
+            cursor.executemany(
+                'INSERT OR IGNORE INTO products (shop, key, data, updated_at) VALUES (?, ?, ?, ?)',
+                ((self.shop, product_key(product['url']), json.dumps(product, ensure_ascii=False), now)
+                 for product in products if product.get('url'))
+            )
+            self.connection.commit()
+
+    def claim(self, owner: str, lease_seconds: float, limit: int, urls: Optional[List[str]] = None) -> List[str]:
+        """
+        گرفتن اجاره URLهای pending بدون اجاره فعال (یا با اجاره منقضی‌شده از گره‌ای از کار افتاده)
+
+        هر دسته در یک تراکنش BEGIN IMMEDIATE انتخاب و اجاره می‌شود تا دو گره یک URL را
+        همزمان برندارند؛ با urls فقط همان URLها (به ترتیب ورودی) در نظر گرفته می‌شوند
+        """
+        if limit <= 0:
+            return []
+        if urls is None:
+            return self._claim_chunk(owner, lease_seconds, limit, None)
+        claimed = []
+        for start in range(0, len(urls), self.CLAIM_CHUNK):
+            if len(claimed) >= limit:
+                break
+            chunk = urls[start:start + self.CLAIM_CHUNK]
+            claimed.extend(self._claim_chunk(owner, lease_seconds, limit - len(claimed), chunk))
+        return claimed
+
+    def _claim_chunk(self, owner: str, lease_seconds: float, limit: int, urls: Optional[List[str]]) -> List[str]:
+        now = time.time()
+        query = """
+            SELECT key, url FROM urls
+            WHERE shop = ? AND status = 'pending' AND (lease_expires IS NULL OR lease_expires < ?)
+        """
+        params: List = [self.shop, now]
+        if urls is not None:
+            keys = [product_key(url) for url in urls]
+            query += f" AND key IN ({', '.join('?' * len(keys))})"
+            params.extend(keys)
+        query += ' ORDER BY rowid LIMIT ?'
+        params.append(limit)
+        with self.lock:
+            self.connection.commit()
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                rows = cursor.execute(query, params).fetchall()
+                cursor.executemany(
+                    'UPDATE urls SET lease_owner = ?, lease_expires = ? WHERE shop = ? AND key = ?',
+                    ((owner, now + lease_seconds, self.shop, key) for key, _ in rows)
+                )
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+        if urls is not None:
+            order = {product_key(url): position for position, url in enumerate(urls)}
+            rows.sort(key=lambda row: order.get(row[0], 0))
+        return [url for _, url in rows]
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """
+        تمدید اجاره همه URLهای pending این گره (heartbeat)
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE urls SET lease_expires = ? WHERE shop = ? AND lease_owner = ? AND status = 'pending'",
+                (time.time() + lease_seconds, self.shop, owner)
+            )
+            self.connection.commit()
+            return cursor.rowcount
+
+    def release_leases(self, owner: str) -> int:
+        """
+        آزاد کردن اجاره‌های باقی‌مانده این گره تا گره‌های دیگر بلافاصله آن‌ها را بردارند
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE urls SET lease_owner = NULL, lease_expires = NULL WHERE shop = ? AND lease_owner = ? AND status = 'pending'",
+                (self.shop, owner)
+            )
+            self.connection.commit()
+            return cursor.rowcount
+
+    def lease_counts(self) -> Tuple[int, int]:
+        """
+        تعداد URLهای pending قابل برداشت و URLهای pending در اجاره فعال گره‌ها
+        """
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                """
+                SELECT
+                    SUM(CASE WHEN lease_expires IS NULL OR lease_expires < ? THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN lease_expires >= ? THEN 1 ELSE 0 END)
+                FROM urls WHERE shop = ? AND status = 'pending'
+                """, (now, now, self.shop)
+            ).fetchone()
+        return row[0] or 0, row[1] or 0
+
+    def iter_products(self):
+        """
+        خواندن جریانی محصولات فروشگاه به ترتیب ثبت
+        """
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT data FROM products WHERE shop = ? ORDER BY rowid', (self.shop,))
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def put_records(self, table: str, records: Dict[bytes, Dict], replace: bool = True):
+        """
+        ثبت رکوردهای اثرانگشت یا dead-letter؛ با replace=False رکوردهای موجود حفظ می‌شوند
+        """
+        if table not in self.RECORD_TABLES:
+            raise ValueError(f'unknown record table: {table}')
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                f'{verb} INTO {table} (shop, key, data, updated_at) VALUES (?, ?, ?, ?)',
+                ((self.shop, key, json.dumps(record, ensure_ascii=False), now) for key, record in records.items())
+            )
+            self.connection.commit()
+
+    def iter_records(self, table: str):
+        """
+        خواندن جریانی (کلید، رکورد) از جدول اثرانگشت یا dead-letter
+        """
+        if table not in self.RECORD_TABLES:
+            raise ValueError(f'unknown record table: {table}')
+        cursor = self.connection.cursor()
+        cursor.execute(f'SELECT key, data FROM {table} WHERE shop = ? ORDER BY rowid', (self.shop,))
+        for key, data in cursor:
+            yield key, json.loads(data)
+
+    def checkpoint(self):
+        """
+        انتقال WAL به فایل اصلی پایگاه داده
+        """
+        with self.lock:
+            self.connection.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class LeaseHeartbeat(threading.Thread):
+    """
+    تمدید دوره‌ای اجاره URLهای در دست این گره تا گره‌های دیگر آن‌ها را پس نگیرند
+    """
+
+    def __init__(self, scraper: 'ProductScraper', settings: Dict):
+        super().__init__(name=f"lease-heartbeat-{scraper.shop_name}", daemon=True)
+        self.scraper = scraper
+        self.settings = settings
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.settings['heartbeat_interval']):
+            try:
+                self.scraper.state_store.renew_leases(self.settings['node_id'], self.settings['lease_seconds'])
+            except sqlite3.Error as e:
+                self.scraper.logger.warning(f"⚠️ خطا در تمدید اجاره‌ها: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=5)
+
 
 class ProductScraper:
     """
@@ -36,100 +1677,506 @@ class ProductScraper:
         راه‌اندازی ربات با بارگذاری کانفیگ و تنظیمات Resume
         """
         self.config = self.load_config(config_path)
+        self.shop_name = os.path.splitext(os.path.basename(config_path))[0]
         self.driver = None
         self.scraped_products = []
-        self.tab_handles = []
         
         # تنظیمات Resume
-        self.progress_file = "scraper_progress.json"
-        self.processed_urls = set()
-        self.failed_urls = set()
+        # هر فروشگاه فایل progress مستقل دارد (config.json همان نام قدیمی را نگه می‌دارد)
+        self.state_suffix = '' if self.shop_name == 'config' else f"_{self.shop_name}"
+        self.progress_file = self.config.get('progress_file', f"scraper_progress{self.state_suffix}.json")
+        self.all_product_links = None
+        # وضعیت Resume با کلیدهای ۱۶ بایتی محصول (UUID ترب) به جای URL کامل
+        self.processed_keys = set()
+        self.failed_keys = set()
+        # نمایه کلید به URL لینک‌های کشف‌شده در این اجرا برای حذف تکراری‌ها
+        self.product_index = {}
+        self.total_found_products = 0
+        
+        # تلاش مجدد: تعداد تلاش هر کلید محصول و فهرست شکست‌های قطعی (dead-letter)
+        self.attempts = defaultdict(int)
+        self.dead_letters = []
+        
+        # ذخیره‌ساز اختیاری SQLite به جای فایل progress و ژورنال
+        self.state_store = None
+        
+        # ژورنال append-only برای ثبت هر URL تکمیل‌شده
+        self.journal_handle = None
+        self.journal_records = 0
+        self.journal_lock = threading.Lock()
+        
+        # زمان‌سنجی مراحل (navigation، title_wait، categories، specs، checkpoint و ...)
+        self.phase_durations = defaultdict(list)
+        self.phase_lock = threading.Lock()
+        
+        # شمارنده صرفه‌جویی مسدودسازی منابع در این اجرا
+        self.blocking_stats = {
+            'blocked_requests': 0,
+            'estimated_bytes_saved': 0,
+            'loaded_requests': 0,
+            'loaded_bytes': 0,
+            'blocked_by_type': defaultdict(int)
+        }
+        self.blocking_lock = threading.Lock()
+        
+        # فاصله‌گذاری حداقلی درخواست‌ها به ازای هر میزبان، مشترک با فروشگاه‌های دیگر همین پردازه
+        delays_config = self.config.get('delays', {})
+        self.min_host_interval = float(delays_config.get('min_host_interval', delays_config.get('between_products', 0)))
+        self.host_pacer = HOST_PACER
+        
+        # کنترل‌کننده تطبیقی همزمانی و فاصله درخواست‌ها (adaptive.enabled)
+        adaptive_settings = self.get_adaptive_config()
+        self.controller = AdaptiveController(self, adaptive_settings) if adaptive_settings['enabled'] else None
+        
+        # خروجی جریانی NDJSON با آمار تدریجی
+        self.output_handle = None
+        self.output_stats = self.new_output_stats()
+        
+        # حالت افزایشی: اثرانگشت هر URL از اجرای قبلی و کلیدهای بررسی دوباره در این دور
+        self.fingerprints = {}
+        self.refresh_keys = set()
+        # دور جاری حالت افزایشی: {'id', 'started_at', 'completed'} (در snapshot یا جدول epochs)
+        self.incremental_epoch = None
+        self.reused_products = 0
+        
+        # مسیر سریع HTTP (بدون مرورگر)
+        self.http_pool = None
+        self.http_pool_lock = threading.Lock()
+        
+        # آرشیو اختیاری HTML صفحات برای استخراج دوباره آفلاین (archive.enabled)
+        archive_config = self.config.get('archive', {})
+        self.html_archive = None
+        if archive_config.get('enabled', False):
+            self.html_archive = HtmlArchive(archive_config.get('directory', 'html_archive'),
+                                            int(archive_config.get('compression_level', 6)))
         
         self.setup_logging()
+        
+        # پروفایل استخراج: فقط فیلدهای انتخاب‌شده و مراحل لازم آن‌ها اجرا می‌شوند
+        self.extraction_fields = self.load_extraction_profile()
+        
+        # حالت توزیع‌شده: چند گره URLها را با اجاره از پایگاه داده مشترک برمی‌دارند
+        self.distributed = self.get_distributed_config()
+        self.lease_heartbeat = None
+        self.state_store = self.create_state_store()
+        
+        # ردیابی اختیاری فرمان‌های WebDriver (tracing.enabled)
+        self.tracer = CommandTracer.from_config(self.config)
+        
+        # حالت daemon: اتصال به نمونه‌های گرم Chrome به جای اجرای سرد
+        daemon_config = self.config.get('browser_daemon', {})
+        self.browser_daemon = None
+        if daemon_config.get('enabled', False):
+            self.browser_daemon = BrowserDaemon(self, daemon_config.get('directory', '.browser_daemon'),
+                                                float(daemon_config.get('startup_timeout', 10)))
+
+    @property
+    def driver(self):
+        """
+        درایور فعال: درایور اختصاصی کارگر جاری یا درایور اصلی
+        """
+        return getattr(_worker_state, 'driver', None) or self._driver
+
+    @driver.setter
+    def driver(self, value):
+        self._driver = value
+
+    @contextmanager
+    def timed_phase(self, phase: str):
+        """
+        اندازه‌گیری مدت زمان یک مرحله از پردازش
+        """
+        if not hasattr(_worker_state, 'phases'):
+            _worker_state.phases = []
+        _worker_state.phases.append(phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _worker_state.phases.pop()
+            duration = time.perf_counter() - start
+            product_phases = getattr(_worker_state, 'product_phases', None)
+            if product_phases is not None:
+                # مدت مراحل محصول جاری برای سیگنال تاخیر کنترل‌کننده
+                product_phases[phase] = product_phases.get(phase, 0.0) + duration
+            self.record_phase(phase, duration)
+
+    def record_phase(self, phase: str, duration: float):
+        """
+        ثبت مدت زمان یک مرحله
+        """
+        with self.phase_lock:
+            self.phase_durations[phase].append(duration)
+        REGISTRY.observe('scraper_phase_seconds', duration, shop=self.shop_name, phase=phase)
+
+    def get_phase_summary(self) -> Dict[str, Dict]:
+        """
+        خلاصه آماری مراحل: تعداد، میانه (p50) و صدک ۹۵ به ثانیه
+        """
+        summary = {}
+        with self.phase_lock:
+            for phase, durations in self.phase_durations.items():
+                if not durations:
+                    continue
+                ordered = sorted(durations)
+                summary[phase] = {
+                    'count': len(ordered),
+                    'p50': ordered[int(0.50 * (len(ordered) - 1))],
+                    'p95': ordered[int(0.95 * (len(ordered) - 1))],
+                    'total': sum(ordered)
+                }
+        return summary
+
+    def create_state_store(self) -> Optional[SqliteStateStore]:
+        """
+        ساخت ذخیره‌ساز SQLite در صورت انتخاب state_store.backend = "sqlite"
+        """
+        store_config = self.config.get('state_store', {})
+        if self.distributed['enabled']:
+            # حالت توزیع‌شده همیشه از پایگاه داده مشترک استفاده می‌کند
+            path = self.distributed['path']
+            journal_mode = self.distributed['journal_mode']
+        elif store_config.get('backend', 'json') == 'sqlite':
+            path = store_config.get('path', 'scraper_state.db')
+            journal_mode = store_config.get('journal_mode', 'WAL')
+        else:
+            return None
+        try:
+            store = SqliteStateStore(path, self.shop_name, journal_mode)
+            self.logger.info(f"🗄️ ذخیره‌ساز SQLite فعال شد: {path} ({self.shop_name})")
+            return store
+        except sqlite3.Error as e:
+            if self.distributed['enabled']:
+                raise
+            self.logger.error(f"❌ خطا در باز کردن پایگاه داده {path}: {e} - استفاده از فایل progress")
+            return None
+
+    def get_distributed_config(self) -> Dict:
+        """
+        تنظیمات حالت توزیع‌شده (distributed.*)؛ شناسه پیش‌فرض گره: hostname-pid
+        """
+        distributed_config = self.config.get('distributed', {})
+        state_store_config = self.config.get('state_store', {})
+        lease_seconds = float(distributed_config.get('lease_seconds', 120))
+        return {
+            'enabled': distributed_config.get('enabled', False),
+            'path': distributed_config.get('path', state_store_config.get('path', 'scraper_state.db')),
+            # WAL روی فایل‌سیستم شبکه‌ای (NFS/SMB) امن نیست
+            'journal_mode': distributed_config.get('journal_mode', 'DELETE'),
+            'node_id': distributed_config.get('node_id') or f"{socket.gethostname()}-{os.getpid()}",
+            'lease_seconds': lease_seconds,
+            'heartbeat_interval': float(distributed_config.get('heartbeat_interval', lease_seconds / 4)),
+            'poll_interval': float(distributed_config.get('poll_interval', 5)),
+            'discover': distributed_config.get('discover', True)
+        }
+
+    def is_distributed(self) -> bool:
+        return bool(self.distributed['enabled'] and self.state_store)
+
+    def claim_urls(self, limit: int, urls: Optional[List[str]] = None) -> List[str]:
+        """
+        گرفتن اجاره تا limit URL از پایگاه داده مشترک (در صورت خطا لیست خالی)
+        """
+        try:
+            return self.state_store.claim(self.distributed['node_id'], self.distributed['lease_seconds'], limit, urls)
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ خطا در گرفتن اجاره URLها: {e}")
+            return []
+
+    def has_leased_work(self) -> bool:
+        """
+        آیا URL pending (قابل برداشت یا در اجاره گره‌های دیگر) باقی مانده است
+        """
+        try:
+            claimable, leased = self.state_store.lease_counts()
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ خطا در خواندن وضعیت اجاره‌ها: {e}")
+            return False
+        return bool(claimable or leased)
+
+    def start_lease_heartbeat(self):
+        if self.is_distributed() and not self.lease_heartbeat:
+            self.lease_heartbeat = LeaseHeartbeat(self, self.distributed)
+            self.lease_heartbeat.start()
+            self.logger.info(f"🌐 حالت توزیع‌شده: گره {self.distributed['node_id']} (اجاره {self.distributed['lease_seconds']:g}s)")
+
+    def stop_lease_heartbeat(self):
+        """
+        توقف heartbeat و آزاد کردن اجاره‌های تمام‌نشده این گره
+        """
+        if not self.lease_heartbeat:
+            return
+        self.lease_heartbeat.stop()
+        self.lease_heartbeat = None
+        try:
+            released = self.state_store.release_leases(self.distributed['node_id'])
+            if released:
+                self.logger.info(f"🔓 {released} اجاره تمام‌نشده آزاد شد")
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️ خطا در آزاد کردن اجاره‌ها: {e}")
+
+    def get_status_counts(self) -> Tuple[int, int]:
+        """
+        تعداد URLهای پردازش شده و ناموفق (از پایگاه داده یا حافظه)
+        """
+        if self.state_store:
+            counts = self.state_store.status_counts()
+            return counts.get('done', 0), counts.get('failed', 0)
+        return len(self.processed_keys), len(self.failed_keys)
+
+    def get_journal_file(self) -> str:
+        """
+        مسیر فایل ژورنال در کنار فایل progress
+        """
+        return os.path.splitext(self.progress_file)[0] + '.journal'
 
     def load_progress(self) -> Dict:
         """
-        بارگذاری وضعیت قبلی کار
+        بارگذاری وضعیت قبلی کار (snapshot + بازپخش ژورنال)
+        """
+        if self.state_store:
+            return self.load_progress_from_store()
+        return self.load_progress_from_files()
+
+    def load_progress_from_files(self) -> Dict:
+        """
+        بارگذاری snapshot فایل progress و بازپخش ژورنال در حافظه
         """
         try:
+            progress_data = {}
             if os.path.exists(self.progress_file):
                 with open(self.progress_file, 'r', encoding='utf-8') as f:
                     progress_data = json.load(f)
                 
-                self.processed_urls = set(progress_data.get('processed_urls', []))
-                self.failed_urls = set(progress_data.get('failed_urls', []))
+                self.processed_keys = self.get_progress_keys(progress_data, 'processed')
+                self.failed_keys = self.get_progress_keys(progress_data, 'failed')
+                self.failed_keys -= self.processed_keys
+                self.total_found_products = progress_data.get('total_found_products', 0)
+                self.incremental_epoch = progress_data.get('incremental_epoch')
+                
+                # بارگذاری محصولات قبلی
+                if progress_data.get('scraped_products'):
+                    self.scraped_products = progress_data['scraped_products']
+            
+            replayed = self.replay_journal()
+            
+            if progress_data or replayed:
+                self.logger.info(f"✅ وضعیت قبلی بارگذاری شد - پردازش شده: {len(self.processed_keys)}, ناموفق: {len(self.failed_keys)}, بازپخش ژورنال: {replayed}")
+            else:
+                self.logger.info("🆕 شروع جدید - فایل progress یافت نشد")
+            return progress_data
+                
+        except Exception as e:
+            self.logger.error(f"❌ خطا در بارگذاری progress: {e}")
+            return {}
+
+    def get_progress_keys(self, progress_data: Dict, status: str) -> set:
+        """
+        کلیدهای یک وضعیت در snapshot؛ فایل‌های قدیمی URL کامل دارند و تبدیل می‌شوند
+        """
+        values = progress_data.get(f'{status}_keys', progress_data.get(f'{status}_urls', []))
+        return {parse_product_key(value) for value in values}
+
+    def load_progress_from_store(self) -> Dict:
+        """
+        وضعیت قبلی از پایگاه داده فقط شمارش می‌شود؛ فیلتر URLها با پرس‌وجو انجام می‌شود
+        """
+        try:
+            counts = self.state_store.status_counts()
+            if not counts and (os.path.exists(self.progress_file) or os.path.exists(self.get_journal_file())):
+                # انتقال یک‌باره وضعیت اجراهای قبلی (snapshot + ژورنال پس از آخرین فشرده‌سازی)
+                self.load_progress_from_files()
+                products = list(self.scraped_products)
+                if self.is_streaming_output() and os.path.exists(self.get_output_filename()):
+                    # در خروجی جریانی محصولات فقط در فایل خروجی هستند
+                    products.extend(self.iter_output_lines(self.get_output_filename()))
+                self.state_store.import_progress(list(self.processed_keys), list(self.failed_keys), products)
+                self.logger.info(f"📦 فایل {self.progress_file} و ژورنال آن به پایگاه داده منتقل شد")
+                self.processed_keys, self.failed_keys, self.scraped_products = set(), set(), []
+                counts = self.state_store.status_counts()
+            
+            processed_count, failed_count = counts.get('done', 0), counts.get('failed', 0)
+            if processed_count or failed_count:
+                self.logger.info(f"✅ وضعیت قبلی از پایگاه داده بارگذاری شد - پردازش شده: {processed_count}, ناموفق: {failed_count}")
+            else:
+                self.logger.info("🆕 شروع جدید - وضعیتی در پایگاه داده یافت نشد")
+            return counts
+        except (sqlite3.Error, OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"❌ خطا در بارگذاری وضعیت از پایگاه داده: {e}")
+            return {}
+
+    def replay_journal(self) -> int:
+        """
+        اعمال رکوردهای ژورنال روی وضعیت بارگذاری‌شده از snapshot
+        """
+        journal_file = self.get_journal_file()
+        if not os.path.exists(journal_file):
+            return 0
+        
+        replayed = 0
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # خط ناقص ناشی از crash در حین نوشتن نادیده گرفته می‌شود
+                    continue
+                self.apply_journal_record(record)
+                replayed += 1
+        
+        self.journal_records = replayed
+        return replayed
+
+    def apply_journal_record(self, record: Dict):
+        """
+        اعمال یک رکورد ژورنال؛ تکرار رکوردهای قبلاً فشرده‌شده بی‌اثر است
+        """
+        value = record.get('key') or record.get('url')
+        if not value:
+            return
+        key = parse_product_key(value)
+        if record.get('status') == 'ok':
+            if key not in self.processed_keys:
+                self.processed_keys.add(key)
+                if record.get('product'):
+                    self.scraped_products.append(record['product'])
+            self.failed_keys.discard(key)
+        else:
+            if key not in self.processed_keys:
+                self.failed_keys.add(key)
+
+    def append_journal(self, url: str, success: bool, product_data: Optional[Dict] = None):
+        """
+        افزودن یک رکورد به ژورنال با هزینه ثابت و فشرده‌سازی دوره‌ای
+        """
+        record = {
+            'key': product_key(url).hex(),
+            'status': 'ok' if success else 'failed',
+            'timestamp': time.time()
+        }
+        if success and product_data:
+            record['product'] = product_data
+        
+        with self.journal_lock, self.timed_phase('checkpoint'):
+            try:
+                if self.journal_handle is None:
+                    self.journal_handle = open(self.get_journal_file(), 'a', encoding='utf-8')
+                self.journal_handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self.journal_handle.flush()
+                self.journal_records += 1
+            except Exception as e:
+                self.logger.error(f"❌ خطا در نوشتن ژورنال: {e}")
+                return
+        
+        if self.should_compact_journal():
+            self.save_progress()
+
+    def checkpoint_result(self, url: str, success: bool, product_data: Optional[Dict] = None, error: Optional[str] = None):
+        """
+        ثبت پایدار نتیجه یک URL در پایگاه داده یا ژورنال
+        """
+        if not self.state_store:
+            self.append_journal(url, success, product_data)
+            return
+        with self.timed_phase('checkpoint'):
+            try:
+                self.state_store.record_result(url, success, product_data, error)
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در ثبت نتیجه در پایگاه داده: {e}")
+
+    def should_compact_journal(self) -> bool:
+        """
+        فشرده‌سازی وقتی ژورنال نسبت به snapshot بزرگ شده باشد (هزینه سرشکن ثابت)
+        """
+        interval = self.config.get('performance', {}).get('checkpoint_interval', 500)
+        snapshot_size = len(self.processed_keys) + len(self.failed_keys) - self.journal_records
+        return self.journal_records >= max(interval, snapshot_size // 2)
+
+    def save_progress(self, all_product_links: List[str] = None):
+        """
+        فشرده‌سازی وضعیت فعلی در snapshot با rename اتمیک و خالی کردن ژورنال
+        """
+        if all_product_links:
+            self.total_found_products = len(all_product_links)
+        
+        if self.state_store:
+            # هر نتیجه در لحظه ثبت شده است؛ فقط WAL به فایل اصلی منتقل می‌شود
+            try:
+                self.state_store.checkpoint()
+                self.logger.info(f"💾 وضعیت در پایگاه داده ذخیره شد - پردازش شده: {self.get_status_counts()[0]}")
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در ذخیره progress: {e}")
+            return
+        
+        with self.journal_lock, self.timed_phase('checkpoint'):
+            try:
+                progress_data = {
+                    'processed_keys': [key.hex() for key in self.processed_keys],
+                    'failed_keys': [key.hex() for key in self.failed_keys],
+                    'scraped_products': self.scraped_products,
+                    'total_found_products': self.total_found_products,
+                    'incremental_epoch': self.incremental_epoch,
+                    'timestamp': time.time()
+                }
                 
-                # بارگذاری محصولات قبلی
-                if progress_data.get('scraped_products'):
-                    self.scraped_products = progress_data['scraped_products']
+                temp_file = f'{self.progress_file}.{os.getpid()}.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(progress_data, f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.progress_file)
                 
-                self.logger.info(f"✅ وضعیت قبلی بارگذاری شد - پردازش شده: {len(self.processed_urls)}, ناموفق: {len(self.failed_urls)}")
-                return progress_data
-            else:
-                self.logger.info("🆕 شروع جدید - فایل progress یافت نشد")
-                return {}
+                # رکوردهای ژورنال اکنون در snapshot هستند
+                if self.journal_handle is not None:
+                    self.journal_handle.close()
+                self.journal_handle = open(self.get_journal_file(), 'w', encoding='utf-8')
+                self.journal_records = 0
+                    
+                self.logger.info(f"💾 وضعیت ذخیره شد - پردازش شده: {len(self.processed_keys)}")
                 
-        except Exception as e:
-            self.logger.error(f"❌ خطا در بارگذاری progress: {e}")
-            return {}
-    
-    def save_progress(self, all_product_links: List[str] = None):
+            except Exception as e:
+                self.logger.error(f"❌ خطا در ذخیره progress: {e}")
+
+    def close_journal(self):
         """
-        ذخیره وضعیت فعلی کار
+        بستن فایل ژورنال
         """
-        try:
-            progress_data = {
-                'processed_urls': list(self.processed_urls),
-                'failed_urls': list(self.failed_urls),
-                'scraped_products': self.scraped_products,
-                'total_found_products': len(all_product_links) if all_product_links else 0,
-                'timestamp': time.time()
-            }
-            
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
-                
-            self.logger.info(f"💾 وضعیت ذخیره شد - پردازش شده: {len(self.processed_urls)}")
-            
-        except Exception as e:
-            self.logger.error(f"❌ خطا در ذخیره progress: {e}")
+        with self.journal_lock:
+            if self.journal_handle is not None:
+                self.journal_handle.close()
+                self.journal_handle = None
     
     def get_remaining_urls(self, all_product_links: List[str]) -> List[str]:
         """
         دریافت URLهای باقی‌مانده برای پردازش
         """
-        remaining_urls = []
-        for url in all_product_links:
-            if url not in self.processed_urls and url not in self.failed_urls:
-                remaining_urls.append(url)
+        remaining_urls = self.filter_remaining_urls(all_product_links)
         
         self.logger.info(f"📋 تعداد محصولات باقی‌مانده: {len(remaining_urls)} از {len(all_product_links)}")
         return remaining_urls
     
-    def extract_product_data_with_progress(self, product_url: str) -> Optional[Dict]:
+    def filter_remaining_urls(self, product_links: List[str]) -> List[str]:
         """
-        استخراج اطلاعات محصول با ذخیره خودکار progress
+        حذف URLهای تکراری (با کلید محصول) و پردازش شده یا ناموفق با حفظ ترتیب
         """
-        try:
-            product_data = self.extract_product_data(product_url)
-            
-            if product_data and product_data.get('title'):
-                self.processed_urls.add(product_url)
-                self.logger.info(f"✅ محصول موفق: {product_url}")
-                return product_data
-            else:
-                self.failed_urls.add(product_url)
-                self.logger.warning(f"❌ محصول ناموفق: {product_url}")
-                return None
-                
-        except Exception as e:
-            self.failed_urls.add(product_url)
-            self.logger.error(f"❌ خطا در استخراج {product_url}: {e}")
-            return None
-        finally:
-            # ذخیره progress بعد از هر محصول
-            self.save_progress()
-    
+        unique_links = []
+        seen_keys = set()
+        for url in product_links:
+            key = product_key(url)
+            if key not in seen_keys:
+                seen_keys.add(key)
+                unique_links.append((key, url))
+        
+        if self.state_store:
+            try:
+                return self.state_store.filter_remaining([url for _, url in unique_links])
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در پرس‌وجوی URLهای باقی‌مانده: {e}")
+        return [
+            url for key, url in unique_links
+            if key not in self.processed_keys and key not in self.failed_keys
+        ]
+
     def cleanup_with_progress_save(self, all_product_links: List[str] = None):
         """
         تمیز کردن منابع با ذخیره نهایی progress
@@ -141,11 +2188,21 @@ class ProductScraper:
             # ذخیره نهایی محصولات
             self.save_data()
             
+            if self.is_incremental():
+                self.save_fingerprints()
+            
+            self.save_dead_letters()
+            
         except Exception as e:
             self.logger.error(f"❌ خطا در cleanup: {e}")
         finally:
+            self.close_journal()
+            if self.html_archive:
+                self.html_archive.close()
+            if self.state_store:
+                self.state_store.close()
             if self.driver:
-                self.driver.quit()
+                self.quit_driver(self.driver)
                 self.logger.info("🔒 مرورگر بسته شد")
     
     def show_resume_status(self, all_product_links: List[str]):
@@ -153,8 +2210,7 @@ class ProductScraper:
         نمایش وضعیت Resume
         """
         total_products = len(all_product_links)
-        processed_count = len(self.processed_urls)
-        failed_count = len(self.failed_urls)
+        processed_count, failed_count = self.get_status_counts()
         remaining_count = total_products - processed_count - failed_count
         
         if processed_count > 0 or failed_count > 0:
@@ -167,121 +2223,641 @@ class ProductScraper:
         else:
             print(f"\n🆕 شروع جدید - {total_products} محصول برای پردازش")
     
-    def process_single_product_thread_with_progress(self, product_url: str, tab_handle: str, thread_id: int, results_queue):
+    def process_product_in_worker(self, product_url: str, worker_id: int) -> Dict:
         """
-        پردازش محصول در thread با progress
+        استخراج یک محصول در کارگر مستقل؛ وضعیت فقط در جمع‌کننده به‌روزرسانی می‌شود
         """
+        probe = None
+        reused = False
+        error = None
+        error_class = None
+        exception = None
+        start = time.perf_counter()
+        _worker_state.product_phases = {}
+        _worker_state.product_blocked = None
+        if self.tracer:
+            self.tracer.begin_product(product_url)
         try:
-            time.sleep(thread_id * 0.5)
-            self.driver.switch_to.window(tab_handle)
-            
-            self.logger.info(f"📊 Thread {thread_id}: شروع استخراج {product_url}")
-            product_data = self.extract_product_data_in_tab(product_url, tab_handle)
-            
-            # به‌روزرسانی وضعیت
-            if product_data and product_data.get('title'):
-                self.processed_urls.add(product_url)
-                success = True
+            self.logger.info(f"📊 Worker {worker_id}: شروع استخراج {product_url}")
+            if self.is_incremental():
+                probe = self.probe_product_changes(product_url)
+            if probe and probe['unchanged']:
+                product_data = self.fingerprints[product_key(product_url).hex()]['record']
+                reused = True
+                self.logger.info(f"♻️ Worker {worker_id}: بدون تغییر، استفاده از رکورد قبلی {product_url}")
             else:
-                self.failed_urls.add(product_url)
-                success = False
-            
-            results_queue.put({
-                'thread_id': thread_id,
-                'product_data': product_data,
-                'success': success,
-                'url': product_url
-            })
-            
-            self.logger.info(f"✅ Thread {thread_id}: تکمیل شد")
-            
+                product_data = self.fetch_product(product_url, html=probe['html'] if probe else None)
+            success = bool(product_data and product_data.get('title'))
+            if not success:
+                if product_data and not reused:
+                    self.detect_blocked_page()
+                if _worker_state.product_blocked:
+                    # صفحه مسدودشده معمولاً در تلاش بعدی (با فاصله بیشتر) کامل است
+                    error = f"blocked ({_worker_state.product_blocked})"
+                    error_class = 'transient'
+                else:
+                    # صفحه بارگذاری‌شده بدون عنوان (محصول حذف‌شده یا 404) با تلاش مجدد درست نمی‌شود
+                    error = 'missing title' if product_data else 'no product data'
+                    error_class = 'permanent'
+            self.logger.info(f"✅ Worker {worker_id}: تکمیل شد")
         except Exception as e:
-            self.failed_urls.add(product_url)
-            self.logger.error(f"❌ Thread {thread_id} خطا: {e}")
-            results_queue.put({
-                'thread_id': thread_id,
-                'product_data': None,
-                'success': False,
-                'url': product_url
-            })
-    
-    def run_parallel_with_resume(self):
+            self.logger.error(f"❌ Worker {worker_id} خطا: {e}")
+            product_data = None
+            success = False
+            error = f"{type(e).__name__}: {e}"
+            error_class = self.classify_error(e)
+            exception = type(e)
+        if self.tracer:
+            self.tracer.end_product()
+        product_phases = _worker_state.product_phases
+        blocked = _worker_state.product_blocked
+        _worker_state.product_phases = None
+        _worker_state.product_blocked = None
+        if blocked:
+            REGISTRY.inc('scraper_blocked_pages_total', shop=self.shop_name)
+
+        return {
+            'worker_id': worker_id,
+            'product_data': product_data,
+            'success': success,
+            'url': product_url,
+            'reused': reused,
+            'error': error,
+            'error_class': error_class,
+            'exception': exception,
+            'blocked': blocked,
+            'elapsed': time.perf_counter() - start,
+            # زمان بارگذاری صفحه (یا دریافت HTTP در مسیر سریع) بدون انتظار HostPacer
+            'navigation': product_phases.get('navigation', product_phases.get('http_fetch')),
+            'fingerprint': {key: value for key, value in probe.items() if key not in ('html', 'unchanged')} if probe else None
+        }
+
+    def fetch_product(self, product_url: str, html: Optional[str] = None) -> Optional[Dict]:
         """
-        اجرای موازی با قابلیت Resume
+        استخراج محصول: ابتدا مسیر HTTP (در صورت فعال بودن) و در صورت نقص، سلنیوم
         """
+        if self.config.get('http_fetch', {}).get('enabled', False):
+            product_data = self.extract_product_data_via_http(product_url, html=html)
+            if product_data:
+                return product_data
         try:
-            print("🚀 شروع اجرای ربات اسکرپینگ موازی با Resume...")
-            
-            # بارگذاری وضعیت قبلی
-            self.load_progress()
-            
-            # راه‌اندازی driver
-            self.setup_driver()
-            
-            # دریافت لینک محصولات
-            all_product_links = self.extract_product_links()
-            if not all_product_links:
-                self.logger.error("❌ هیچ لینک محصولی یافت نشد")
+            return self.extract_product_data_in_tab(product_url)
+        finally:
+            self.collect_blocking_stats()
+
+    def get_http_pool(self) -> urllib3.PoolManager:
+        """
+        PoolManager مشترک بین کارگرها با اتصال‌های keep-alive
+        """
+        with self.http_pool_lock:
+            if self.http_pool is None:
+                http_config = self.config.get('http_fetch', {})
+                timeout = http_config.get('timeout', 10)
+                self.http_pool = urllib3.PoolManager(
+                    num_pools=4,
+                    maxsize=http_config.get('pool_size', self.get_concurrency()),
+                    block=False,
+                    timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                    retries=urllib3.Retry(total=http_config.get('retries', 1), backoff_factor=0.5, redirect=3),
+                    headers={
+                        'User-Agent': self.get_random_user_agent(),
+                        'Accept': 'text/html,application/xhtml+xml',
+                        'Accept-Language': 'fa-IR,fa;q=0.9,en;q=0.8'
+                    }
+                )
+            return self.http_pool
+
+    def mark_blocked_response(self, status: int):
+        """
+        ثبت پاسخ 403/429 به عنوان صفحه مسدود برای محصول جاری کارگر
+        """
+        if status in BLOCKED_HTTP_STATUSES:
+            _worker_state.product_blocked = f'HTTP {status}'
+
+    def detect_blocked_page(self):
+        """
+        بررسی صفحه بارگذاری‌شده در مرورگر برای captcha یا پیام مسدودسازی
+        """
+        if self.driver is None:
+            return
+        markers = self.controller.settings['blocked_markers'] if self.controller else DEFAULT_BLOCKED_PAGE_MARKERS
+        try:
+            marker = self.driver.execute_script(BLOCKED_PAGE_SCRIPT, markers, BLOCKED_PAGE_SELECTOR)
+        except WebDriverException as e:
+            self.logger.debug(f"خطا در بررسی صفحه مسدود: {e}")
+            return
+        if marker:
+            self.logger.warning(f"🚧 صفحه مسدود یا captcha ({marker}) در {self.driver.current_url}")
+            _worker_state.product_blocked = marker
+
+    def fetch_product_html(self, product_url: str) -> Optional[str]:
+        """
+        دریافت HTML صفحه محصول از طریق urllib3
+        """
+        self.pace_host(product_url)
+        try:
+            with self.timed_phase('http_fetch'):
+                response = self.get_http_pool().request('GET', product_url)
+        except Exception as e:
+            self.logger.warning(f"⚠️ خطا در دریافت HTTP {product_url}: {e}")
+            return None
+        if response.status != 200:
+            self.logger.warning(f"⚠️ پاسخ HTTP {response.status} برای {product_url}")
+            self.mark_blocked_response(response.status)
+            return None
+        charset = 'utf-8'
+        content_type = response.headers.get('Content-Type', '')
+        if 'charset=' in content_type:
+            charset = content_type.split('charset=')[-1].split(';')[0].strip() or charset
+        return response.data.decode(charset, errors='replace')
+
+    def has_required_fields(self, product_data: Dict) -> bool:
+        """
+        بررسی وجود فیلدهای الزامی http_fetch.required_fields
+        """
+        required_fields = self.config.get('http_fetch', {}).get('required_fields', ['title', 'categories'])
+        for field in required_fields:
+            if field not in self.extraction_fields:
+                # فیلد خارج از پروفایل استخراج جمع‌آوری نمی‌شود
+                continue
+            if field == 'specifications':
+                specs = product_data.get('specifications', {})
+                if not specs.get('key_specs') and not specs.get('general_specs'):
+                    return False
+            elif not product_data.get(field):
+                return False
+        return True
+
+    def extract_product_data_via_http(self, product_url: str, html: Optional[str] = None) -> Optional[Dict]:
+        """
+        استخراج product_data از HTML سمت سرور؛ اگر فیلد الزامی کم باشد None
+        """
+        if html is None:
+            html = self.fetch_product_html(product_url)
+        if not html:
+            return None
+        try:
+            product_data = extract_product_from_html(html, product_url, self.config['selectors'], self.extraction_fields)
+        except Exception as e:
+            self.logger.warning(f"⚠️ خطا در تجزیه HTML {product_url}: {e}")
+            return None
+        
+        if not self.has_required_fields(product_data):
+            self.logger.info(f"🔄 فیلدهای الزامی در HTML نبود، استفاده از سلنیوم: {product_url}")
+            return None
+        self.archive_page(product_url, html)
+        self.logger.info(f"⚡ استخراج HTTP موفق: {product_data['title']}")
+        return product_data
+
+    def archive_page(self, product_url: str, html: Optional[str] = None):
+        """
+        ذخیره HTML صفحه (یا page_source درایور) در آرشیو فشرده در صورت فعال بودن archive.enabled
+        """
+        if not self.html_archive:
+            return
+        try:
+            with self.timed_phase('archive'):
+                if html is None:
+                    html = self.driver.page_source
+                self.html_archive.put(self.shop_name, product_key(product_url).hex(), product_url, html)
+        except (OSError, WebDriverException) as e:
+            self.logger.warning(f"⚠️ خطا در آرشیو HTML {product_url}: {e}")
+
+    def is_incremental(self) -> bool:
+        return self.config.get('incremental', {}).get('enabled', False)
+
+    def get_fingerprint_file(self) -> str:
+        """
+        مسیر فایل اثرانگشت‌ها (incremental.state_file)
+        """
+        return self.config.get('incremental', {}).get('state_file', f"scraper_fingerprints{self.state_suffix}.json")
+
+    def load_fingerprints(self):
+        """
+        بارگذاری اثرانگشت و رکورد محصولات از اجرای قبلی
+        (در حالت توزیع‌شده از جدول fingerprints پایگاه داده مشترک)
+        """
+        fingerprint_file = self.get_fingerprint_file()
+        if self.is_distributed():
+            self.load_fingerprints_from_store(fingerprint_file)
+            return
+        if not os.path.exists(fingerprint_file):
+            self.logger.info("🆕 حالت افزایشی: اثرانگشت قبلی یافت نشد، خزش کامل انجام می‌شود")
+            return
+        try:
+            with open(fingerprint_file, 'r', encoding='utf-8') as f:
+                # فایل‌های قدیمی با URL کلید خورده‌اند
+                self.fingerprints = {parse_product_key(value).hex(): entry for value, entry in json.load(f).items()}
+            self.logger.info(f"✅ حالت افزایشی: {len(self.fingerprints)} اثرانگشت بارگذاری شد")
+        except Exception as e:
+            self.logger.error(f"❌ خطا در بارگذاری اثرانگشت‌ها: {e}")
+            self.fingerprints = {}
+
+    def load_fingerprints_from_store(self, fingerprint_file: str):
+        """
+        خواندن اثرانگشت‌ها از پایگاه داده مشترک؛ فایل اثرانگشت موجود یک بار به جدول منتقل می‌شود
+        """
+        try:
+            if os.path.exists(fingerprint_file):
+                with open(fingerprint_file, 'r', encoding='utf-8') as f:
+                    entries = {parse_product_key(value): entry for value, entry in json.load(f).items()}
+                # رکوردهای ثبت‌شده توسط گره‌های دیگر بازنویسی نمی‌شوند
+                self.state_store.put_records('fingerprints', entries, replace=False)
+            self.fingerprints = {key.hex(): entry for key, entry in self.state_store.iter_records('fingerprints')}
+            self.logger.info(f"✅ حالت افزایشی: {len(self.fingerprints)} اثرانگشت از پایگاه داده بارگذاری شد")
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.logger.error(f"❌ خطا در بارگذاری اثرانگشت‌ها: {e}")
+            self.fingerprints = {}
+
+    def start_incremental_epoch(self):
+        """
+        شروع دور جدید افزایشی: محصولات دارای اثرانگشت دوباره واجد پردازش می‌شوند
+        تا probe درباره استفاده دوباره از رکورد قبلی یا استخراج مجدد تصمیم بگیرد؛
+        اگر دور قبلی کامل نشده (crash یا گره دیگری هنوز در حال کار است) همان دور ادامه می‌یابد
+        """
+        refresh_keys = {bytes.fromhex(key) for key in self.fingerprints}
+        if self.state_store:
+            try:
+                epoch, refreshed = self.state_store.begin_epoch(refresh_keys)
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در شروع دور افزایشی: {e}")
                 return
-            
-            # نمایش وضعیت Resume
-            self.show_resume_status(all_product_links)
-            
-            # دریافت محصولات باقی‌مانده
-            remaining_product_links = self.get_remaining_urls(all_product_links)
-            
-            if not remaining_product_links:
-                print("🎉 همه محصولات قبلاً پردازش شده‌اند!")
-                self.save_data()
+            self.incremental_epoch = {'id': epoch, 'completed': False}
+            if refreshed is None:
+                self.logger.info(f"🔄 حالت افزایشی: ادامه دور ناتمام {epoch}")
                 return
-            
-            # ادامه پردازش موازی
-            num_tabs = 2
-            tab_handles = self.setup_multiple_tabs(num_tabs)
-            
-            for batch_start in range(0, len(remaining_product_links), num_tabs):
-                batch_end = min(batch_start + num_tabs, len(remaining_product_links))
-                current_batch = remaining_product_links[batch_start:batch_end]
-                
-                print(f"\n📦 پردازش batch: محصولات {batch_start + 1} تا {batch_end} از {len(remaining_product_links)} باقی‌مانده")
-                
-                results_queue = queue.Queue()
-                threads = []
-                
-                for i, product_url in enumerate(current_batch):
-                    if i < len(tab_handles):
-                        thread = threading.Thread(
-                            target=self.process_single_product_thread_with_progress,
-                            args=(product_url, tab_handles[i], i+1, results_queue)
-                        )
-                        thread.daemon = True
-                        thread.start()
-                        threads.append(thread)
-                
-                for thread in threads:
-                    thread.join()
-                
-                # جمع‌آوری نتایج
-                while not results_queue.empty():
-                    result = results_queue.get()
-                    if result['success'] and result['product_data']:
-                        self.scraped_products.append(result['product_data'])
-                
-                # ذخیره progress بعد از هر batch
-                self.save_progress(all_product_links)
-                
-                if batch_end < len(remaining_product_links):
-                    time.sleep(random.uniform(3, 5))
-            
-            print("\n🎉 تمام محصولات با موفقیت پردازش شدند!")
-            
-        except KeyboardInterrupt:
-            print(f"\n⏹️ ربات متوقف شد - وضعیت ذخیره شد")
-            self.logger.info("⏹️ ربات توسط کاربر متوقف شد")
+        else:
+            previous = self.incremental_epoch
+            if previous and not previous.get('completed'):
+                self.logger.info(f"🔄 حالت افزایشی: ادامه دور ناتمام {previous['id']}")
+                return
+            epoch = (previous['id'] if previous else 0) + 1
+            self.incremental_epoch = {'id': epoch, 'started_at': time.time(), 'completed': False}
+            refreshed = len(self.processed_keys & refresh_keys)
+            self.processed_keys -= refresh_keys
+            # رکورد این محصولات پس از probe دوباره نوشته می‌شود
+            self.scraped_products = [
+                product for product in self.scraped_products
+                if product_key(product.get('url') or '') not in refresh_keys
+            ]
+            # snapshot تازه (با دور باز) تا ژورنال اجرای قبلی دوباره پخش نشود
+            self.save_progress()
+        self.refresh_keys = refresh_keys
+        self.logger.info(f"🔄 حالت افزایشی: دور {epoch} - {refreshed} محصول قبلی برای بررسی تغییرات دوباره در صف قرار گرفت")
+
+    def complete_incremental_epoch(self):
+        """
+        ثبت پایان دور جاری پس از پردازش همه URLها تا اجرای بعدی دور تازه‌ای شروع کند
+        """
+        if not self.incremental_epoch or self.incremental_epoch['completed']:
+            return
+        self.incremental_epoch['completed'] = True
+        if self.state_store:
+            try:
+                self.state_store.complete_epoch(self.incremental_epoch['id'])
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در ثبت پایان دور افزایشی: {e}")
+
+    def save_fingerprints(self):
+        """
+        ذخیره اتمیک اثرانگشت‌ها برای اجرای بعدی
+        (در حالت توزیع‌شده خروجی از جدول fingerprints تا اثرانگشت‌های همه گره‌ها حفظ شوند)
+        """
+        try:
+            fingerprints = self.fingerprints
+            if self.is_distributed():
+                fingerprints = {key.hex(): entry for key, entry in self.state_store.iter_records('fingerprints')}
+            temp_file = f'{self.get_fingerprint_file()}.{os.getpid()}.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(fingerprints, f, ensure_ascii=False)
+            os.replace(temp_file, self.get_fingerprint_file())
+            self.logger.info(f"💾 {len(self.fingerprints)} اثرانگشت ذخیره شد (بدون تغییر: {self.reused_products})")
+        except Exception as e:
+            self.logger.error(f"❌ خطا در ذخیره اثرانگشت‌ها: {e}")
+
+    def compute_content_hash(self, product_data: Dict) -> str:
+        """
+        هش محتوای عنوان، دسته‌بندی، برند و مشخصات
+        """
+        content = {
+            'title': product_data.get('title'),
+            'categories': product_data.get('categories'),
+            'brand': product_data.get('brand'),
+            'specifications': product_data.get('specifications')
+        }
+        return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def probe_product_changes(self, product_url: str) -> Optional[Dict]:
+        """
+        درخواست شرطی (ETag/Last-Modified) برای محصولات دارای رکورد قبلی؛ محصول جدید probe نمی‌شود.
+        با http_fetch فعال GET و مقایسه هش محتوا (HTML همان در مسیر HTTP استفاده می‌شود)،
+        در غیر این صورت فقط HEAD و مقایسه ETag/Last-Modified تا صفحه دو بار دانلود نشود
+        """
+        previous = self.fingerprints.get(product_key(product_url).hex())
+        if not previous or not previous.get('record'):
+            return None
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+        fetch_body = self.config.get('http_fetch', {}).get('enabled', False)
+        
+        self.pace_host(product_url)
+        try:
+            with self.timed_phase('http_fetch'):
+                response = self.get_http_pool().request('GET' if fetch_body else 'HEAD', product_url, headers=headers)
+        except Exception as e:
+            self.logger.warning(f"⚠️ خطا در بررسی تغییرات {product_url}: {e}")
+            return None
+        
+        probe = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': None,
+            'html': None,
+            'unchanged': False
+        }
+        if response.status == 304:
+            probe.update(etag=probe['etag'] or previous.get('etag'),
+                         last_modified=probe['last_modified'] or previous.get('last_modified'),
+                         content_hash=previous.get('content_hash'), unchanged=True)
+            return probe
+        if response.status != 200:
+            self.mark_blocked_response(response.status)
+            return None
+        if not fetch_body:
+            # سرورهایی که HEAD شرطی را با 200 پاسخ می‌دهند: مقایسه مستقیم اعتبارسنج‌ها
+            if probe['etag']:
+                probe['unchanged'] = probe['etag'] == previous.get('etag')
+            elif probe['last_modified']:
+                probe['unchanged'] = probe['last_modified'] == previous.get('last_modified')
+            if probe['unchanged']:
+                probe['content_hash'] = previous.get('content_hash')
+            return probe
+        
+        charset = 'utf-8'
+        content_type = response.headers.get('Content-Type', '')
+        if 'charset=' in content_type:
+            charset = content_type.split('charset=')[-1].split(';')[0].strip() or charset
+        probe['html'] = response.data.decode(charset, errors='replace')
+        try:
+            static_data = extract_product_from_html(probe['html'], product_url, self.config['selectors'], self.extraction_fields)
+            probe['content_hash'] = self.compute_content_hash(static_data)
+        except Exception:
+            return probe
+        # هش بدون عنوان اثبات عدم تغییر نیست (صفحه خطا یا سلکتور خراب)
+        probe['unchanged'] = bool(static_data.get('title') and previous.get('content_hash') == probe['content_hash'])
+        return probe
+
+    def update_fingerprint(self, product_url: str, fingerprint: Optional[Dict], product_data: Dict):
+        """
+        ثبت اثرانگشت و رکورد جدید یک محصول موفق
+        """
+        entry = {
+            'etag': None,
+            'last_modified': None,
+            'content_hash': None,
+            'record': product_data,
+            'checked_at': time.time()
+        }
+        if fingerprint:
+            entry.update(fingerprint)
+        if not entry['content_hash']:
+            # بدون HTML در probe (محصول جدید یا probe با HEAD) هش از داده استخراج‌شده گرفته می‌شود
+            entry['content_hash'] = self.compute_content_hash(product_data)
+        key = product_key(product_url)
+        self.fingerprints[key.hex()] = entry
+        if self.is_distributed():
+            try:
+                self.state_store.put_records('fingerprints', {key: entry})
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در ثبت اثرانگشت در پایگاه داده: {e}")
+
+    def collect_result(self, result: Dict):
+        """
+        جمع‌آوری نتیجه یک کارگر و به‌روزرسانی وضعیت Resume
+        """
+        key = product_key(result['url'])
+        if result['success'] and result['product_data']:
+            REGISTRY.inc('scraper_products_total', shop=self.shop_name, status='reused' if result.get('reused') else 'ok')
+            self.processed_keys.add(key)
+            if self.is_streaming_output():
+                # محصول فقط در فایل خروجی نگه داشته می‌شود، نه در حافظه یا ژورنال
+                self.append_output(result['product_data'])
+            if self.state_store:
+                # محصولات در جدول products می‌مانند و هنگام ذخیره خروجی گرفته می‌شوند
+                self.checkpoint_result(result['url'], True, result['product_data'])
+            elif self.is_streaming_output():
+                self.append_journal(result['url'], True)
+            else:
+                self.scraped_products.append(result['product_data'])
+                self.append_journal(result['url'], True, result['product_data'])
+            if self.is_incremental():
+                self.update_fingerprint(result['url'], result.get('fingerprint'), result['product_data'])
+                if result.get('reused'):
+                    self.reused_products += 1
+        else:
+            REGISTRY.inc('scraper_products_total', shop=self.shop_name, status='failed')
+            self.failed_keys.add(key)
+            self.checkpoint_result(result['url'], False, error=result.get('error'))
+            self.dead_letters.append({
+                'key': key.hex(),
+                'url': result['url'],
+                'attempts': result.get('attempts', 1),
+                'error': result.get('error'),
+                'error_class': result.get('error_class'),
+                'timestamp': time.time()
+            })
+
+    def classify_error(self, error: Exception) -> str:
+        """
+        دسته‌بندی خطا: transient (قابل تلاش مجدد) یا permanent
+        """
+        if isinstance(error, PERMANENT_ERRORS):
+            return 'permanent'
+        return 'transient' if isinstance(error, TRANSIENT_ERRORS) else 'permanent'
+
+    def get_retry_config(self) -> Dict:
+        """
+        تنظیمات تلاش مجدد از performance (retry_attempts، retry_backoff، retry_backoff_max)
+        """
+        performance = self.config.get('performance', {})
+        return {
+            'attempts': max(0, int(performance.get('retry_attempts', 3))),
+            'backoff': float(performance.get('retry_backoff', 10)),
+            'backoff_max': float(performance.get('retry_backoff_max', 300))
+        }
+
+    def plan_retry(self, result: Dict) -> Optional[float]:
+        """
+        ثبت تلاش ناموفق و محاسبه تاخیر تلاش مجدد (backoff نمایی با jitter)؛
+        None یعنی نتیجه نهایی است و باید جمع‌آوری شود
+        """
+        if result['success'] and result['product_data']:
+            return None
+        key = product_key(result['url'])
+        self.attempts[key] += 1
+        result['attempts'] = self.attempts[key]
+        retry_config = self.get_retry_config()
+        if result.get('error_class') != 'transient' or self.attempts[key] > retry_config['attempts']:
+            return None
+        
+        delay = min(retry_config['backoff_max'], retry_config['backoff'] * 2 ** (self.attempts[key] - 1))
+        REGISTRY.inc('scraper_retries_total', shop=self.shop_name)
+        if self.state_store:
+            try:
+                self.state_store.record_attempt(result['url'], result.get('error'))
+            except sqlite3.Error as e:
+                self.logger.error(f"❌ خطا در ثبت تلاش در پایگاه داده: {e}")
+        return delay * random.uniform(0.5, 1.5)
+
+    def get_dead_letter_file(self) -> str:
+        return self.config.get('dead_letter_file', f"scraper_dead_letters{self.state_suffix}.json")
+
+    def save_dead_letters(self):
+        """
+        افزودن شکست‌های قطعی این اجرا به فایل dead-letter (اتمیک)
+        """
+        if not self.dead_letters:
+            return
+        try:
+            dead_letter_file = self.get_dead_letter_file()
+            entries = {}
+            if os.path.exists(dead_letter_file):
+                with open(dead_letter_file, 'r', encoding='utf-8') as f:
+                    entries = {entry['key']: entry for entry in json.load(f)}
+            entries.update((entry['key'], entry) for entry in self.dead_letters)
+            if self.is_distributed():
+                # فایل مشترک فقط از جدول dead_letters نوشته می‌شود تا شکست‌های گره‌های دیگر گم نشوند
+                self.state_store.put_records('dead_letters', {bytes.fromhex(entry['key']): entry for entry in self.dead_letters})
+                self.state_store.put_records('dead_letters', {bytes.fromhex(key): entry for key, entry in entries.items()}, replace=False)
+                entries = {key.hex(): entry for key, entry in self.state_store.iter_records('dead_letters')}
+            
+            temp_file = f'{dead_letter_file}.{os.getpid()}.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(list(entries.values()), f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, dead_letter_file)
+            self.logger.info(f"📮 {len(self.dead_letters)} محصول ناموفق در {dead_letter_file} ثبت شد")
+        except Exception as e:
+            self.logger.error(f"❌ خطا در ذخیره فهرست ناموفق‌ها: {e}")
+
+    def get_worker_delay(self) -> float:
+        """
+        فاصله تصادفی هر کارگر بین دو محصول از performance.worker_delay_range؛
+        در حالت تطبیقی فاصله فقط با HostPacer کنترل می‌شود
+        """
+        if self.controller:
+            return 0.0
+        delay_range = self.config.get('performance', {}).get('worker_delay_range', [3, 5])
+        try:
+            min_delay, max_delay = float(delay_range[0]), float(delay_range[1])
+        except (TypeError, ValueError, IndexError):
+            min_delay, max_delay = 3.0, 5.0
+        return random.uniform(min_delay, max(min_delay, max_delay))
+
+    def get_adaptive_config(self) -> Dict:
+        """
+        محدوده‌ها و آستانه‌های کنترل‌کننده تطبیقی از بخش adaptive
+        """
+        adaptive = self.config.get('adaptive', {})
+        concurrency = self.get_concurrency()
+        max_workers = max(1, int(adaptive.get('max_workers', max(concurrency, 4))))
+        min_workers = min(max_workers, max(1, int(adaptive.get('min_workers', 1))))
+        return {
+            'enabled': adaptive.get('enabled', False),
+            'min_workers': min_workers,
+            'max_workers': max_workers,
+            'initial_workers': min(max_workers, max(min_workers, concurrency)),
+            'min_interval': float(adaptive.get('min_interval', 0)),
+            'max_interval': float(adaptive.get('max_interval', 10)),
+            'interval_step': float(adaptive.get('interval_step', 0.5)),
+            'backoff_cooldown': float(adaptive.get('backoff_cooldown', 30)),
+            'latency_target': float(adaptive.get('latency_target', 10)),
+            'max_timeout_rate': float(adaptive.get('max_timeout_rate', 0.1)),
+            'max_error_rate': float(adaptive.get('max_error_rate', 0.25)),
+            'max_blocked_rate': float(adaptive.get('max_blocked_rate', 0)),
+            'blocked_markers': [marker.lower() for marker in adaptive.get('blocked_markers', DEFAULT_BLOCKED_PAGE_MARKERS)],
+            'window': max(1, int(adaptive.get('window', 10)))
+        }
+
+    def get_max_concurrency(self) -> int:
+        """
+        بیشینه کارگرهای لازم: سقف کنترل‌کننده تطبیقی یا concurrent_tabs
+        """
+        if self.controller:
+            return self.controller.settings['max_workers']
+        return self.get_concurrency()
+
+    def get_concurrency(self) -> int:
+        """
+        تعداد کارگرهای موازی از تنظیمات performance.concurrent_tabs
+        """
+        try:
+            return max(1, int(self.config.get('performance', {}).get('concurrent_tabs', 2)))
+        except (TypeError, ValueError):
+            return 2
+
+    def discover_remaining_urls(self) -> List[str]:
+        """
+        استخراج لینک محصولات فروشگاه و فیلتر بر اساس وضعیت Resume
+        """
+        # دریافت لینک محصولات
+        with self.timed_phase('listing'):
+            all_product_links = self.extract_product_links()
+        self.collect_blocking_stats()
+        if not all_product_links:
+            self.logger.error(f"❌ هیچ لینک محصولی یافت نشد ({self.shop_name})")
+            return []
+        
+        self.all_product_links = all_product_links
+        self.total_found_products = len(all_product_links)
+        
+        # نمایش وضعیت Resume
+        self.show_resume_status(all_product_links)
+        
+        # دریافت محصولات باقی‌مانده
+        return self.get_remaining_urls(all_product_links)
+
+    def iter_remaining_urls(self):
+        """
+        URLهای باقی‌مانده به صورت دسته‌های تدریجی؛ در حالت pipeline هر دسته
+        بلافاصله پس از کشف در صفحه لیست و فیلتر Resume برگردانده می‌شود
+        """
+        listing_config = self.config.get('listing', {})
+        if not (self.get_listing_config()['adaptive'] and listing_config.get('pipeline', True)):
+            remaining_product_links = self.discover_remaining_urls()
+            if remaining_product_links:
+                yield remaining_product_links
+            return
+        
+        self.logger.info(f"🔍 شروع استخراج تدریجی لینک‌های محصولات ({self.shop_name})...")
+        self.all_product_links = []
+        listing_start = time.perf_counter()
+        try:
+            for new_links in self.iter_listing_links():
+                self.all_product_links.extend(new_links)
+                remaining_batch = self.filter_remaining_urls(new_links)
+                if remaining_batch:
+                    yield remaining_batch
         except Exception as e:
-            self.logger.error(f"❌ خطای کلی: {e}")
+            self.logger.error(f"❌ خطا در استخراج لینک‌های محصولات: {e}")
         finally:
-            self.cleanup_with_progress_save(all_product_links if 'all_product_links' in locals() else None)
+            self.record_phase('listing', time.perf_counter() - listing_start)
+        
+        self.collect_blocking_stats()
+        if not self.all_product_links:
+            self.logger.error(f"❌ هیچ لینک محصولی یافت نشد ({self.shop_name})")
+            return
+        self.total_found_products = len(self.all_product_links)
+        self.logger.info(f"✅ تعداد {len(self.all_product_links)} لینک محصول استخراج شد")
+        self.show_resume_status(self.all_product_links)
+
+    def run_parallel_with_resume(self):
+        """
+        اجرای موازی با قابلیت Resume
+        """
+        MultiShopRunner([self], self.get_max_concurrency()).run()
 
         
     def setup_logging(self):
@@ -354,6 +2930,36 @@ class ProductScraper:
             
         return None
 
+    def get_chrome_binary(self) -> Optional[str]:
+        """
+        مسیر Chrome با کش در حافظه و (در حالت daemon) در فایل برای اجراهای بعدی
+        """
+        cache_file = os.path.join(self.browser_daemon.directory, 'discovery.json') if self.browser_daemon else None
+        with _discovery_lock:
+            cached = getattr(ProductScraper, '_chrome_binary', None)
+            if cached and os.path.exists(cached):
+                return cached
+            if cache_file and os.path.exists(cache_file):
+                try:
+                    with open(cache_file, 'r', encoding='utf-8') as f:
+                        cached = json.load(f).get('chrome_binary')
+                except (OSError, json.JSONDecodeError):
+                    cached = None
+                if cached and os.path.exists(cached):
+                    ProductScraper._chrome_binary = cached
+                    return cached
+            
+            chrome_binary = self.detect_chrome_binary()
+            if chrome_binary:
+                ProductScraper._chrome_binary = chrome_binary
+                if cache_file:
+                    try:
+                        with open(cache_file, 'w', encoding='utf-8') as f:
+                            json.dump({'chrome_binary': chrome_binary}, f)
+                    except OSError:
+                        pass
+            return chrome_binary
+
     def install_chrome_ubuntu(self):
         """
         راهنمای نصب Chrome در Ubuntu/Debian
@@ -373,6 +2979,92 @@ class ProductScraper:
         delay = random.uniform(min_seconds, max_seconds)
         time.sleep(delay)
         
+    def uses_event_waits(self) -> bool:
+        """
+        استراتژی انتظار: events (انتظار برای سیگنال آمادگی) یا sleep (تاخیر ثابت قدیمی)
+        """
+        return self.config.get('delays', {}).get('wait_strategy', 'events') == 'events'
+
+    def settle_delay(self, min_seconds: float, max_seconds: float):
+        """
+        تاخیر ثابت فقط در استراتژی sleep؛ در استراتژی events آمادگی با انتظارهای صریح سنجیده می‌شود
+        """
+        if not self.uses_event_waits():
+            self.human_like_delay(min_seconds, max_seconds)
+
+    def get_wait_timeout(self) -> float:
+        """
+        سقف انتظار برای هر سیگنال آمادگی (performance.max_wait_time)
+        """
+        return self.config.get('performance', {}).get('max_wait_time', 6)
+
+    def pace_host(self, url: str):
+        """
+        رعایت حداقل فاصله درخواست‌ها به میزبان url
+        """
+        self.host_pacer.wait(url, self.min_host_interval)
+
+    def wait_for_network_idle(self, idle_time: float = 0.5, timeout: Optional[float] = None) -> bool:
+        """
+        انتظار تا کامل شدن سند و ثابت ماندن تعداد درخواست‌های منابع به مدت idle_time
+        """
+        timeout = self.get_wait_timeout() if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        last_count, stable_since = -1, time.monotonic()
+        while time.monotonic() < deadline:
+            try:
+                state = self.driver.execute_script(
+                    "return [document.readyState, performance.getEntriesByType('resource').length];"
+                )
+            except Exception:
+                return False
+            now = time.monotonic()
+            if state[1] != last_count:
+                last_count, stable_since = state[1], now
+            elif state[0] == 'complete' and now - stable_since >= idle_time:
+                return True
+            time.sleep(0.1)
+        return False
+
+    def wait_for_specs_stable(self, timeout: Optional[float] = None) -> int:
+        """
+        انتظار تا ثابت شدن تعداد آیتم‌های مشخصات در دو نمونه‌برداری متوالی
+        """
+        spec_items_selector = self.config['selectors'].get('specifications', {}).get('spec_items')
+        if not spec_items_selector:
+            return 0
+        timeout = self.get_wait_timeout() if timeout is None else timeout
+        poll_interval = self.config.get('delays', {}).get('element_interaction', 0.2)
+        deadline = time.monotonic() + timeout
+        last_count = -1
+        while time.monotonic() < deadline:
+            try:
+                ready, count = self.driver.execute_script(
+                    "let n = 0; try { n = document.querySelectorAll(arguments[0]).length; } catch (e) {}"
+                    "return [document.readyState === 'complete', n];",
+                    spec_items_selector
+                )
+            except Exception:
+                return 0
+            if ready and count == last_count:
+                return count
+            last_count = count
+            time.sleep(poll_interval)
+        return max(last_count, 0)
+
+    def wait_for_scroll_growth(self, previous_height: int, timeout: Optional[float] = None) -> bool:
+        """
+        انتظار برای افزایش ارتفاع صفحه پس از اسکرول (بارگذاری کارت‌های جدید)
+        """
+        timeout = self.config.get('delays', {}).get('scroll_delay', 1.5) if timeout is None else timeout
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return document.body.scrollHeight;") > previous_height
+            )
+            return True
+        except TimeoutException:
+            return False
+
     def human_like_scroll(self, pause_time=None):
         """
         اسکرول طبیعی مانند انسان برای اطمینان از لود کامل محصولات
@@ -392,9 +3084,11 @@ class ProductScraper:
             WebDriverWait(self.driver, 5).until(
                 lambda d: d.execute_script("return document.readyState") == "complete"
             )
-            time.sleep(random.uniform(0.3, 0.8))
+            if not self.uses_event_waits():
+                time.sleep(random.uniform(0.3, 0.8))
             
-        time.sleep(pause_time)
+        if not self.uses_event_waits():
+            time.sleep(pause_time)
         
     def simulate_quick_mouse_movement(self, element):
         """
@@ -410,11 +3104,17 @@ class ProductScraper:
             
     def load_random_user_agents(self, file_path: str = "random.txt") -> List[str]:
         """
-        بارگذاری User-Agent های تصادفی از فایل
+        بارگذاری User-Agent های تصادفی از فایل (یک بار به ازای هر نسخه فایل)
         """
         try:
+            cache_key = (os.path.abspath(file_path), os.path.getmtime(file_path))
+            with _discovery_lock:
+                if cache_key in _user_agent_cache:
+                    return _user_agent_cache[cache_key]
             with open(file_path, 'r', encoding='utf-8') as f:
                 user_agents = [line.strip() for line in f.readlines() if line.strip()]
+            with _discovery_lock:
+                _user_agent_cache[cache_key] = user_agents
             if user_agents:
                 self.logger.info(f"✅ {len(user_agents)} User-Agent از فایل {file_path} بارگذاری شد")
                 return user_agents
@@ -441,59 +3141,235 @@ class ProductScraper:
         self.logger.info(f"🔄 استفاده از User-Agent پیش‌فرض")
         return default_ua
 
-    def setup_driver(self):
+    def get_chrome_arguments(self) -> List[str]:
         """
-        راه‌اندازی مرورگر با تنظیمات بهینه
+        آرگومان‌های خط فرمان Chrome (مشترک بین اجرای مستقیم و نمونه‌های daemon)
         """
-        try:
-            chrome_options = Options()
-            system_name = platform.system().lower()
-            self.logger.info(f"🖥️ سیستم‌عامل شناسایی شده: {system_name}")
-            
-            chrome_binary = self.detect_chrome_binary()
+        arguments = []
+        if self.config.get('browser_settings', {}).get('headless'):
+            arguments.append('--headless=new')
+        arguments.extend([
+            '--disable-gpu',
+            '--no-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-extensions',
+            '--disable-plugins',
+            '--disable-blink-features=AutomationControlled',
+            '--max_old_space_size=4096',
+            '--disable-background-timer-throttling',
+            '--disable-renderer-backgrounding',
+            f'--user-agent={self.get_random_user_agent()}'
+        ])
+        return arguments
+
+    def create_driver(self, port: int = 0) -> webdriver.Chrome:
+        """
+        ساخت یک نشست مستقل Chrome/chromedriver با تنظیمات بهینه
+        (در حالت daemon اتصال به یک نمونه گرم از طریق remote debugging)
+        """
+        chrome_options = Options()
+        system_name = platform.system().lower()
+        self.logger.info(f"🖥️ سیستم‌عامل شناسایی شده: {system_name}")
+        
+        lifecycle = self.get_lifecycle_config()
+        chrome_options.page_load_strategy = lifecycle['page_load_strategy']
+        
+        daemon_slot = None
+        if self.browser_daemon:
+            daemon_slot, instance = self.browser_daemon.acquire()
+            chrome_options.debugger_address = f"127.0.0.1:{instance['port']}"
+        else:
+            chrome_binary = self.get_chrome_binary()
             if chrome_binary:
                 chrome_options.binary_location = chrome_binary
             else:
-                self.logger.error("❌ Google Chrome یا Chromium یافت نشد!")
                 self.install_chrome_ubuntu()
-                sys.exit(1)
-            
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-images')
-            chrome_options.add_argument('--disable-css-background-images')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--disable-plugins')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_argument('--max_old_space_size=4096')
-            chrome_options.add_argument('--disable-background-timer-throttling')
-            chrome_options.add_argument('--disable-renderer-backgrounding')
-
-            
-            random_user_agent = self.get_random_user_agent()
-            chrome_options.add_argument(f'--user-agent={random_user_agent}')
-            
+                raise RuntimeError("Google Chrome یا Chromium یافت نشد!")
+            for argument in self.get_chrome_arguments():
+                chrome_options.add_argument(argument)
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            chromedriver_path = '/usr/bin/chromedriver'
+        
+        blocking_config = self.get_blocking_config()
+        if blocking_config['enabled'] and blocking_config['track_savings']:
+            # لاگ performance برای شمارش درخواست‌های مسدودشده
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        
+        chromedriver_path = '/usr/bin/chromedriver'
+        try:
             if os.path.exists(chromedriver_path):
                 self.logger.info(f"✅ استفاده از chromedriver سیستم: {chromedriver_path}")
-                service = Service(chromedriver_path, port=9515)
+                # port=0 یعنی پورت آزاد توسط سیستم انتخاب شود (برای چند کارگر و اجرای همزمان فروشگاه‌ها)
+                service = Service(chromedriver_path, port=port)
             else:
-                self.logger.error("❌ chromedriver یافت نشد")
-                sys.exit(1)
-            
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            self.driver.implicitly_wait(5)
-            self.driver.maximize_window()
-            self.logger.info("✅ مرورگر کروم با موفقیت راه‌اندازی شد")
-            
+                raise RuntimeError("chromedriver یافت نشد")
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+        except Exception:
+            if daemon_slot is not None:
+                self.browser_daemon.release(daemon_slot)
+            raise
+        driver.daemon_slot = daemon_slot
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.tracer:
+            self.tracer.wrap(driver)
+        self.apply_resource_blocking(driver)
+        # driver.get گیرکرده پس از این مدت TimeoutException می‌دهد
+        driver.set_page_load_timeout(lifecycle['page_load_timeout'])
+        driver.implicitly_wait(5)
+        driver.maximize_window()
+        self.logger.info("✅ مرورگر کروم با موفقیت راه‌اندازی شد")
+        return driver
+
+    def get_lifecycle_config(self) -> Dict:
+        """
+        تنظیمات چرخه عمر مرورگر از browser_settings
+        """
+        settings = self.config.get('browser_settings', {})
+        page_load_timeout = float(settings.get('timeout', 30))
+        return {
+            'page_load_timeout': page_load_timeout,
+            'page_load_strategy': settings.get('page_load_strategy', 'normal'),
+            'recycle_after_pages': int(settings.get('recycle_after_pages', 200)),
+            'recycle_rss_mb': float(settings.get('recycle_rss_mb', 1500)),
+            'rss_check_interval': float(settings.get('rss_check_interval', 30)),
+            'page_deadline': float(settings.get('page_deadline', max(60.0, page_load_timeout * 4))),
+            'watchdog_interval': float(settings.get('watchdog_interval', 5)),
+            'restart_attempts': max(1, int(settings.get('restart_attempts', 3)))
+        }
+
+    def quit_driver(self, driver: webdriver.Chrome, discard: bool = False):
+        """
+        بستن نشست؛ نمونه daemon گرم می‌ماند مگر discard (بازسازی مرورگر) خواسته شود
+        """
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        daemon_slot = getattr(driver, 'daemon_slot', None)
+        if daemon_slot is not None and self.browser_daemon:
+            self.browser_daemon.release(daemon_slot, discard=discard)
+
+    def get_browser_pids(self, driver: Optional[webdriver.Chrome]) -> List[int]:
+        """
+        ریشه پردازه‌های یک نشست: chromedriver و (در حالت daemon) نمونه Chrome متصل
+        """
+        pids = []
+        try:
+            pids.append(driver.service.process.pid)
+        except Exception:
+            pass
+        daemon_slot = getattr(driver, 'daemon_slot', None)
+        if daemon_slot is not None and self.browser_daemon:
+            instance = self.browser_daemon.read_instance(daemon_slot)
+            if instance:
+                pids.append(instance['pid'])
+        return pids
+
+    def get_blocking_config(self) -> Dict:
+        """
+        تنظیمات مسدودسازی منابع (resource_blocking) با مقادیر پیش‌فرض
+        """
+        blocking_config = self.config.get('resource_blocking', {})
+        return {
+            'enabled': blocking_config.get('enabled', True),
+            'resource_types': blocking_config.get('resource_types', ['image', 'font', 'media']),
+            'url_patterns': blocking_config.get('url_patterns', DEFAULT_BLOCKED_URL_PATTERNS),
+            # لاگ performance هزینه CDP و حافظه دارد؛ فقط هنگام اندازه‌گیری فعال شود
+            'track_savings': blocking_config.get('track_savings', False),
+            'estimated_bytes': {**DEFAULT_ESTIMATED_BYTES, **blocking_config.get('estimated_bytes', {})}
+        }
+
+    def get_blocked_url_patterns(self) -> List[str]:
+        """
+        الگوهای نهایی مسدودسازی از نوع منابع و الگوهای URL
+        """
+        blocking_config = self.get_blocking_config()
+        patterns = []
+        for resource_type in blocking_config['resource_types']:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+        patterns.extend(blocking_config['url_patterns'])
+        return list(dict.fromkeys(patterns))
+
+    def apply_resource_blocking(self, driver: webdriver.Chrome):
+        """
+        مسدودسازی منابع در سطح شبکه با Chrome DevTools Protocol
+        """
+        if not self.get_blocking_config()['enabled']:
+            return
+        patterns = self.get_blocked_url_patterns()
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            self.logger.info(f"🚫 مسدودسازی منابع فعال شد - {len(patterns)} الگو")
         except Exception as e:
-            self.logger.error(f"❌ خطا در راه‌اندازی مرورگر: {e}")
-            sys.exit(1)
+            self.logger.warning(f"⚠️ خطا در فعال‌سازی مسدودسازی منابع: {e}")
+
+    def collect_blocking_stats(self):
+        """
+        خواندن لاگ performance و به‌روزرسانی شمارنده درخواست‌ها و حجم صرفه‌جویی‌شده
+        """
+        blocking_config = self.get_blocking_config()
+        if not blocking_config['enabled'] or not blocking_config['track_savings'] or not self.driver:
+            return
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return
+        
+        blocked, loaded, loaded_bytes, estimated_saved = 0, 0, 0, 0
+        blocked_by_type = defaultdict(int)
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.loadingFailed' and params.get('blockedReason'):
+                resource_type = params.get('type', 'Other')
+                blocked += 1
+                blocked_by_type[resource_type] += 1
+                estimated_saved += blocking_config['estimated_bytes'].get(resource_type, blocking_config['estimated_bytes']['Other'])
+            elif method == 'Network.loadingFinished':
+                loaded += 1
+                loaded_bytes += int(params.get('encodedDataLength', 0))
+        
+        with self.blocking_lock:
+            self.blocking_stats['blocked_requests'] += blocked
+            self.blocking_stats['estimated_bytes_saved'] += estimated_saved
+            self.blocking_stats['loaded_requests'] += loaded
+            self.blocking_stats['loaded_bytes'] += loaded_bytes
+            for resource_type, count in blocked_by_type.items():
+                self.blocking_stats['blocked_by_type'][resource_type] += count
+
+    def report_blocking_stats(self):
+        """
+        چاپ گزارش صرفه‌جویی مسدودسازی منابع در این اجرا
+        """
+        stats = self.blocking_stats
+        if not stats['blocked_requests'] and not stats['loaded_requests']:
+            return
+        print("\n🚫 مسدودسازی منابع:")
+        print(f"   ⛔ درخواست‌های مسدودشده: {stats['blocked_requests']}")
+        print(f"   💾 حجم صرفه‌جویی‌شده (تخمینی): {stats['estimated_bytes_saved'] / (1024 * 1024):.1f} MB")
+        print(f"   📥 درخواست‌های بارگذاری‌شده: {stats['loaded_requests']} ({stats['loaded_bytes'] / (1024 * 1024):.1f} MB)")
+        for resource_type, count in sorted(stats['blocked_by_type'].items(), key=lambda item: -item[1]):
+            print(f"      {resource_type}: {count}")
+
+    def setup_driver(self):
+        """
+        راه‌اندازی مرورگر اصلی (برای صفحه لیست محصولات) با تلاش مجدد
+        """
+        attempts = self.get_lifecycle_config()['restart_attempts']
+        for attempt in range(1, attempts + 1):
+            try:
+                self.driver = self.create_driver()
+                return
+            except Exception as e:
+                self.logger.error(f"❌ خطا در راه‌اندازی مرورگر ({attempt}/{attempts}): {e}")
+                if attempt < attempts:
+                    time.sleep(min(30, 2 ** attempt))
+        sys.exit(1)
    
     def scroll_page(self, scroll_count: int):
         """
@@ -503,15 +3379,102 @@ class ProductScraper:
         
         for i in range(scroll_count):
             self.logger.info(f"📜 اسکرول {i+1} از {scroll_count}")
+            previous_height = self.driver.execute_script("return document.body.scrollHeight;")
             self.human_like_scroll()
-            self.human_like_delay(1.5, 3.5)
+            if self.uses_event_waits():
+                # به جای تاخیر ثابت، تا رشد صفحه یا آرام شدن شبکه صبر می‌شود
+                if self.wait_for_scroll_growth(previous_height):
+                    self.wait_for_network_idle(idle_time=0.3)
+            else:
+                self.human_like_delay(1.5, 3.5)
             if random.random() < 0.3:
                 self.driver.execute_script("window.scrollBy(0, -100);")
-                time.sleep(random.uniform(0.5, 1.0))
+                self.settle_delay(0.5, 1.0)
         
         self.driver.execute_script("window.scrollTo({top: 0, behavior: 'smooth'});")
-        self.human_like_delay(2, 3)
+        self.settle_delay(2, 3)
+        
+    def get_listing_config(self) -> Dict:
+        """
+        تنظیمات برداشت لیست (listing) با مقادیر پیش‌فرض
+        """
+        listing_config = self.config.get('listing', {})
+        return {
+            'adaptive': listing_config.get('adaptive', True),
+            'max_scrolls': listing_config.get('max_scrolls', max(60, self.config.get('scroll_count', 0))),
+            'stable_rounds': listing_config.get('stable_rounds', 2),
+            'max_products': listing_config.get('max_products', 0)
+        }
+
+    def open_listing_page(self):
+        """
+        باز کردن صفحه لیست و انتظار برای اولین کارت‌ها
+        """
+        self.driver.get(self.config['main_page_url'])
+        WebDriverWait(self.driver, 10).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        self.settle_delay(2, 3)
+
+    def iter_listing_links(self):
+        """
+        برداشت تطبیقی: پس از هر اسکرول لینک‌های جدید را برمی‌گرداند (generator)
+        و وقتی تعداد کارت‌ها در stable_rounds اسکرول متوالی رشد نکند متوقف می‌شود
+        """
+        listing_config = self.get_listing_config()
+        product_selector = self.config['selectors']['product_links']
+        
+        self.open_listing_page()
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, product_selector))
+        )
         
+        self.product_index = {}
+        last_card_count = 0
+        stable_rounds = 0
+        for scroll_index in range(listing_config['max_scrolls'] + 1):
+            harvest = self.driver.execute_script(LINK_HARVEST_SCRIPT, product_selector)
+            new_links = self.index_product_links(harvest['links'])
+            if new_links:
+                yield new_links
+            
+            if harvest['cards'] > last_card_count:
+                last_card_count = harvest['cards']
+                stable_rounds = 0
+            else:
+                stable_rounds += 1
+                if stable_rounds >= listing_config['stable_rounds']:
+                    self.logger.info(f"🛑 تعداد کارت‌ها پس از {scroll_index} اسکرول ثابت ماند")
+                    break
+            if listing_config['max_products'] and len(self.product_index) >= listing_config['max_products']:
+                self.logger.info(f"🛑 سقف {listing_config['max_products']} محصول رسید")
+                break
+            if scroll_index == listing_config['max_scrolls']:
+                self.logger.info(f"🛑 سقف {listing_config['max_scrolls']} اسکرول رسید")
+                break
+            
+            self.logger.info(f"📜 اسکرول {scroll_index + 1} - کارت‌ها: {harvest['cards']}, لینک‌ها: {len(self.product_index)}")
+            self.human_like_scroll()
+            if self.uses_event_waits():
+                if self.wait_for_scroll_growth(harvest['height']):
+                    self.wait_for_network_idle(idle_time=0.3)
+            else:
+                self.human_like_delay(1.5, 3.5)
+
+    def index_product_links(self, hrefs: List[str]) -> List[str]:
+        """
+        افزودن لینک‌ها به نمایه کلید محصول؛ فقط محصولات دیده‌نشده (با هر slug یا کدگذاری) برگردانده می‌شوند
+        """
+        base_url = self.config['main_page_url']
+        new_links = []
+        for href in hrefs:
+            full_url = urljoin(base_url, href)
+            key = product_key(full_url)
+            if key not in self.product_index:
+                self.product_index[key] = full_url
+                new_links.append(full_url)
+        return new_links
+
     def extract_product_links(self) -> List[str]:
         """
         استخراج لینک‌های محصولات با انتظار لود کامل
@@ -519,11 +3482,14 @@ class ProductScraper:
         self.logger.info("🔍 شروع استخراج لینک‌های محصولات...")
         
         try:
-            self.driver.get(self.config['main_page_url'])
-            WebDriverWait(self.driver, 10).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
-            self.human_like_delay(2, 3)
+            if self.get_listing_config()['adaptive']:
+                product_links = []
+                for new_links in self.iter_listing_links():
+                    product_links.extend(new_links)
+                self.logger.info(f"✅ تعداد {len(product_links)} لینک محصول استخراج شد")
+                return product_links
+            
+            self.open_listing_page()
             
             scroll_count = self.config.get('scroll_count', 0)
             if scroll_count > 0:
@@ -534,18 +3500,10 @@ class ProductScraper:
             )
             
             product_selector = self.config['selectors']['product_links']
-            product_elements = self.driver.find_elements(By.CSS_SELECTOR, product_selector)
+            harvest = self.driver.execute_script(LINK_HARVEST_SCRIPT, product_selector)
             
-            product_links = []
-            for element in product_elements:
-                try:
-                    href = element.get_attribute('href')
-                    if href:
-                        full_url = urljoin(self.config['main_page_url'], href)
-                        if full_url not in product_links:
-                            product_links.append(full_url)
-                except Exception:
-                    continue
+            self.product_index = {}
+            product_links = self.index_product_links(harvest['links'])
                 
             self.logger.info(f"✅ تعداد {len(product_links)} لینک محصول استخراج شد")
             return product_links
@@ -558,14 +3516,10 @@ class ProductScraper:
         """
         تشخیص برند از متن دسته‌بندی
         """
-        pattern = r'(.+?)\s*\((.+?)\)'
-        match = re.match(pattern, category_text.strip())
-        if match:
-            brand_persian = match.group(1).strip()
-            brand_english = match.group(2).strip()
-            self.logger.info(f"🏷️ برند تشخیص داده شد: {brand_persian} ({brand_english})")
-            return f"{brand_persian} ({brand_english})"
-        return None
+        brand = detect_brand(category_text)
+        if brand:
+            self.logger.info(f"🏷️ برند تشخیص داده شد: {brand}")
+        return brand
 
     def extract_specifications(self, product_url: str) -> Dict:
         """
@@ -584,7 +3538,9 @@ class ProductScraper:
             spec_value_selector = self.config['selectors']['specifications']['spec_value']
             
             try:
-                spec_elements = WebDriverWait(self.driver, 5).until(
+                # نمونه‌برداری کوتاه به جای انتظار کامل؛ محصول بدون مشخصات سریع به روش جایگزین می‌رسد
+                poll_interval = self.config.get('delays', {}).get('element_interaction', 0.2)
+                spec_elements = WebDriverWait(self.driver, self.get_specs_fallback_config()['wait'], poll_frequency=poll_interval).until(
                     EC.presence_of_all_elements_located((By.CSS_SELECTOR, spec_items_selector))
                 )
                 for element in spec_elements:
@@ -613,204 +3569,214 @@ class ProductScraper:
         
         return specifications
 
-    def extract_specs_alternative_method(self, specifications: Dict):
+    def get_extraction_mode(self) -> str:
         """
-        روش جایگزین برای استخراج مشخصات
+        حالت استخراج: script (یک فراخوانی JavaScript) یا elements (روش قدیمی عنصر به عنصر)
         """
-        try:
-            all_elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'مشخصات')]")
-            for element in all_elements:
-                try:
-                    parent = element.find_element(By.XPATH, './..')
-                    spec_items = parent.find_elements(By.XPATH, './/*')
-                    for item in spec_items:
-                        try:
-                            text = item.text.strip()
-                            if text and '\n' in text:
-                                lines = text.split('\n')
-                                if len(lines) >= 2:
-                                    title = lines[0].strip()
-                                    body = lines[1].strip()
-                                    if title and body and len(title) < 100 and len(body) < 200:
-                                        if any(keyword in title.lower() for keyword in ['حافظه', 'باتری', 'دوربین', 'سیم']):
-                                            specifications['key_specs'].append({
-                                                'title': title,
-                                                'body': body
-                                            })
-                                        else:
-                                            specifications['general_specs'].append({
-                                                'title': title,
-                                                'body': body
-                                            })
-                        except Exception:
-                            continue
-                except Exception:
-                    continue
-        except Exception as e:
-            self.logger.warning(f"⚠️ خطا در روش جایگزین استخراج مشخصات: {e}")
-            
-    def extract_product_data(self, product_url: str) -> Optional[Dict]:
+        return self.config.get('performance', {}).get('extraction_mode', 'script')
+
+    def get_script_selectors(self) -> Dict:
         """
-        استخراج بهینه‌شده اطلاعات محصول
+        سلکتورهای کانفیگ به شکل آرگومان اسکریپت استخراج
         """
-        try:
-            self.logger.info(f"📊 استخراج اطلاعات محصول: {product_url}")
-            self.driver.get(product_url)
-            self.human_like_delay(1.5, 2.5)
-            self.driver.execute_script("window.scrollTo(0, 500);")
-            self.human_like_delay(0.5, 1)
-            
-            product_data = {
-                'url': product_url,
-                'title': None,
-                'categories': [],
-                'brand': None,
-                'specifications': {
-                    'key_specs': [],
-                    'general_specs': []
-                }
-            }
-            
+        selectors = self.config['selectors']
+        spec_selectors = selectors.get('specifications', {})
+        return {
+            'product_title': selectors.get('product_title'),
+            'categories': selectors.get('categories', []),
+            'key_specs_section': spec_selectors.get('key_specs_section'),
+            'spec_items': spec_selectors.get('spec_items'),
+            'spec_title': spec_selectors.get('spec_title'),
+            'spec_value': spec_selectors.get('spec_value'),
+            'fields': list(self.extraction_fields)
+        }
+
+    def extract_product_data_with_script(self, product_url: str) -> Optional[Dict]:
+        """
+        استخراج همه فیلدهای محصول با یک رفت‌وبرگشت WebDriver؛ در صورت خطا None
+        """
+        with self.timed_phase('title_wait'):
             try:
-                title_element = WebDriverWait(self.driver, 6).until(
+                WebDriverWait(self.driver, self.get_wait_timeout()).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, self.config['selectors']['product_title']))
                 )
-                product_data['title'] = title_element.text.strip()
-                self.logger.info(f"📝 عنوان محصول: {product_data['title']}")
             except TimeoutException:
                 self.logger.warning(f"⚠️ عنوان محصول یافت نشد: {product_url}")
-                
-            categories_selectors = self.config['selectors']['categories']
-            categories_found = []
-            for i, selector in enumerate(categories_selectors):
-                try:
-                    category_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    category_text = category_element.text.strip()
-                    if category_text:
-                        categories_found.append({
-                            'level': i + 1,
-                            'name': category_text
-                        })
-                        self.logger.info(f"🏷️ دسته‌بندی {i+1}: {category_text}")
-                except NoSuchElementException:
-                    break
-                except Exception as e:
-                    self.logger.warning(f"⚠️ خطا در استخراج دسته‌بندی {i+1}: {e}")
-            
-            if categories_found:
-                last_category = categories_found[-1]
-                brand = self.detect_brand_from_category(last_category['name'])
-                if brand:
-                    product_data['brand'] = brand
-                    product_data['categories'] = categories_found[:-1]
-                    self.logger.info(f"🏷️ برند استخراج شد: {brand}")
-                else:
-                    product_data['categories'] = categories_found
-            
-            self.logger.info("🔍 شروع استخراج مشخصات...")
-            specifications = self.extract_specifications(product_url)
-            product_data['specifications'] = specifications
-            self.logger.info(f"✅ تعداد مشخصات کلیدی: {len(specifications['key_specs'])}")
-            self.logger.info(f"✅ تعداد مشخصات کلی: {len(specifications['general_specs'])}")
-            
-            self.human_like_delay(0.3, 0.8)
-            return product_data
-            
+        
+        wants_specs = 'specifications' in self.extraction_fields
+        if wants_specs and self.uses_event_waits():
+            with self.timed_phase('specs_wait'):
+                self.wait_for_specs_stable()
+        
+        try:
+            with self.timed_phase('extraction_script'):
+                result = self.driver.execute_script(PRODUCT_EXTRACTION_SCRIPT, self.get_script_selectors())
         except Exception as e:
-            self.logger.error(f"❌ خطا در استخراج اطلاعات محصول {product_url}: {e}")
+            self.logger.warning(f"⚠️ خطا در اسکریپت استخراج، استفاده از روش عنصر به عنصر: {e}")
             return None
-            
-    def save_data(self):
+        if not isinstance(result, dict):
+            return None
+        
+        product_data = self.new_product_data(product_url)
+        product_data['title'] = result.get('title')
+        if product_data['title']:
+            self.logger.info(f"📝 عنوان محصول: {product_data['title']}")
+        self.assign_categories(product_data, result.get('categories') or [])
+        if not wants_specs:
+            return product_data
+        
+        if result.get('specifications'):
+            product_data['specifications'] = result['specifications']
+        # اگر آیتم مشخصاتی پیدا نشد، همان مسیر قدیمی (انتظار + روش جایگزین) اجرا می‌شود
+        if not result.get('spec_items_found'):
+            with self.timed_phase('specs'):
+                product_data['specifications'] = self.extract_specifications(product_url)
+        
+        self.logger.info(f"✅ تعداد مشخصات کلیدی: {len(product_data['specifications']['key_specs'])}")
+        self.logger.info(f"✅ تعداد مشخصات کلی: {len(product_data['specifications']['general_specs'])}")
+        return product_data
+
+    def get_specs_fallback_config(self) -> Dict:
         """
-        ذخیره اطلاعات استخراج شده
+        سقف‌های روش جایگزین مشخصات (performance.specs_fallback)؛ wait انتظار آیتم‌های اصلی پیش از آن است
         """
-        output_config = self.config.get('output', {})
-        filename = output_config.get('filename', 'scraped_products.json')
-        
+        fallback_config = self.config.get('performance', {}).get('specs_fallback', {})
+        return {
+            'enabled': fallback_config.get('enabled', True),
+            'wait': float(fallback_config.get('wait', 1.0)),
+            'budget': float(fallback_config.get('budget', 2.0)),
+            'max_matches': int(fallback_config.get('max_matches', 5)),
+            'max_items': int(fallback_config.get('max_items', 500))
+        }
+
+    def extract_specs_alternative_method(self, specifications: Dict):
+        """
+        روش جایگزین برای استخراج مشخصات: جستجوی «مشخصات» و خواندن زیرعنصرهای والد آن
+        با یک اجرای اسکریپت روی DOM و سقف زمان هر محصول (به جای یک فراخوانی WebDriver برای هر عنصر)
+        """
+        settings = self.get_specs_fallback_config()
+        if not settings['enabled']:
+            return
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.scraped_products, f, ensure_ascii=False, indent=2)
-                
-            self.logger.info(f"💾 اطلاعات در فایل {filename} ذخیره شد")
-            
-            total_products = len(self.scraped_products)
-            successful_products = len([p for p in self.scraped_products if p.get('title')])
-            products_with_brand = len([p for p in self.scraped_products if p.get('brand')])
-            products_with_key_specs = len([p for p in self.scraped_products if p.get('specifications', {}).get('key_specs')])
-            products_with_general_specs = len([p for p in self.scraped_products if p.get('specifications', {}).get('general_specs')])
-            
-            print(f"\n📈 آمار نهایی:")
-            print(f"🔢 تعداد کل محصولات: {total_products}")
-            print(f"✅ محصولات موفق: {successful_products}")
-            print(f"🏷️ محصولات با برند: {products_with_brand}")
-            print(f"🔧 محصولات با مشخصات کلیدی: {products_with_key_specs}")
-            print(f"📋 محصولات با مشخصات کلی: {products_with_general_specs}")
-            print(f"❌ محصولات ناموفق: {total_products - successful_products}")
-            
+            with self.timed_phase('specs_fallback'):
+                result = self.driver.execute_script(SPECS_FALLBACK_SCRIPT, {
+                    'marker': 'مشخصات',
+                    'budget_ms': settings['budget'] * 1000,
+                    'max_matches': settings['max_matches'],
+                    'max_items': settings['max_items']
+                })
         except Exception as e:
-            self.logger.error(f"❌ خطا در ذخیره اطلاعات: {e}")
+            REGISTRY.inc('scraper_specs_fallback_total', shop=self.shop_name, outcome='error')
+            self.logger.warning(f"⚠️ خطا در روش جایگزین استخراج مشخصات: {e}")
+            return
+        if not isinstance(result, dict):
+            return
+        
+        for item in result.get('items') or []:
+            title, body = item.get('title'), item.get('body')
+            if any(keyword in title.lower() for keyword in ['حافظه', 'باتری', 'دوربین', 'سیم']):
+                specifications['key_specs'].append({'title': title, 'body': body})
+            else:
+                specifications['general_specs'].append({'title': title, 'body': body})
+        
+        if result.get('truncated'):
+            outcome = 'truncated'
+            self.logger.warning(f"⏱️ روش جایگزین مشخصات به سقف رسید ({result.get('scanned')} عنصر، {result.get('matches')} بخش)")
+        else:
+            outcome = 'found' if result.get('items') else 'empty'
+        REGISTRY.inc('scraper_specs_fallback_total', shop=self.shop_name, outcome=outcome)
             
-    def setup_multiple_tabs(self, num_tabs: int = 2):
+    def extract_product_data(self, product_url: str) -> Optional[Dict]:
+        """
+        استخراج بهینه‌شده اطلاعات محصول
+        """
+        return self.run_extraction_pipeline(product_url)
+
+    def new_product_data(self, product_url: str) -> Dict:
+        return {
+            'url': product_url,
+            'title': None,
+            'categories': [],
+            'brand': None,
+            'specifications': {
+                'key_specs': [],
+                'general_specs': []
+            }
+        }
+
+    def load_extraction_profile(self, profile: Optional[str] = None) -> Tuple[str, ...]:
         """
-        راه‌اندازی چندین تب برای پردازش موازی
+        فیلدهای پروفایل استخراج (extraction.profile، پیش‌فرض full)؛ پروفایل نامعتبر = full
         """
         try:
-            self.logger.info(f"🔄 راه‌اندازی {num_tabs} تب برای پردازش موازی...")
-            
-            # باز کردن تب‌های اضافی
-            for i in range(num_tabs - 1):
-                self.driver.execute_script("window.open('about:blank', '_blank');")
-                self.human_like_delay(0.3, 0.5)
-            
-            # دریافت handle های تمام تب‌ها
-            self.tab_handles = self.driver.window_handles
-            self.logger.info(f"✅ {len(self.tab_handles)} تب آماده شد")
-            
-            return self.tab_handles
-            
-        except Exception as e:
-            self.logger.error(f"❌ خطا در راه‌اندازی چندین تب: {e}")
-            return [self.driver.current_window_handle]
+            fields = resolve_extraction_fields(self.config, profile)
+        except ValueError as e:
+            self.logger.error(f"❌ {e} - استفاده از پروفایل full")
+            return EXTRACTION_FIELDS
+        if fields != EXTRACTION_FIELDS:
+            self.logger.info(f"🎯 پروفایل استخراج: {', '.join(fields)}")
+        return fields
 
-    def extract_product_data_in_tab(self, product_url: str, tab_handle: str) -> Optional[Dict]:
+    def run_extraction_pipeline(self, product_url: str) -> Optional[Dict]:
         """
-        استخراج اطلاعات محصول در تب مشخص
+        خط لوله مرحله‌ای استخراج (ناوبری، عنوان، دسته‌بندی و برند، مشخصات)؛
+        مراحلی که پروفایل استخراج لازم ندارد با انتظارهایشان اجرا نمی‌شوند
         """
         try:
-            # تغییر به تب مشخص
-            self.driver.switch_to.window(tab_handle)
-            
-            self.logger.info(f"📊 استخراج اطلاعات محصول در تب: {product_url}")
-            self.driver.get(product_url)
-            self.human_like_delay(1.5, 2.5)
-            self.driver.execute_script("window.scrollTo(0, 500);")
-            self.human_like_delay(0.5, 1)
-            
-            product_data = {
-                'url': product_url,
-                'title': None,
-                'categories': [],
-                'brand': None,
-                'specifications': {
-                    'key_specs': [],
-                    'general_specs': []
-                }
-            }
+            self.logger.info(f"📊 استخراج اطلاعات محصول: {product_url}")
+            self.pace_host(product_url)
+            with self.timed_phase('navigation'):
+                self.driver.get(product_url)
+            self.settle_delay(1.5, 2.5)
+            if 'specifications' in self.extraction_fields:
+                # مشخصات پایین صفحه پس از اسکرول بارگذاری می‌شوند
+                self.driver.execute_script("window.scrollTo(0, 500);")
+                self.settle_delay(0.5, 1)
+            
+            product_data = None
+            if self.get_extraction_mode() == 'script':
+                product_data = self.extract_product_data_with_script(product_url)
+            if not product_data:
+                product_data = self.new_product_data(product_url)
+                for stage in self.get_extraction_stages():
+                    stage(product_url, product_data)
+            
+            self.archive_page(product_url)
+            self.settle_delay(0.3, 0.8)
+            return product_data
             
-            # استخراج عنوان محصول
+        except Exception as e:
+            # خطا به کارگر می‌رسد تا با classify_error دسته‌بندی شود
+            self.logger.error(f"❌ خطا در استخراج اطلاعات محصول {product_url}: {e}")
+            raise
+
+    def get_extraction_stages(self) -> List:
+        """
+        مراحل روش عنصر به عنصر برای پروفایل فعال؛ انتظار عنوان همیشه اجرا می‌شود (نشانه آماده بودن صفحه)
+        """
+        stages = [self.extract_title_stage]
+        if 'categories' in self.extraction_fields or 'brand' in self.extraction_fields:
+            stages.append(self.extract_categories_stage)
+        if 'specifications' in self.extraction_fields:
+            stages.append(self.extract_specifications_stage)
+        return stages
+
+    def extract_title_stage(self, product_url: str, product_data: Dict):
+        with self.timed_phase('title_wait'):
             try:
-                title_element = WebDriverWait(self.driver, 6).until(
+                title_element = WebDriverWait(self.driver, self.get_wait_timeout()).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, self.config['selectors']['product_title']))
                 )
-                product_data['title'] = title_element.text.strip()
-                self.logger.info(f"📝 عنوان محصول: {product_data['title']}")
+                if 'title' in self.extraction_fields:
+                    product_data['title'] = title_element.text.strip()
+                    self.logger.info(f"📝 عنوان محصول: {product_data['title']}")
             except TimeoutException:
                 self.logger.warning(f"⚠️ عنوان محصول یافت نشد: {product_url}")
-                
-            # استخراج دسته‌بندی‌ها
-            categories_selectors = self.config['selectors']['categories']
-            categories_found = []
-            for i, selector in enumerate(categories_selectors):
+
+    def extract_categories_stage(self, product_url: str, product_data: Dict):
+        categories_found = []
+        with self.timed_phase('categories'):
+            for i, selector in enumerate(self.config['selectors']['categories']):
                 try:
                     category_element = self.driver.find_element(By.CSS_SELECTOR, selector)
                     category_text = category_element.text.strip()
@@ -824,79 +3790,224 @@ class ProductScraper:
                     break
                 except Exception as e:
                     self.logger.warning(f"⚠️ خطا در استخراج دسته‌بندی {i+1}: {e}")
-            
-            # تشخیص برند از دسته‌بندی
-            if categories_found:
-                last_category = categories_found[-1]
-                brand = self.detect_brand_from_category(last_category['name'])
-                if brand:
-                    product_data['brand'] = brand
-                    product_data['categories'] = categories_found[:-1]
-                    self.logger.info(f"🏷️ برند استخراج شد: {brand}")
-                else:
-                    product_data['categories'] = categories_found
-            
-            # استخراج مشخصات
-            self.logger.info("🔍 شروع استخراج مشخصات...")
+        self.assign_categories(product_data, categories_found)
+
+    def assign_categories(self, product_data: Dict, categories_found: List[Dict]):
+        """
+        تشخیص برند از آخرین دسته‌بندی و ثبت فیلدهای انتخاب‌شده در پروفایل
+        """
+        if not categories_found:
+            return
+        brand = self.detect_brand_from_category(categories_found[-1]['name'])
+        if brand:
+            categories_found = categories_found[:-1]
+            if 'brand' in self.extraction_fields:
+                product_data['brand'] = brand
+                self.logger.info(f"🏷️ برند استخراج شد: {brand}")
+        if 'categories' in self.extraction_fields:
+            product_data['categories'] = categories_found
+
+    def extract_specifications_stage(self, product_url: str, product_data: Dict):
+        self.logger.info("🔍 شروع استخراج مشخصات...")
+        with self.timed_phase('specs'):
             specifications = self.extract_specifications(product_url)
-            product_data['specifications'] = specifications
-            self.logger.info(f"✅ تعداد مشخصات کلیدی: {len(specifications['key_specs'])}")
-            self.logger.info(f"✅ تعداد مشخصات کلی: {len(specifications['general_specs'])}")
-            
-            self.human_like_delay(0.3, 0.8)
-            return product_data
+        product_data['specifications'] = specifications
+        self.logger.info(f"✅ تعداد مشخصات کلیدی: {len(specifications['key_specs'])}")
+        self.logger.info(f"✅ تعداد مشخصات کلی: {len(specifications['general_specs'])}")
             
-        except Exception as e:
-            self.logger.error(f"❌ خطا در استخراج اطلاعات محصول {product_url}: {e}")
-            return None
+    def get_output_filename(self) -> str:
+        return self.config.get('output', {}).get('filename', 'scraped_products.json')
+
+    def is_streaming_output(self) -> bool:
+        """
+        حالت خروجی جریانی: هر محصول به محض تکمیل یک خط NDJSON در فایل خروجی؛
+        در حالت توزیع‌شده خروجی فقط از جدول products پایگاه داده مشترک گرفته می‌شود
+        """
+        if self.distributed['enabled']:
+            return False
+        return self.config.get('output', {}).get('streaming', False)
+
+    def new_output_stats(self) -> Dict[str, int]:
+        return {
+            'total': 0,
+            'successful': 0,
+            'with_brand': 0,
+            'with_key_specs': 0,
+            'with_general_specs': 0
+        }
+
+    def count_product(self, stats: Dict[str, int], product: Dict):
+        """
+        به‌روزرسانی شمارنده‌های آماری با یک محصول
+        """
+        specifications = product.get('specifications') or {}
+        stats['total'] += 1
+        stats['successful'] += bool(product.get('title'))
+        stats['with_brand'] += bool(product.get('brand'))
+        stats['with_key_specs'] += bool(specifications.get('key_specs'))
+        stats['with_general_specs'] += bool(specifications.get('general_specs'))
+
+    def iter_output_lines(self, filename: str):
+        """
+        خواندن خط به خط محصولات از فایل NDJSON یا آرایه JSON نوشته‌شده توسط finalize
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip().rstrip(',')
+                if line in ('', '[', ']'):
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # خط ناقص ناشی از crash
+                    continue
+
+    def prepare_output(self):
+        """
+        آماده‌سازی فایل خروجی جریانی: ادامه فایل قبلی هنگام Resume یا شروع فایل خالی
+        """
+        if not self.is_streaming_output():
+            return
+        filename = self.get_output_filename()
+        self.output_stats = self.new_output_stats()
+        resuming = self.get_status_counts()[0] > 0 and os.path.exists(filename)
+        
+        temp_file = f'{filename}.{os.getpid()}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as out:
+            if resuming:
+                # بازنویسی جریانی به NDJSON (فایل ممکن است آرایه نهایی اجرای قبلی باشد)
+                for product in self.iter_output_lines(filename):
+                    if product_key(product.get('url') or '') in self.refresh_keys:
+                        # پس از probe دوباره نوشته می‌شود
+                        continue
+                    out.write(json.dumps(product, ensure_ascii=False) + '\n')
+                    self.count_product(self.output_stats, product)
+        os.replace(temp_file, filename)
+        self.output_handle = open(filename, 'a', encoding='utf-8')
+        self.logger.info(f"📝 خروجی جریانی در {filename} - محصولات قبلی: {self.output_stats['total']}")
+
+    def append_output(self, product_data: Dict):
+        """
+        افزودن یک محصول به فایل خروجی جریانی
+        """
+        if self.output_handle is None:
+            self.output_handle = open(self.get_output_filename(), 'a', encoding='utf-8')
+        self.output_handle.write(json.dumps(product_data, ensure_ascii=False) + '\n')
+        self.output_handle.flush()
+        self.count_product(self.output_stats, product_data)
+
+    def finalize_stream_output(self, filename: str):
+        """
+        تبدیل جریانی NDJSON به آرایه JSON نهایی با حذف تکراری‌ها و rename اتمیک
+        """
+        if self.output_handle is not None:
+            self.output_handle.close()
+            self.output_handle = None
+        if not os.path.exists(filename):
+            return
+        self.output_stats = self.write_product_array(filename, self.iter_output_lines(filename))
 
-    def process_single_product_thread(self, product_url: str, tab_handle: str, thread_id: int, results_queue: queue.Queue):
+    def write_product_array(self, filename: str, products) -> Dict[str, int]:
         """
-        پردازش یک محصول در thread جداگانه
+        نوشتن جریانی محصولات به صورت آرایه JSON با حذف تکراری‌ها و rename اتمیک
         """
+        seen_keys = set()
+        stats = self.new_output_stats()
+        # نام موقت یکتا برای هر پردازه تا گره‌هایی که همزمان خروجی می‌گیرند فایل هم را نبرند
+        temp_file = f'{filename}.{os.getpid()}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as out:
+            out.write('[')
+            for product in products:
+                # محصولی که پیش از ثبت در ژورنال crash کرده ممکن است دوباره نوشته شده باشد
+                key = product_key(product.get('url') or '')
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                out.write(('\n' if not stats['total'] else ',\n') + json.dumps(product, ensure_ascii=False))
+                self.count_product(stats, product)
+            out.write('\n]\n')
+        os.replace(temp_file, filename)
+        return stats
+
+    def save_data(self):
+        """
+        ذخیره اطلاعات استخراج شده
+        """
+        filename = self.get_output_filename()
+        
         try:
-            # تاخیر کوچک برای جلوگیری از تداخل و کاهش فشار connection pool
-            time.sleep(thread_id * 0.5)
-            
-            # تغییر به تب مشخص
-            self.driver.switch_to.window(tab_handle)
-            
-            self.logger.info(f"📊 Thread {thread_id}: شروع استخراج {product_url}")
-            product_data = self.extract_product_data_in_tab(product_url, tab_handle)
-            
-            # قرار دادن نتیجه در صف
-            results_queue.put({
-                'thread_id': thread_id,
-                'product_data': product_data,
-                'success': product_data is not None
-            })
+            if self.is_streaming_output():
+                self.finalize_stream_output(filename)
+                stats = self.output_stats
+            elif self.state_store:
+                # خروجی مستقیم از جدول products بدون بارگذاری همه محصولات در حافظه
+                stats = self.write_product_array(filename, self.state_store.iter_products())
+            else:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(self.scraped_products, f, ensure_ascii=False, indent=2)
+                stats = self.new_output_stats()
+                for product in self.scraped_products:
+                    self.count_product(stats, product)
+                
+            self.logger.info(f"💾 اطلاعات در فایل {filename} ذخیره شد")
             
-            self.logger.info(f"✅ Thread {thread_id}: تکمیل شد")
+            print(f"\n📈 آمار نهایی:")
+            print(f"🔢 تعداد کل محصولات: {stats['total']}")
+            print(f"✅ محصولات موفق: {stats['successful']}")
+            print(f"🏷️ محصولات با برند: {stats['with_brand']}")
+            print(f"🔧 محصولات با مشخصات کلیدی: {stats['with_key_specs']}")
+            print(f"📋 محصولات با مشخصات کلی: {stats['with_general_specs']}")
+            print(f"❌ محصولات ناموفق: {stats['total'] - stats['successful']}")
+            self.report_blocking_stats()
             
         except Exception as e:
-            self.logger.error(f"❌ Thread {thread_id} خطا: {e}")
-            results_queue.put({
-                'thread_id': thread_id,
-                'product_data': None,
-                'success': False
-            })
+            self.logger.error(f"❌ خطا در ذخیره اطلاعات: {e}")
+            
+    def extract_product_data_in_tab(self, product_url: str) -> Optional[Dict]:
+        """
+        استخراج اطلاعات محصول با درایور اختصاصی کارگر
+        """
+        return self.run_extraction_pipeline(product_url)
 
 def main():
     """
     تابع اصلی برنامه
     """
+    parser = argparse.ArgumentParser(description='ربات اسکرپینگ محصولات')
+    parser.add_argument('configs', nargs='*', default=['config.json'], help='فایل‌های کانفیگ فروشگاه‌ها')
+    parser.add_argument('--workers', type=int, help='تعداد کارگرهای مرورگر مشترک بین فروشگاه‌ها')
+    parser.add_argument('--stop-browsers', action='store_true', help='بستن نمونه‌های گرم Chrome حالت daemon')
+    parser.add_argument('--node-id', help='شناسه این گره در حالت توزیع‌شده (پیش‌فرض hostname-pid)')
+    parser.add_argument('--profile', help='پروفایل استخراج (full، catalog، titles یا extraction.profiles کانفیگ)')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🚀 ربات اسکرپینگ محصولات بهینه‌شده")
     print("=" * 60)
     
-    config_file = "config.json"
-    if not os.path.exists(config_file):
-        print(f"❌ فایل کانفیگ یافت نشد: {config_file}")
-        print("لطفاً ابتدا فایل config.json را ایجاد کنید")
+    for config_file in args.configs:
+        if not os.path.exists(config_file):
+            print(f"❌ فایل کانفیگ یافت نشد: {config_file}")
+            print("لطفاً ابتدا فایل config.json را ایجاد کنید")
+            return
+    
+    scrapers = [ProductScraper(config_file) for config_file in args.configs]
+    if args.node_id:
+        for scraper in scrapers:
+            scraper.distributed['node_id'] = args.node_id
+    if args.profile:
+        for scraper in scrapers:
+            scraper.extraction_fields = scraper.load_extraction_profile(args.profile)
+    if args.stop_browsers:
+        for scraper in scrapers:
+            if scraper.browser_daemon:
+                print(f"🛑 {scraper.browser_daemon.stop_all()} نمونه Chrome بسته شد ({scraper.browser_daemon.directory})")
         return
-        
-    scraper = ProductScraper(config_file)
-    scraper.run_parallel_with_resume()
+    
+    if len(scrapers) == 1 and args.workers is None:
+        scrapers[0].run_parallel_with_resume()
+    else:
+        MultiShopRunner(scrapers, args.workers).run()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+استخراج اطلاعات محصول از HTML خام بدون مرورگر
+(درخت DOM سبک + زیرمجموعه‌ای از سلکتورهای CSS)
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+from typing import List, Dict, Optional, Tuple
+
+
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+}
+
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'table', 'tr', 'td', 'th', 'ul'
+}
+
+# محتوای این تگ‌ها جزو متن قابل مشاهده نیست
+HIDDEN_TAGS = {'script', 'style', 'noscript', 'template', 'head'}
+
+BRAND_PATTERN = re.compile(r'(.+?)\s*\((.+?)\)')
+
+# فیلدهای قابل انتخاب product_data و پروفایل‌های آماده استخراج
+EXTRACTION_FIELDS = ('title', 'categories', 'brand', 'specifications')
+EXTRACTION_PROFILES = {
+    'full': EXTRACTION_FIELDS,
+    'catalog': ('title', 'categories', 'brand'),
+    'titles': ('title',)
+}
+
+
+class DomNode:
+    """
+    یک عنصر در درخت DOM ساده‌شده
+    """
+
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag: str, attrs: Optional[Dict[str, str]] = None, parent: Optional['DomNode'] = None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+
+    @property
+    def classes(self) -> List[str]:
+        return self.attrs.get('class', '').split()
+
+    def element_children(self) -> List['DomNode']:
+        return [child for child in self.children if isinstance(child, DomNode)]
+
+    def iter_descendants(self):
+        """
+        پیمایش عمقی عناصر زیرمجموعه به ترتیب سند
+        """
+        stack = list(reversed(self.element_children()))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.element_children()))
+
+
+class _TreeBuilder(HTMLParser):
+    """
+    ساخت درخت DOM با تحمل HTML نامعتبر
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = DomNode('#document')
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = DomNode(tag, {name: (value or '') for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        node = DomNode(tag, {name: (value or '') for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+
+    def handle_endtag(self, tag):
+        # بستن تگ‌هایی که بسته نشده‌اند تا رسیدن به تگ متناظر
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        if data:
+            self.stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> DomNode:
+    """
+    تبدیل HTML به درخت DomNode
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def text_content(node: Optional[DomNode]) -> str:
+    """
+    متن قابل مشاهده عنصر (تقریب innerText)
+    """
+    if node is None:
+        return ''
+    parts = []
+
+    def walk(current: DomNode):
+        for child in current.children:
+            if isinstance(child, DomNode):
+                if child.tag in HIDDEN_TAGS:
+                    continue
+                if child.tag in BLOCK_TAGS:
+                    parts.append('\n')
+                walk(child)
+                if child.tag in BLOCK_TAGS:
+                    parts.append('\n')
+            else:
+                parts.append(child)
+
+    walk(node)
+    lines = [' '.join(line.split()) for line in ''.join(parts).split('\n')]
+    return '\n'.join(line for line in lines if line).strip()
+
+
+# ---------------------------------------------------------------------------
+# سلکتورهای CSS
+# ---------------------------------------------------------------------------
+
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<ws>\s*>\s*|\s*\+\s*|\s*~\s*|\s+)
+  | (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<val>"[^"]*"|'[^']*'|[^\]\s]+)\s*)?\]
+  | :(?P<pseudo>[\w-]+)(?:\((?P<arg>[^)]*)\))?
+''', re.VERBOSE)
+
+
+class SelectorError(ValueError):
+    """
+    سلکتور پشتیبانی‌نشده یا نامعتبر
+    """
+
+
+def _split_groups(selector: str) -> List[str]:
+    groups, depth, current = [], 0, []
+    for char in selector:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            groups.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    groups.append(''.join(current).strip())
+    return [group for group in groups if group]
+
+
+def _parse_nth(arg: str):
+    arg = arg.replace(' ', '').lower()
+    if arg == 'odd':
+        return 2, 1
+    if arg == 'even':
+        return 2, 0
+    if 'n' not in arg:
+        return 0, int(arg)
+    a_part, _, b_part = arg.partition('n')
+    a = -1 if a_part == '-' else (1 if a_part in ('', '+') else int(a_part))
+    b = int(b_part) if b_part else 0
+    return a, b
+
+
+def _compile_compound(tokens: List[tuple]):
+    """
+    تبدیل یک compound selector به لیست شرط‌ها
+    """
+    checks = []
+    for kind, match in tokens:
+        if kind == 'tag':
+            tag = match.group('tag').lower()
+            if tag != '*':
+                checks.append(lambda node, tag=tag: node.tag == tag)
+        elif kind == 'id':
+            value = match.group('id')
+            checks.append(lambda node, value=value: node.attrs.get('id') == value)
+        elif kind == 'cls':
+            value = match.group('cls')
+            checks.append(lambda node, value=value: value in node.classes)
+        elif kind == 'attr':
+            checks.append(_attr_check(match.group('attr'), match.group('op'), match.group('val')))
+        elif kind == 'pseudo':
+            checks.append(_pseudo_check(match.group('pseudo'), match.group('arg')))
+    return checks
+
+
+def _attr_check(name: str, op: Optional[str], value: Optional[str]):
+    if value and value[0] in '"\'':
+        value = value[1:-1]
+    if op is None:
+        return lambda node: name in node.attrs
+    if op == '=':
+        return lambda node: node.attrs.get(name) == value
+    if op == '~=':
+        return lambda node: value in node.attrs.get(name, '').split()
+    if op == '^=':
+        return lambda node: node.attrs.get(name, '').startswith(value)
+    if op == '$=':
+        return lambda node: node.attrs.get(name, '').endswith(value)
+    if op == '*=':
+        return lambda node: value in node.attrs.get(name, '')
+    if op == '|=':
+        return lambda node: node.attrs.get(name, '') == value or node.attrs.get(name, '').startswith(value + '-')
+    raise SelectorError(f"عملگر پشتیبانی نمی‌شود: {op}")
+
+
+def _element_index(node: DomNode, reverse: bool = False, same_type: bool = False) -> int:
+    siblings = node.parent.element_children() if node.parent else [node]
+    if same_type:
+        siblings = [sibling for sibling in siblings if sibling.tag == node.tag]
+    if reverse:
+        siblings = list(reversed(siblings))
+    for index, sibling in enumerate(siblings, start=1):
+        if sibling is node:
+            return index
+    return 0
+
+
+def _nth_matches(index: int, a: int, b: int) -> bool:
+    if a == 0:
+        return index == b
+    return (index - b) % a == 0 and (index - b) // a >= 0
+
+
+def _pseudo_check(name: str, arg: Optional[str]):
+    name = name.lower()
+    if name == 'first-child':
+        return lambda node: _element_index(node) == 1
+    if name == 'last-child':
+        return lambda node: _element_index(node, reverse=True) == 1
+    if name in ('nth-child', 'nth-last-child', 'nth-of-type', 'nth-last-of-type'):
+        a, b = _parse_nth(arg or '')
+        reverse = 'last' in name
+        same_type = name.endswith('of-type')
+        return lambda node: _nth_matches(_element_index(node, reverse, same_type), a, b)
+    if name == 'not':
+        inner = compile_selector(arg or '')
+        return lambda node: not inner.matches(node)
+    raise SelectorError(f"شبه‌کلاس پشتیبانی نمی‌شود: :{name}")
+
+
+class CompiledSelector:
+    """
+    سلکتور CSS کامپایل‌شده (ترکیب‌کننده‌های فاصله، >، + و ~)
+    """
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.groups = [self._compile_group(group) for group in _split_groups(selector)]
+        if not self.groups:
+            raise SelectorError(f"سلکتور خالی: {selector!r}")
+
+    @staticmethod
+    def _compile_group(group: str):
+        """
+        تبدیل یک گروه به لیست (ترکیب‌کننده قبلی، شرط‌ها) از چپ به راست
+        """
+        parts, tokens, position = [], [], 0
+        combinator = None
+        while position < len(group):
+            match = _TOKEN_PATTERN.match(group, position)
+            if not match or match.end() == position:
+                raise SelectorError(f"سلکتور نامعتبر: {group!r}")
+            position = match.end()
+            if match.group('ws') is not None:
+                if tokens:
+                    parts.append((combinator, _compile_compound(tokens)))
+                    tokens = []
+                combinator = match.group('ws').strip() or ' '
+                continue
+            for kind in ('tag', 'id', 'cls', 'attr', 'pseudo'):
+                if match.group(kind):
+                    tokens.append((kind, match))
+                    break
+        if not tokens:
+            raise SelectorError(f"سلکتور ناقص: {group!r}")
+        parts.append((combinator, _compile_compound(tokens)))
+        return parts
+
+    def _matches_group(self, node: DomNode, group, index: int) -> bool:
+        combinator, checks = group[index]
+        if not all(check(node) for check in checks):
+            return False
+        if index == 0:
+            return True
+        if combinator == '>':
+            parent = node.parent
+            return parent is not None and parent.tag != '#document' and self._matches_group(parent, group, index - 1)
+        if combinator in ('+', '~'):
+            siblings = node.parent.element_children() if node.parent else []
+            position = next(i for i, sibling in enumerate(siblings) if sibling is node)
+            candidates = siblings[max(0, position - 1):position] if combinator == '+' else siblings[:position]
+            return any(self._matches_group(sibling, group, index - 1) for sibling in candidates)
+        ancestor = node.parent
+        while ancestor is not None and ancestor.tag != '#document':
+            if self._matches_group(ancestor, group, index - 1):
+                return True
+            ancestor = ancestor.parent
+        return False
+
+    def matches(self, node: DomNode) -> bool:
+        return any(self._matches_group(node, group, len(group) - 1) for group in self.groups)
+
+    def select(self, root: DomNode) -> List[DomNode]:
+        """
+        همه عناصر زیرمجموعه root که با سلکتور منطبق هستند (معادل querySelectorAll)
+        """
+        return [node for node in root.iter_descendants() if self.matches(node)]
+
+    def select_one(self, root: DomNode) -> Optional[DomNode]:
+        """
+        اولین عنصر منطبق به ترتیب سند (معادل querySelector)
+        """
+        for node in root.iter_descendants():
+            if self.matches(node):
+                return node
+        return None
+
+
+_selector_cache: Dict[str, CompiledSelector] = {}
+
+
+def compile_selector(selector: str) -> CompiledSelector:
+    """
+    کامپایل سلکتور با کش
+    """
+    compiled = _selector_cache.get(selector)
+    if compiled is None:
+        compiled = CompiledSelector(selector)
+        _selector_cache[selector] = compiled
+    return compiled
+
+
+def select(root: DomNode, selector: Optional[str]) -> List[DomNode]:
+    if not selector:
+        return []
+    try:
+        return compile_selector(selector).select(root)
+    except SelectorError:
+        return []
+
+
+def select_one(root: DomNode, selector: Optional[str]) -> Optional[DomNode]:
+    if not selector:
+        return None
+    try:
+        return compile_selector(selector).select_one(root)
+    except SelectorError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# استخراج اطلاعات محصول
+# ---------------------------------------------------------------------------
+
+def detect_brand(category_text: str) -> Optional[str]:
+    """
+    تشخیص برند از متن دسته‌بندی به شکل «نام فارسی (English)»
+    """
+    match = BRAND_PATTERN.match(category_text.strip())
+    if match:
+        return f"{match.group(1).strip()} ({match.group(2).strip()})"
+    return None
+
+
+def extract_json_ld_product(root: DomNode) -> Dict:
+    """
+    داده محصول از اسکریپت‌های application/ld+json (در صورت وجود)
+    """
+    for node in root.iter_descendants():
+        if node.tag != 'script' or node.attrs.get('type') != 'application/ld+json':
+            continue
+        raw = ''.join(child for child in node.children if isinstance(child, str))
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            continue
+        candidates = data if isinstance(data, list) else data.get('@graph', [data]) if isinstance(data, dict) else []
+        for item in candidates:
+            if isinstance(item, dict) and item.get('@type') == 'Product':
+                return item
+    return {}
+
+
+def resolve_extraction_fields(config: Dict, profile: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    فیلدهای پروفایل استخراج (extraction.profile یا profile ورودی)؛
+    extraction.profiles پروفایل‌های آماده را تکمیل یا بازنویسی می‌کند و هر پروفایل باید title داشته باشد
+    """
+    extraction_config = config.get('extraction', {})
+    profiles = dict(EXTRACTION_PROFILES)
+    profiles.update(extraction_config.get('profiles', {}))
+    name = profile or extraction_config.get('profile', 'full')
+    if name not in profiles:
+        raise ValueError(f"پروفایل استخراج ناشناخته: {name}")
+    fields = tuple(field for field in EXTRACTION_FIELDS if field in profiles[name])
+    unknown = set(profiles[name]) - set(EXTRACTION_FIELDS)
+    if unknown or not fields:
+        raise ValueError(f"فیلدهای نامعتبر در پروفایل {name}: {', '.join(sorted(unknown)) or '(خالی)'}")
+    if 'title' not in fields:
+        # موفقیت محصول و بررسی حالت افزایشی به عنوان وابسته‌اند
+        raise ValueError(f"پروفایل استخراج {name} باید فیلد title را داشته باشد")
+    return fields
+
+
+def extract_product_from_html(html: str, product_url: str, selectors: Dict,
+                              fields: Tuple[str, ...] = EXTRACTION_FIELDS) -> Dict:
+    """
+    استخراج product_data با همان ساختار مسیر سلنیوم از HTML رندرشده سمت سرور
+    (فقط فیلدهای fields؛ بقیه مقدار خالی می‌گیرند)
+    """
+    root = parse_html(html)
+    spec_selectors = selectors.get('specifications', {})
+
+    product_data = {
+        'url': product_url,
+        'title': None,
+        'categories': [],
+        'brand': None,
+        'specifications': {
+            'key_specs': [],
+            'general_specs': []
+        }
+    }
+
+    if 'title' in fields:
+        product_data['title'] = text_content(select_one(root, selectors.get('product_title'))) or None
+
+    categories_found = []
+    category_selectors = selectors.get('categories', []) if 'categories' in fields or 'brand' in fields else []
+    for i, selector in enumerate(category_selectors):
+        element = select_one(root, selector)
+        if element is None:
+            break
+        name = text_content(element)
+        if name:
+            categories_found.append({'level': i + 1, 'name': name})
+
+    if categories_found:
+        brand = detect_brand(categories_found[-1]['name'])
+        if brand:
+            categories_found = categories_found[:-1]
+            if 'brand' in fields:
+                product_data['brand'] = brand
+        if 'categories' in fields:
+            product_data['categories'] = categories_found
+
+    key_section = spec_selectors.get('key_specs_section') or ''
+    spec_items = select(root, spec_selectors.get('spec_items')) if 'specifications' in fields else []
+    for item in spec_items:
+        title = _scoped_text(item, spec_selectors.get('spec_title'))
+        body = _scoped_text(item, spec_selectors.get('spec_value'))
+        if not title or not body:
+            continue
+        item_class = item.attrs.get('class', '')
+        is_key = (key_section and key_section in item_class) or 'key' in item_class.lower()
+        product_data['specifications']['key_specs' if is_key else 'general_specs'].append({
+            'title': title,
+            'body': body
+        })
+
+    # داده ساخت‌یافته صفحه برای فیلدهایی که سلکتورها پیدا نکردند
+    missing_title = 'title' in fields and not product_data['title']
+    missing_brand = 'brand' in fields and not product_data['brand']
+    if missing_title or missing_brand:
+        json_ld = extract_json_ld_product(root)
+        if missing_title and isinstance(json_ld.get('name'), str):
+            product_data['title'] = json_ld['name'].strip() or None
+        brand = json_ld.get('brand')
+        if missing_brand and isinstance(brand, dict) and brand.get('name'):
+            product_data['brand'] = str(brand['name']).strip()
+
+    return product_data
+
+
+def _scoped_text(item: DomNode, selector: Optional[str]) -> str:
+    """
+    متن اولین زیرعنصر item منطبق با سلکتور (معادل element.querySelector)
+    """
+    return text_content(select_one(item, selector))
@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch):
+    """
+    ساخت ProductScraper با کانفیگ موقت در یک دایرکتوری کاری تازه
+    """
+    from scraper import ProductScraper
+    monkeypatch.chdir(tmp_path)
+
+    def factory(name='shop', **config):
+        config.setdefault('selectors', {'product_title': 'h1', 'categories': []})
+        path = tmp_path / f'{name}.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        return ProductScraper(str(path))
+    return factory
+
+
+@pytest.fixture(scope='module')
+def selectors():
+    """
+    سلکتورهای config.json مخزن (همان سلکتورهای سایت بنچمارک)
+    """
+    with open(os.path.join(REPO_DIR, 'config.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['selectors']
+
+
+@pytest.fixture(scope='module')
+def site():
+    from bench_server import BenchmarkSite
+    return BenchmarkSite(num_products=7, slow_every=0, missing_specs_every=7)
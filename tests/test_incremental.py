@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from scraper import ProductScraper, SqliteStateStore, product_key
+
+URLS = [f'https://torob.com/p/00000000-0000-4000-8000-{index:012d}/item-{index}/' for index in range(6)]
+
+
+def fingerprint(url):
+    return {'etag': None, 'last_modified': None, 'content_hash': None, 'record': {'url': url, 'title': 't'}, 'checked_at': 0}
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def factory(**config):
+        config.setdefault('selectors', {'product_title': 'h1', 'categories': []})
+        config.setdefault('incremental', {'enabled': True})
+        with open(tmp_path / 'shop.json', 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        scraper = ProductScraper(str(tmp_path / 'shop.json'))
+        scraper.load_progress()
+        scraper.fingerprints = {product_key(url).hex(): fingerprint(url) for url in URLS[:4]}
+        return scraper
+    return factory
+
+
+def test_store_epoch_resets_only_after_completion(tmp_path):
+    path = str(tmp_path / 'state.db')
+    first, second = SqliteStateStore(path, 'shop'), SqliteStateStore(path, 'shop')
+    first.filter_remaining(URLS)
+    for url in URLS:
+        first.record_result(url, True, {'url': url})
+    keys = [product_key(url) for url in URLS[:4]]
+
+    assert first.begin_epoch(keys) == (1, 4)
+    first.record_result(URLS[0], True, {'url': URLS[0]})
+    # گره دوم که دیرتر شروع می‌کند دور باز را ادامه می‌دهد و نتایج را pending نمی‌کند
+    assert second.begin_epoch(keys) == (1, None)
+    assert second.status_counts() == {'done': 3, 'pending': 3}
+
+    second.complete_epoch(1)
+    assert first.begin_epoch(keys) == (2, 1)
+    first.close()
+    second.close()
+
+
+def test_json_epoch_resumes_interrupted_run(make_scraper):
+    scraper = make_scraper()
+    scraper.processed_keys = {product_key(url) for url in URLS}
+    scraper.start_incremental_epoch()
+    assert scraper.incremental_epoch['id'] == 1
+    assert scraper.processed_keys == {product_key(url) for url in URLS[4:]}
+    scraper.collect_result({'url': URLS[0], 'success': True, 'product_data': {'url': URLS[0], 'title': 't'}})
+    scraper.close_journal()
+
+    # اجرای قطع‌شده دوباره شروع می‌شود: محصول بررسی‌شده دوباره در صف قرار نمی‌گیرد
+    resumed = make_scraper()
+    resumed.start_incremental_epoch()
+    assert resumed.incremental_epoch == {'id': 1, 'started_at': scraper.incremental_epoch['started_at'], 'completed': False}
+    assert product_key(URLS[0]) in resumed.processed_keys
+    assert resumed.refresh_keys == set()
+
+    resumed.complete_incremental_epoch()
+    resumed.save_progress()
+    resumed.close_journal()
+    next_run = make_scraper()
+    next_run.start_incremental_epoch()
+    assert next_run.incremental_epoch['id'] == 2
+    assert next_run.processed_keys == {product_key(url) for url in URLS[4:]}
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None, data=b''):
+        self.status = status
+        self.headers = headers or {}
+        self.data = data
+
+
+class FakePool:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def request(self, method, url, headers=None):
+        self.requests.append((method, headers))
+        return self.response
+
+
+def probe(scraper, url, response):
+    pool = FakePool(response)
+    scraper.get_http_pool = lambda: pool
+    return scraper.probe_product_changes(url), pool.requests
+
+
+def test_probe_skips_products_without_fingerprint(make_scraper):
+    scraper = make_scraper()
+    assert probe(scraper, URLS[5], FakeResponse(200)) == (None, [])
+
+
+@pytest.mark.parametrize('status, etag, unchanged', [(304, None, True), (200, '"v1"', True), (200, '"v2"', False)])
+def test_probe_uses_head_without_http_fetch(make_scraper, status, etag, unchanged):
+    scraper = make_scraper()
+    scraper.fingerprints[product_key(URLS[0]).hex()].update(etag='"v1"', content_hash='abc')
+    result, requests = probe(scraper, URLS[0], FakeResponse(status, {'ETag': etag} if etag else {}))
+    assert requests == [('HEAD', {'If-None-Match': '"v1"'})]
+    assert result['unchanged'] is unchanged
+    assert result['html'] is None
+    assert result['content_hash'] == ('abc' if unchanged else None)
+
+
+def test_probe_downloads_body_for_http_fetch(make_scraper):
+    scraper = make_scraper(http_fetch={'enabled': True})
+    html = '<html><body><h1>new title</h1></body></html>'
+    result, requests = probe(scraper, URLS[0], FakeResponse(200, {'Content-Type': 'text/html'}, html.encode('utf-8')))
+    assert requests == [('GET', {})]
+    assert result['html'] == html
+    assert result['unchanged'] is False
+
+
+def test_fingerprint_hash_from_extracted_data(make_scraper):
+    scraper = make_scraper()
+    product_data = {'url': URLS[5], 'title': 't', 'categories': [], 'brand': None, 'specifications': {}}
+    scraper.update_fingerprint(URLS[5], None, product_data)
+    entry = scraper.fingerprints[product_key(URLS[5]).hex()]
+    assert entry['content_hash'] == scraper.compute_content_hash(product_data)
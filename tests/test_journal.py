@@ -0,0 +1,73 @@
+import json
+import os
+
+from scraper import product_key
+
+URLS = [f'https://torob.com/p/00000000-0000-4000-8000-{index:012d}/item-{index}/' for index in range(20)]
+
+
+def make_result(url, success=True):
+    return {
+        'url': url,
+        'success': success,
+        'product_data': {'url': url, 'title': f'title {url}'} if success else None,
+        'reused': False,
+        'error': None if success else 'missing title',
+        'error_class': None if success else 'transient'
+    }
+
+
+def test_journal_replay_restores_results(make_scraper):
+    scraper = make_scraper()
+    scraper.load_progress()
+    for url in URLS[:3]:
+        scraper.collect_result(make_result(url))
+    scraper.collect_result(make_result(URLS[3], success=False))
+    scraper.close_journal()
+    assert not os.path.exists(scraper.progress_file)
+
+    resumed = make_scraper()
+    resumed.load_progress()
+    assert resumed.processed_keys == {product_key(url) for url in URLS[:3]}
+    assert resumed.failed_keys == {product_key(URLS[3])}
+    assert [product['url'] for product in resumed.scraped_products] == URLS[:3]
+
+
+def test_journal_replay_ignores_torn_line_and_later_success(make_scraper):
+    scraper = make_scraper()
+    scraper.load_progress()
+    scraper.collect_result(make_result(URLS[0], success=False))
+    scraper.collect_result(make_result(URLS[0]))
+    scraper.close_journal()
+    with open(scraper.get_journal_file(), 'a', encoding='utf-8') as f:
+        f.write('{"key": "' + product_key(URLS[1]).hex() + '", "status": "ok", "prod')
+
+    resumed = make_scraper()
+    resumed.load_progress()
+    assert resumed.processed_keys == {product_key(URLS[0])}
+    assert resumed.failed_keys == set()
+    assert len(resumed.scraped_products) == 1
+
+
+def test_journal_compaction(make_scraper):
+    scraper = make_scraper(performance={'checkpoint_interval': 4})
+    scraper.load_progress()
+    for url in URLS[:5]:
+        scraper.collect_result(make_result(url))
+    scraper.close_journal()
+
+    # چهار رکورد اول در snapshot فشرده شده‌اند و فقط رکورد پنجم در ژورنال مانده است
+    with open(scraper.progress_file, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert len(snapshot['processed_keys']) == 4
+    with open(scraper.get_journal_file(), 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+    resumed = make_scraper(performance={'checkpoint_interval': 4})
+    resumed.load_progress()
+    assert resumed.processed_keys == {product_key(url) for url in URLS[:5]}
+    assert [product['url'] for product in resumed.scraped_products] == URLS[:5]
+
+    resumed.save_progress()
+    resumed.close_journal()
+    assert os.path.getsize(resumed.get_journal_file()) == 0
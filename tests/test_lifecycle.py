@@ -0,0 +1,21 @@
+from scraper import BrowserSession
+
+
+def test_memory_is_sampled_on_interval(make_scraper):
+    scraper = make_scraper(browser_settings={'recycle_rss_mb': 100, 'rss_check_interval': 60, 'recycle_after_pages': 0})
+    scraper.create_driver = lambda port=0: object()
+    walks = []
+    scraper.get_browser_pids = lambda driver: walks.append(driver) or []
+    session = BrowserSession(scraper, 0)
+    session.start()
+
+    for _ in range(20):
+        session.end_page()
+        assert session.recycle_reason() is None
+    assert walks == []
+
+    # پس از گذشت بازه، حافظه یک بار خوانده می‌شود
+    session.next_rss_check = 0.0
+    session.recycle_reason()
+    session.recycle_reason()
+    assert len(walks) == 1
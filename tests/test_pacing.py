@@ -0,0 +1,128 @@
+import json
+import time
+
+import pytest
+
+from selenium.common.exceptions import TimeoutException
+
+from scraper import HostPacer, ProductScraper
+
+URL = 'https://torob.com/p/00000000-0000-4000-8000-000000000001/item/'
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def factory(name, **config):
+        config.setdefault('selectors', {'product_title': 'h1', 'categories': []})
+        path = tmp_path / f'{name}.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        return ProductScraper(str(path))
+    return factory
+
+
+def test_shops_share_one_pacer(make_scraper):
+    first = make_scraper('shop_a', delays={'min_host_interval': 0.2})
+    second = make_scraper('shop_b')
+    assert first.host_pacer is second.host_pacer
+    assert first.min_host_interval == 0.2
+    assert second.min_host_interval == 0
+
+
+def test_host_floor_applies_to_every_shop():
+    pacer = HostPacer()
+    pacer.wait(URL, 0.1)
+    start = time.monotonic()
+    # فروشگاه دوم کف فاصله ندارد اما نوبت میزبان را رعایت می‌کند
+    pacer.wait(URL)
+    pacer.wait(URL)
+    assert time.monotonic() - start >= 0.18
+    assert pacer.get_interval('torob.com') == 0.1
+    assert pacer.get_interval('other.example') == 0
+
+
+SETTINGS = {'min_interval': 0.0, 'max_interval': 4.0, 'interval_step': 0.5, 'backoff_cooldown': 0.0}
+
+
+def test_adjust_respects_floor_and_bounds():
+    pacer = HostPacer()
+    pacer.wait(URL, 0.2)
+    assert pacer.adjust('torob.com', True, SETTINGS) == (0.2, 0.5)
+    assert pacer.adjust('torob.com', True, SETTINGS) == (0.5, 1.0)
+    for _ in range(5):
+        pacer.adjust('torob.com', True, SETTINGS)
+    assert pacer.get_interval('torob.com') == 4.0
+    for _ in range(10):
+        pacer.adjust('torob.com', False, SETTINGS)
+    # کنترل‌کننده فاصله را کمتر از کف کانفیگ نمی‌کند
+    assert pacer.get_interval('torob.com') == 0.2
+
+
+def test_increase_waits_for_backoff_cooldown():
+    pacer = HostPacer()
+    settings = dict(SETTINGS, backoff_cooldown=60.0)
+    pacer.adjust('torob.com', True, settings)
+    pacer.adjust('torob.com', True, settings)
+    assert pacer.adjust('torob.com', False, settings) == (1.0, 1.0)
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.limits = []
+
+    def set_limit(self, shop, limit):
+        self.limits.append((shop, limit))
+
+
+def make_result(host, success=True, **fields):
+    result = {'url': f'https://{host}/p/item/', 'success': success, 'exception': None, 'blocked': None, 'navigation': 0.5}
+    result.update(fields)
+    return result
+
+
+def adaptive_config(**overrides):
+    adaptive = {'enabled': True, 'window': 4, 'max_workers': 8, 'min_workers': 1, 'backoff_cooldown': 0}
+    adaptive.update(overrides)
+    return {'adaptive': adaptive, 'performance': {'concurrent_tabs': 4}}
+
+
+def observe_window(scraper, scheduler, results):
+    for result in results:
+        scraper.controller.observe(result, scheduler)
+
+
+def test_controller_increases_on_healthy_window(make_scraper):
+    scraper = make_scraper('shop_a', **adaptive_config())
+    scheduler = RecordingScheduler()
+    observe_window(scraper, scheduler, [make_result('healthy.test')] * 3)
+    assert scheduler.limits == []
+    observe_window(scraper, scheduler, [make_result('healthy.test')])
+    assert scheduler.limits == [('shop_a', 5)]
+    assert scraper.controller.limit == 5
+
+
+@pytest.mark.parametrize('host, bad_result', [
+    ('blocked.test', {'blocked': 'HTTP 429', 'success': False}),
+    ('timeout.test', {'exception': TimeoutException, 'success': False, 'navigation': None}),
+    ('slow.test', {'navigation': 30.0}),
+])
+def test_controller_decreases_on_bad_signal(make_scraper, host, bad_result):
+    scraper = make_scraper('shop_a', **adaptive_config(max_error_rate=1, latency_target=10))
+    scheduler = RecordingScheduler()
+    observe_window(scraper, scheduler, [make_result(host)] * 2 + [make_result(host, **bad_result)] * 2)
+    assert scheduler.limits == [('shop_a', 2)]
+    assert scraper.host_pacer.get_interval(host) == 0.5
+
+
+def test_backoff_slows_every_shop_on_the_host(make_scraper):
+    first = make_scraper('shop_a', **adaptive_config(backoff_cooldown=60))
+    second = make_scraper('shop_b', **adaptive_config(backoff_cooldown=60))
+    scheduler = RecordingScheduler()
+    observe_window(first, scheduler, [make_result('shared.test', success=False, blocked='captcha')] * 4)
+    assert first.host_pacer.get_interval('shared.test') == 0.5
+    # پنجره سالم فروشگاه دوم تا پایان cooldown فاصله مشترک میزبان را کم نمی‌کند
+    observe_window(second, scheduler, [make_result('shared.test')] * 4)
+    assert second.host_pacer.get_interval('shared.test') == 0.5
+    assert scheduler.limits == [('shop_a', 2), ('shop_b', 5)]
@@ -0,0 +1,28 @@
+import uuid
+
+from scraper import product_key, parse_product_key
+
+
+def test_product_key_uses_torob_uuid():
+    product_uuid = uuid.uuid4()
+    key = product_key(f'https://torob.com/p/{product_uuid}/some-slug/')
+    assert key == product_uuid.bytes
+    # slug، کوئری و UUID بدون خط تیره روی کلید اثری ندارند
+    assert product_key(f'https://torob.com/p/{product_uuid.hex}/other-slug/?utm=1') == key
+    assert product_key(f'https://torob.com/p/{product_uuid}/') == key
+
+
+def test_product_key_hashes_other_urls():
+    key = product_key('https://shop.example/item/42?color=red#reviews')
+    assert len(key) == 16
+    assert key == product_key('https://shop.example/item/42?color=red')
+    assert key != product_key('https://shop.example/item/42?color=blue')
+    # URL کدگذاری‌شده و فارسی کلید یکسان دارند
+    assert product_key('https://shop.example/%D9%85%D8%AD%D8%B5%D9%88%D9%84') == product_key('https://shop.example/محصول')
+
+
+def test_parse_product_key():
+    url = 'https://shop.example/item/42'
+    key = product_key(url)
+    assert parse_product_key(key.hex()) == key
+    assert parse_product_key(url) == key
@@ -0,0 +1,46 @@
+import pytest
+
+from static_extractor import extract_product_from_html, resolve_extraction_fields, EXTRACTION_FIELDS
+
+
+def test_extract_titles_profile(site, selectors):
+    product = site.products[1]
+    fields = resolve_extraction_fields({}, 'titles')
+    data = extract_product_from_html(site.render_product(product), 'https://torob.com' + product['path'], selectors, fields)
+
+    assert data['title'] == product['title']
+    assert data['categories'] == []
+    assert data['brand'] is None
+    assert data['specifications'] == {'key_specs': [], 'general_specs': []}
+
+
+def test_resolve_extraction_fields():
+    assert resolve_extraction_fields({}) == EXTRACTION_FIELDS
+    assert resolve_extraction_fields({'extraction': {'profile': 'catalog'}}) == ('title', 'categories', 'brand')
+    custom = {'extraction': {'profiles': {'specs': ['specifications', 'title']}}}
+    assert resolve_extraction_fields(custom, 'specs') == ('title', 'specifications')
+    config = {'extraction': {'profiles': {'no_title': ['brand', 'categories'], 'typo': ['title', 'brnd'], 'empty': []}}}
+    for profile in ('unknown', 'typo', 'empty'):
+        with pytest.raises(ValueError):
+            resolve_extraction_fields(config, profile)
+
+
+def test_profile_without_title_is_rejected():
+    config = {'extraction': {'profiles': {'no_title': ['brand', 'categories']}}}
+    with pytest.raises(ValueError, match='title'):
+        resolve_extraction_fields(config, 'no_title')
+
+
+def test_scraper_falls_back_to_full_profile(make_scraper):
+    scraper = make_scraper(extraction={'profile': 'no_title', 'profiles': {'no_title': ['brand']}})
+    assert scraper.extraction_fields == EXTRACTION_FIELDS
+
+
+@pytest.mark.parametrize('profile, stages', [
+    ('full', ['extract_title_stage', 'extract_categories_stage', 'extract_specifications_stage']),
+    ('catalog', ['extract_title_stage', 'extract_categories_stage']),
+    ('titles', ['extract_title_stage']),
+])
+def test_extraction_stages_follow_profile(make_scraper, profile, stages):
+    scraper = make_scraper(extraction={'profile': profile})
+    assert [stage.__name__ for stage in scraper.get_extraction_stages()] == stages
@@ -0,0 +1,92 @@
+import json
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException, InvalidSelectorException
+
+from scraper import FairScheduler
+
+URL = 'https://torob.com/p/00000000-0000-4000-8000-000000000001/item/'
+
+
+def test_retry_lane_yields_to_fresh_work():
+    scheduler = FairScheduler()
+    scheduler.add_shop('shop', 2)
+    scheduler.put_retry('shop', 'retry', 0)
+    scheduler.put('shop', 'fresh')
+    assert scheduler.get() == ('shop', 'fresh')
+    assert scheduler.get() == ('shop', 'retry')
+
+
+def test_retry_lane_waits_for_backoff():
+    scheduler = FairScheduler()
+    scheduler.add_shop('shop', 1)
+    scheduler.put_retry('shop', 'later', 0.3)
+    scheduler.put_retry('shop', 'sooner', 0.1)
+    start = time.monotonic()
+    assert scheduler.get() == ('shop', 'sooner')
+    assert time.monotonic() - start >= 0.09
+    scheduler.task_done('shop')
+    assert scheduler.get() == ('shop', 'later')
+    assert time.monotonic() - start >= 0.29
+
+
+def failed_result(error_class, error='TimeoutException: page load'):
+    return {'url': URL, 'success': False, 'product_data': None, 'error': error, 'error_class': error_class}
+
+
+def test_transient_failures_retry_with_backoff(make_scraper):
+    scraper = make_scraper(performance={'retry_attempts': 2, 'retry_backoff': 10, 'retry_backoff_max': 15})
+    first = scraper.plan_retry(failed_result('transient'))
+    second = scraper.plan_retry(failed_result('transient'))
+    # backoff نمایی با jitter بین ۰٫۵ و ۱٫۵ برابر و سقف retry_backoff_max
+    assert 5 <= first <= 15
+    assert 7.5 <= second <= 22.5
+    final = failed_result('transient')
+    assert scraper.plan_retry(final) is None
+    assert final['attempts'] == 3
+
+
+def test_permanent_failures_go_straight_to_dead_letters(make_scraper):
+    scraper = make_scraper(performance={'retry_attempts': 3})
+    result = failed_result('permanent', 'missing title')
+    assert scraper.plan_retry(result) is None
+    scraper.collect_result(result)
+    assert [entry['url'] for entry in scraper.dead_letters] == [URL]
+    assert scraper.dead_letters[0]['attempts'] == 1
+    assert scraper.dead_letters[0]['error_class'] == 'permanent'
+
+
+def test_dead_letter_file_merges_runs(make_scraper):
+    scraper = make_scraper()
+    scraper.collect_result(failed_result('permanent', 'missing title'))
+    scraper.save_dead_letters()
+    other = 'https://shop.example/item/2'
+    next_run = make_scraper()
+    next_run.collect_result(dict(failed_result('transient'), url=other, attempts=4))
+    next_run.save_dead_letters()
+    with open(next_run.get_dead_letter_file(), 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    assert [(entry['url'], entry['attempts']) for entry in entries] == [(URL, 1), (other, 4)]
+
+
+@pytest.mark.parametrize('outcome, error, error_class', [
+    ({'url': URL}, 'missing title', 'permanent'),
+    (None, 'no product data', 'permanent'),
+    (TimeoutException('page load'), 'TimeoutException: Message: page load\n', 'transient'),
+    (InvalidSelectorException('bad css'), None, 'permanent'),
+])
+def test_worker_classifies_failures(make_scraper, outcome, error, error_class):
+    scraper = make_scraper()
+
+    def pipeline(product_url):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    scraper.run_extraction_pipeline = pipeline
+    scraper.collect_blocking_stats = lambda: None
+    result = scraper.process_product_in_worker(URL, 0)
+    assert result['success'] is False
+    assert result['error_class'] == error_class
+    if error is not None:
+        assert result['error'] == error
@@ -0,0 +1,10 @@
+import os
+
+from scraper import MultiShopRunner
+
+
+def test_runner_uses_configured_workers(make_scraper):
+    tabs = (os.cpu_count() or 2) + 2
+    scrapers = [make_scraper('a', performance={'concurrent_tabs': tabs}), make_scraper('b', performance={'concurrent_tabs': 1})]
+    assert MultiShopRunner(scrapers).num_workers == tabs + 1
+    assert MultiShopRunner(scrapers, 3).num_workers == 3
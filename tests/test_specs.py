@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+FALLBACK_ITEMS = [{'title': 'حافظه داخلی', 'body': '128GB'}, {'title': 'وزن', 'body': '180g'}]
+
+
+class NoSpecsDriver:
+    """
+    صفحه‌ای بدون آیتم مشخصات اصلی که فقط روش جایگزین آن را می‌خواند
+    """
+
+    def __init__(self):
+        self.lookups = 0
+
+    def find_elements(self, by, value):
+        self.lookups += 1
+        return []
+
+    def execute_script(self, script, arguments):
+        return {'items': FALLBACK_ITEMS, 'truncated': False}
+
+
+@pytest.mark.parametrize('wait', [0.0, 0.3])
+def test_missing_specs_fall_back_after_short_poll(make_scraper, selectors, wait):
+    scraper = make_scraper(selectors=selectors, performance={'specs_fallback': {'wait': wait}}, delays={'element_interaction': 0.05})
+    scraper.driver = NoSpecsDriver()
+    start = time.monotonic()
+    specifications = scraper.extract_specifications('https://torob.com/p/x/')
+    assert time.monotonic() - start < wait + 1
+    assert specifications == {'key_specs': FALLBACK_ITEMS[:1], 'general_specs': FALLBACK_ITEMS[1:]}
+    assert scraper.driver.lookups >= 1
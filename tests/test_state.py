@@ -0,0 +1,119 @@
+import multiprocessing
+
+import pytest
+
+from scraper import SqliteStateStore
+
+URLS = [f'https://torob.com/p/00000000-0000-4000-8000-{index:012d}/item-{index}/' for index in range(20)]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / 'state.db')
+    opened = [SqliteStateStore(path, 'shop', journal_mode='DELETE') for _ in range(2)]
+    opened[0].filter_remaining(URLS)
+    yield opened
+    for store in opened:
+        store.close()
+
+
+def test_leases_are_exclusive(stores):
+    first, second = stores
+    claimed_first = first.claim('node-a', 60, 8)
+    claimed_second = second.claim('node-b', 60, 100)
+
+    assert claimed_first == URLS[:8]
+    assert claimed_second == URLS[8:]
+    assert second.claim('node-b', 60, 100) == []
+    assert first.lease_counts() == (0, len(URLS))
+
+
+def test_claim_respects_requested_urls(stores):
+    first, second = stores
+    assert first.claim('node-a', 60, 10, URLS[5:7]) == URLS[5:7]
+    assert second.claim('node-b', 60, 10, URLS[4:8]) == [URLS[4], URLS[7]]
+
+
+def test_expired_lease_can_be_claimed_again(stores):
+    first, second = stores
+    # اجاره منفی یعنی گره بلافاصله از کار افتاده است
+    assert first.claim('node-a', -1, 5) == URLS[:5]
+    assert second.claim('node-b', 60, 5) == URLS[:5]
+    # اجاره تمدیدشده گره b دیگر قابل برداشت نیست
+    assert second.renew_leases('node-b', 60) == 5
+    assert first.claim('node-a', 60, 5) == URLS[5:10]
+
+
+def test_finished_and_released_leases(stores):
+    first, second = stores
+    claimed = first.claim('node-a', 60, 4)
+    first.record_result(claimed[0], True, {'url': claimed[0], 'title': 't'})
+    first.record_result(claimed[1], False, error='permanent')
+    assert first.release_leases('node-a') == 2
+
+    claimed_again = second.claim('node-b', 60, 4)
+    assert claimed_again == claimed[2:] + URLS[4:6]
+    assert second.status_counts() == {'pending': len(URLS) - 2, 'done': 1, 'failed': 1}
+
+
+def claim_until_empty(path, journal_mode, owner, start, results):
+    """
+    گره جداگانه (پردازه spawn) که تا خالی شدن صف اجاره می‌گیرد
+    """
+    store = SqliteStateStore(path, 'shop', journal_mode=journal_mode)
+    start.wait()
+    claimed = []
+    while True:
+        batch = store.claim(owner, 60, 3)
+        if not batch:
+            break
+        claimed.extend(batch)
+    store.close()
+    results.put((owner, claimed))
+
+
+@pytest.mark.parametrize('journal_mode', ['WAL', 'DELETE'])
+def test_claims_across_processes_do_not_overlap(tmp_path, journal_mode):
+    path = str(tmp_path / 'state.db')
+    urls = [f'https://torob.com/p/00000000-0000-4000-8000-{index:012d}/item-{index}/' for index in range(300)]
+    store = SqliteStateStore(path, 'shop', journal_mode=journal_mode)
+    store.filter_remaining(urls)
+    store.close()
+
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    nodes = [
+        context.Process(target=claim_until_empty, args=(path, journal_mode, f'node-{index}', start, results))
+        for index in range(4)
+    ]
+    for node in nodes:
+        node.start()
+    start.set()
+    claims = dict(results.get(timeout=60) for _ in nodes)
+    for node in nodes:
+        node.join(timeout=10)
+        assert node.exitcode == 0
+
+    claimed = [url for owner_urls in claims.values() for url in owner_urls]
+    assert len(claimed) == len(set(claimed))
+    assert set(claimed) == set(urls)
+
+
+@pytest.mark.parametrize('state_store', [{}, {'backend': 'sqlite', 'path': 'state.db'}])
+def test_resume_counts_match_across_backends(make_scraper, state_store):
+    def open_scraper():
+        scraper = make_scraper(state_store=state_store)
+        scraper.load_progress()
+        return scraper
+
+    scraper = open_scraper()
+    for url in URLS[:2]:
+        scraper.collect_result({'url': url, 'success': True, 'product_data': {'url': url, 'title': 't'}})
+    scraper.collect_result({'url': URLS[2], 'success': False, 'product_data': None, 'error': 'missing title'})
+    scraper.cleanup_with_progress_save(URLS)
+
+    resumed = open_scraper()
+    assert resumed.get_status_counts() == (2, 1)
+    assert resumed.filter_remaining_urls(URLS) == URLS[3:]
+    resumed.cleanup_with_progress_save(URLS)
@@ -0,0 +1,27 @@
+from bench_server import KEY_SPEC_NAMES, GENERAL_SPEC_NAMES
+from static_extractor import extract_product_from_html
+
+
+def test_extract_full_product(site, selectors):
+    product = site.products[0]
+    url = f'https://torob.com{product["path"]}'
+    data = extract_product_from_html(site.render_product(product), url, selectors)
+
+    assert data['url'] == url
+    assert data['title'] == product['title']
+    assert [category['name'] for category in data['categories']] == product['categories']
+    assert [category['level'] for category in data['categories']] == list(range(1, len(product['categories']) + 1))
+    assert data['brand'] == product['brand']
+    assert [spec['title'] for spec in data['specifications']['key_specs']] == KEY_SPEC_NAMES
+    assert [spec['title'] for spec in data['specifications']['general_specs']] == GENERAL_SPEC_NAMES
+    assert data['specifications']['general_specs'][0]['body'] == 'مقدار وزن برای محصول 0'
+
+
+def test_extract_product_without_specs(site, selectors):
+    product = site.products[6]
+    assert product['missing_specs']
+    data = extract_product_from_html(site.render_product(product), 'https://torob.com' + product['path'], selectors)
+
+    assert data['title'] == product['title']
+    assert data['brand'] == product['brand']
+    assert data['specifications'] == {'key_specs': [], 'general_specs': []}
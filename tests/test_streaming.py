@@ -0,0 +1,44 @@
+import json
+
+from scraper import product_key
+
+URLS = [f'https://torob.com/p/00000000-0000-4000-8000-{index:012d}/item-{index}/' for index in range(6)]
+
+
+def product(url):
+    return {'url': url, 'title': f'title {url[-3:-1]}', 'brand': None, 'specifications': {}}
+
+
+def collect(scraper, url):
+    scraper.collect_result({'url': url, 'success': True, 'product_data': product(url)})
+
+
+def streaming_scraper(make_scraper):
+    scraper = make_scraper(output={'filename': 'out.json', 'streaming': True})
+    scraper.load_progress()
+    scraper.prepare_output()
+    return scraper
+
+
+def test_stream_resume_after_crash(make_scraper):
+    scraper = streaming_scraper(make_scraper)
+    for url in URLS[:3]:
+        collect(scraper, url)
+    # crash پس از نوشتن خروجی و پیش از ثبت در ژورنال، با یک خط ناقص در انتهای فایل
+    scraper.append_output(product(URLS[3]))
+    scraper.output_handle.write('{"url": "torn')
+    scraper.output_handle.close()
+    scraper.close_journal()
+
+    resumed = streaming_scraper(make_scraper)
+    assert resumed.processed_keys == {product_key(url) for url in URLS[:3]}
+    assert resumed.output_stats['total'] == 4
+    for url in URLS[3:]:
+        collect(resumed, url)
+    resumed.save_data()
+    resumed.close_journal()
+
+    with open('out.json', 'r', encoding='utf-8') as f:
+        products = json.load(f)
+    assert [item['url'] for item in products] == URLS
+    assert resumed.output_stats['total'] == len(URLS)